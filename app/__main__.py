@@ -0,0 +1,201 @@
+"""
+Příkazová řádka bez grafického rozhraní (bez importu Tk) pro dávkové zpracování profilů.
+
+Příklady:
+    python -m app profil.db import data-2024.xlsx --aktualni
+    python -m app profil.db metriky
+    python -m app profil.db pivot --dimenze kategorie_uroven_1,stredisko --miry soucet,pocet
+    python -m app --cas profil.db export transakce.parquet
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+from app import database as db
+from app.database import dashboard_db
+from app import file_exporter
+from app import profile_catalog
+
+TYPES = ("výdej", "příjem")
+
+
+def main(argv=None):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.prikaz != "import" and not os.path.exists(args.profil):
+        print(f"Profil neexistuje: {args.profil}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    # Hlášení migrací na stderr - standardní výstup patří reportu
+    for name in db.init_db(args.profil):
+        print(f"Migrace profilu: {name}", file=sys.stderr)
+    try:
+        result = args.handler(args)
+    except ValueError as e:
+        print(f"Chyba: {e}", file=sys.stderr)
+        result = 1
+    if args.cas:
+        print(f"{args.prikaz}: {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+    return result
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app", description="Dávkové zpracování profilu rozpočtu.")
+    parser.add_argument("--cas", action="store_true", help="vypsat dobu běhu příkazu (na stderr)")
+    parser.add_argument("profil", help="cesta k souboru profilu (.db)")
+    commands = parser.add_subparsers(dest="prikaz", required=True)
+
+    cmd = commands.add_parser("import", help="import transakcí z Excelu (list 'Zdroj')")
+    cmd.add_argument("soubor")
+    cmd.add_argument("--aktualni", action="store_true", help="aktuální data (jinak historická)")
+    cmd.add_argument("--prepsat", action="store_true", help="před importem smazat transakce daného stavu")
+    cmd.set_defaults(handler=_cmd_import)
+
+    cmd = commands.add_parser("metriky", help="přepočet metrik kategorií a rozpočtů custom kategorií")
+    cmd.set_defaults(handler=_cmd_metrics)
+
+    cmd = commands.add_parser("pravidla", help="zařazení nezařazených transakcí podle pravidel")
+    cmd.set_defaults(handler=_cmd_rules)
+
+    cmd = commands.add_parser("stav", help="počty transakcí, kategorií a rozpočtů")
+    cmd.set_defaults(handler=_cmd_state)
+
+    cmd = commands.add_parser("rozpocet", help="přehled rozpočtu po kategoriích")
+    cmd.add_argument("--csv", help="zapsat do CSV souboru (jinak na výstup oddělené tabulátorem)")
+    cmd.set_defaults(handler=_cmd_budget)
+
+    cmd = commands.add_parser("pivot", help="agregace transakcí podle dimenzí")
+    cmd.add_argument("--dimenze", required=True, help="dimenze oddělené čárkou, např. kategorie_uroven_1,stredisko")
+    cmd.add_argument("--miry", default="soucet", help=f"míry oddělené čárkou ({', '.join(db.MEASURES)})")
+    cmd.add_argument("--aktualni", action="store_true", help="aktuální data (jinak historická)")
+    cmd.add_argument("--typ", choices=TYPES, help="jen kategorie daného typu")
+    cmd.add_argument("--top", type=int, help="jen N největších skupin poslední dimenze, zbytek jako 'Ostatní'")
+    cmd.add_argument("--csv", help="zapsat do CSV souboru (jinak na výstup oddělené tabulátorem)")
+    cmd.set_defaults(handler=_cmd_pivot)
+
+    cmd = commands.add_parser("dashboard", help="roční rozpočet a plnění od ledna do měsíce")
+    cmd.add_argument("--mesic", type=int, choices=range(1, 13), default=12, metavar="1-12")
+    cmd.set_defaults(handler=_cmd_dashboard)
+
+    cmd = commands.add_parser("export", help="export transakcí do CSV nebo Parquet (podle přípony)")
+    cmd.add_argument("soubor")
+    cmd.add_argument("--aktualni", action="store_true", help="aktuální data (jinak historická)")
+    cmd.set_defaults(handler=_cmd_export)
+    return parser
+
+
+def _cmd_import(args):
+    # pandas se načte až tady (file_importer ho importuje uvnitř funkce)
+    from app import file_importer
+    is_current = 1 if args.aktualni else 0
+    if args.prepsat:
+        db.delete_all_items(args.profil, is_current=is_current)
+    if not file_importer.import_from_excel(args.soubor, args.profil, is_current):
+        return 1
+    profile_catalog.update_profile_catalog(args.profil)
+    return 0
+
+
+def _cmd_metrics(args):
+    db.update_all_metrics(args.profil)
+    db.update_custom_category_budgets(args.profil)
+    profile_catalog.update_profile_catalog(args.profil)
+    return 0
+
+
+def _cmd_rules(args):
+    report = db.apply_categorization_rules(args.profil)
+    rules = {rule["id"]: rule for rule in db.get_rules(args.profil)}
+    rows = [
+        (rule_id, rules[rule_id]["pole"], rules[rule_id]["vzor"], rules[rule_id]["kategorie"], count)
+        for rule_id, count in sorted(report.items())
+    ]
+    _write_table(["pravidlo", "pole", "vzor", "kategorie", "zarazeno"], rows)
+    if report:
+        profile_catalog.update_profile_catalog(args.profil)
+    return 0
+
+
+def _cmd_state(args):
+    state = db.get_profile_state(args.profil)
+    _write_table(["klic", "hodnota"], sorted(state.items()))
+    return 0
+
+
+def _cmd_budget(args):
+    columns = ["id", "nazev", "typ", "parent_id", "is_custom", "sum_past", "sum_current", "budget_plan"]
+    rows = [[row[c] for c in columns] for row in db.get_budget_overview(args.profil)]
+    _write_table(columns, rows, args.csv)
+    return 0
+
+
+def _cmd_pivot(args):
+    dims = [d.strip() for d in args.dimenze.split(",") if d.strip()]
+    measures = [m.strip() for m in args.miry.split(",") if m.strip()]
+    unknown = [d for d in dims if d not in db.PIVOT_DIMS]
+    if unknown:
+        raise ValueError(f"Neznámé dimenze: {', '.join(unknown)}")
+    unknown = [m for m in measures if m not in db.MEASURES]
+    if unknown:
+        raise ValueError(f"Neznámé míry: {', '.join(unknown)}")
+    is_current = 1 if args.aktualni else 0
+    allowed_types = [args.typ] if args.typ else None
+
+    if args.top:
+        rows = db.get_pivot_rows(args.profil, dims, is_current, allowed_types, measures=measures, top_n=args.top)
+        for row in rows:
+            row["level"] = len(dims)
+    else:
+        # Celý strom včetně mezisoučtů vyšších úrovní
+        rows = db.get_pivot_tree(args.profil, dims, is_current, allowed_types, measures=measures)
+
+    header = ["uroven"] + dims + measures
+    table = [
+        [row["level"]] + list(row["keys"]) + [""] * (len(dims) - len(row["keys"]))
+        + [row["values"].get(m) for m in measures]
+        for row in rows
+    ]
+    _write_table(header, table, args.csv)
+    return 0
+
+
+def _cmd_dashboard(args):
+    rows = []
+    for typ in TYPES:
+        summary = dashboard_db.get_month_total_budget_summary(args.profil, typ, args.mesic)
+        if summary is None:
+            rows.append((typ, 0.0, 0.0, 0.0))
+        else:
+            rows.append((typ, summary["total_budget"], summary["ytd_spending"], round(summary["ytd_percentage"], 2)))
+    _write_table(["typ", "rozpocet", f"plneni_1_{args.mesic}", "procento"], rows)
+    return 0
+
+
+def _cmd_export(args):
+    is_current = 1 if args.aktualni else 0
+    if args.soubor.lower().endswith(".parquet"):
+        ok = file_exporter.export_to_parquet(args.soubor, args.profil, is_current)
+    else:
+        ok = file_exporter.export_to_csv(args.soubor, args.profil, is_current)
+    return 0 if ok else 1
+
+
+def _write_table(header, rows, csv_path=None):
+    """Zapíše tabulku do CSV souboru, nebo (bez csv_path) na standardní výstup oddělenou tabulátorem."""
+    if csv_path:
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+    else:
+        writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
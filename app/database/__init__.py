@@ -1,6 +1,10 @@
 from .items_db import *
 from .categories_db import *
+from .category_index import *
 from .manager import *
 from .categorization_manager import *
+from .rules_db import *
+from .suggestions_db import *
 from .budgets_db import *
-from .analysis_db import *
\ No newline at end of file
+from .analysis_db import *
+from .migrations import *
\ No newline at end of file
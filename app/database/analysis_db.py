@@ -1,88 +1,457 @@
 import sqlite3
 from typing import List, Dict, Any, Optional
+from .items_db import DICTIONARY_COLUMNS
 
+# Dimenze úrovní hierarchie kategorií: kategorie_uroven_1 (kořen) .. kategorie_uroven_N
+CATEGORY_LEVEL_PREFIX = "kategorie_uroven_"
+MAX_CATEGORY_LEVELS = 9
+# Časové dimenze nad odvozenými sloupci items_data: (klíč skupiny, zobrazovaný název)
+# Klíče jsou celá čísla: rok = YYYY, ctvrtleti = YYYYQ, mesic = YYYYMM, tyden = ISO YYYYWW
+TIME_DIMS = {
+	"rok": ("i.rok", "CAST(i.rok AS TEXT)"),
+	"ctvrtleti": ("i.rok * 10 + i.ctvrtleti", "i.rok || ' Q' || i.ctvrtleti"),
+	"mesic": ("i.rok * 100 + i.mesic", "printf('%d-%02d', i.rok, i.mesic)"),
+	"tyden": ("i.tyden", "printf('%d-T%02d', i.tyden / 100, i.tyden % 100)"),
+}
 # Povolené dimenze (sloupce) – bezpečnost proti SQL injection
-_WHITELIST = {"co", "stredisko", "text", "kdo", "firma", "kategorie_id"}
+_WHITELIST = {"co", "stredisko", "text", "kdo", "firma", "kategorie_id"} | set(TIME_DIMS) | {
+	f"{CATEGORY_LEVEL_PREFIX}{n}" for n in range(1, MAX_CATEGORY_LEVELS + 1)
+}
+# Veřejný seznam povolených dimenzí (validace vstupu mimo UI, např. příkazová řádka)
+PIVOT_DIMS = frozenset(_WHITELIST)
 # Normalizované platné typy kategorií
 VALID_TYPES = {"příjem", "výdej"}
 
+# Název sloučené skupiny mimo top-N (get_pivot_rows(top_n=...)), klíč skupiny je None
+OTHERS_LABEL = "Ostatní"
+
+# Míry pivotu (pořadí = pořadí sloupců v UI)
+MEASURES = ("soucet", "soucet_abs", "pocet", "prumer", "minimum", "maximum", "prijmy", "vydaje", "rozpocet")
+MEASURE_LABELS = {
+	"soucet": "Celkem",
+	"soucet_abs": "Součet ABS",
+	"pocet": "Počet",
+	"prumer": "Průměr",
+	"minimum": "Minimum",
+	"maximum": "Maximum",
+	"prijmy": "Příjmy",
+	"vydaje": "Výdaje",
+	"rozpocet": "Rozpočet",
+}
+# Míry počítané přímo nad items: (agregace pro list, agregace pro mezisoučty)
+# soucet/pocet/prumer se odvozují ze sloupců total a pocet, rozpocet z tabulky rozpocty
+_MEASURE_SQL = {
+	"soucet_abs": ("SUM(ABS(i.castka))", "SUM"),
+	"minimum": ("MIN(i.castka)", "MIN"),
+	"maximum": ("MAX(i.castka)", "MAX"),
+	"prijmy": ("SUM(CASE WHEN i.castka > 0 THEN i.castka ELSE 0 END)", "SUM"),
+	"vydaje": ("SUM(CASE WHEN i.castka < 0 THEN i.castka ELSE 0 END)", "SUM"),
+}
+# Zdroj pro agregaci rozpočtu - LEAF kategorie ve tvaru "transakce" (alias i, sloupec kategorie_id)
+_LEAF_CATEGORIES_SQL = "(SELECT id AS kategorie_id FROM kategorie WHERE is_custom = 0)"
+
 
 def get_pivot_rows(
 	db_path: str,
 	dims: List[str],
 	is_current: int,
 	allowed_types: Optional[List[str]] = None,
+	filters: Optional[Dict[str, Any]] = None,
+	backend: str = "sql",
+	measures: Optional[List[str]] = None,
+	top_n: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
 	"""Vrátí agregované řádky pro hierarchický pohled dle zadaných dimenzí.
 
 	Parametry:
 	- db_path: cesta k SQLite databázi (profilu)
-	- dims: pořadí dimenzí pro GROUP BY, např. ['stredisko', 'kategorie_id']
+	- dims: pořadí dimenzí pro GROUP BY, např. ['stredisko', 'kategorie_id'].
+	  'kategorie_uroven_N' seskupí transakce podle předka kategorie na N-té úrovni
+	  hierarchie (1 = kořen); kategorie mělčí než N zůstává sama sebou.
+	  Časové dimenze (TIME_DIMS): 'rok', 'ctvrtleti', 'mesic', 'tyden'.
 	- is_current: 1 = aktuální data, 0 = historická
 	- allowed_types: volitelně seznam typů kategorií, např. ['příjem','výdej'].
 	  Pokud je zadán, filtruje se přes přesné hodnoty k.typ (JOIN je nutný i když kategorie
 	  není mezi dimenzemi).
+	- filters: volitelně { dimenze: klíč skupiny } - omezí data na jednu skupinu
+	  (např. rozbalovaný uzel stromu). Klíč je hodnota 'group_keys' z dřívějšího
+	  výsledku: pro kategorie_id a úrovně kategorií ID kategorie (0 = nezařazeno), pro slovníkové
+	  dimenze (co, stredisko, firma, kdo) ID z číselníku (0 = prázdné), pro časové
+	  dimenze číselný klíč období (0 = bez data), jinak text ('' = prázdné).
+	- backend: "sql" (dotaz do SQLite) nebo "columnar" (vektorový výpočet nad
+	  sloupcovým snapshotem v paměti, viz columnar_db - vyžaduje NumPy).
+	  Míra 'rozpocet' se počítá vždy v SQL.
+	- measures: volitelně seznam měr (MEASURES), výchozí ['soucet']. Všechny míry
+	  se počítají v jednom průchodu (jedna agregace). 'rozpocet' (součet budget_plan
+	  LEAF kategorií skupiny) má hodnotu jen pokud jsou všechny dimenze i filtry
+	  kategoriální (kategorie_id, kategorie_uroven_N), jinak None.
+	- top_n: volitelně omezí poslední dimenzi na N skupin s největším ABS(total)
+	  v rámci každého rodiče (kombinace předchozích klíčů). Zbytek se sloučí do
+	  jednoho řádku OTHERS_LABEL ('Ostatní') s klíčem skupiny None - ve stejném dotazu,
+	  takže velikost výsledku nezávisí na kardinalitě dat.
 
 	Návrat:
-	- list slovníků { 'keys': [...], 'total': float }
+	- list slovníků { 'keys': [...], 'group_keys': [...], 'total': float, 'values': {míra: hodnota} }
+	  Prázdné hodnoty (NULL i '') tvoří jednu skupinu s klíčem ''.
 	"""
 
 	dims = [d for d in dims if d in _WHITELIST]
-	join_kat = ("kategorie_id" in dims) or (allowed_types is not None and len(allowed_types) > 0)
+	filters = {d: v for d, v in (filters or {}).items() if d in _WHITELIST}
+	measures = _clean_measures(measures)
+
+	if backend == "columnar" and "rozpocet" not in measures:
+		from . import columnar_db
+		# Zastaralý snapshot se sestaví na pozadí, do té doby odpoví SQL
+		snapshot = columnar_db.get_current_snapshot(db_path)
+		if snapshot is not None:
+			return snapshot.group_by(dims, is_current, allowed_types, filters, measures, top_n)
+	if backend not in ("sql", "columnar"):
+		raise ValueError(f"Neznámý backend: {backend}")
+
+	sql, params, value_cols = _aggregate_sql(dims, is_current, allowed_types, filters, measures)
+	if dims and top_n:
+		sql = _top_n_sql(sql, len(dims), value_cols, int(top_n))
+	if dims:
+		# Řádek 'Ostatní' (klíč NULL) je vždy poslední mezi sourozenci
+		order_parts = [part for j in range(1, len(dims) + 1)
+		               for part in (f"g{j} IS NULL", f"n{j} COLLATE NOCASE", f"g{j}")]
+		sql = f"SELECT * FROM ({sql}) ORDER BY {', '.join(order_parts)}"
 
 	conn = sqlite3.connect(db_path)
 	cursor = conn.cursor()
 	try:
-		where_clauses = ["i.is_current = ?"]
-		params: List[Any] = [is_current]
-		if allowed_types:
-			filtered = [t for t in allowed_types if t in VALID_TYPES]
-			if filtered:
-				placeholders = ", ".join(["?"] * len(filtered))
-				where_clauses.append(f"k.typ IN ({placeholders})")
-				params.extend(filtered)
-
-		if not dims:
-			sql_total = f"""
-				SELECT COALESCE(SUM(i.castka), 0)
-				FROM items i
-				{"LEFT JOIN kategorie k ON k.id = i.kategorie_id" if join_kat else ""}
-				WHERE {' AND '.join(where_clauses)}
-			"""
-			cursor.execute(sql_total, tuple(params))
-			total = float(cursor.fetchone()[0] or 0.0)
-			return [{"keys": [], "total": total}]
-
-		select_parts: List[str] = []
-		order_parts: List[str] = []
-		group_parts: List[str] = []
-		for d in dims:
-			if d == "kategorie_id":
-				select_parts.append('COALESCE(k.nazev, "") AS kategorie')
-				order_parts.append('k.nazev COLLATE NOCASE')
-				group_parts.append('i.kategorie_id')
-			else:
-				select_parts.append(f'COALESCE(i.{d}, "") AS {d}')
-				order_parts.append(f'i.{d} COLLATE NOCASE')
-				group_parts.append(f'i.{d}')
-
-		sql = f"""
-			SELECT {", ".join(select_parts)}, COALESCE(SUM(i.castka), 0) AS total
-			FROM items i
-			{"LEFT JOIN kategorie k ON k.id = i.kategorie_id" if join_kat else ""}
-			WHERE {' AND '.join(where_clauses)}
-			GROUP BY {", ".join(group_parts)}
-			ORDER BY {", ".join(order_parts)}
-		"""
 		cursor.execute(sql, tuple(params))
-		rows = cursor.fetchall()
+		columns = [c[0] for c in cursor.description]
+		out: List[Dict[str, Any]] = []
+		for r in cursor.fetchall():
+			row = dict(zip(columns, r))
+			out.append({
+				"keys": [("" if row[f"n{j}"] is None else str(row[f"n{j}"])) for j in range(1, len(dims) + 1)],
+				"group_keys": [row[f"g{j}"] for j in range(1, len(dims) + 1)],
+				"total": float(row["total"] or 0.0),
+				"values": _measure_values(row, measures),
+			})
+		return out
+	finally:
+		conn.close()
+
+
+def get_pivot_tree(
+	db_path: str,
+	dims: List[str],
+	is_current: int,
+	allowed_types: Optional[List[str]] = None,
+	measures: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+	"""Vrátí kompletní hierarchii pivotu (mezisoučty všech úrovní + listy) v pořadí stromu.
+
+	Tabulka items se prochází jen JEDNOU (CTE 'leaf' s nejjemnějším GROUP BY),
+	mezisoučty vyšších úrovní se počítají v SQL nad tímto malým mezivýsledkem
+	(UNION ALL po úrovních, obdoba GROUPING SETS). Řádky jsou seřazené tak,
+	že rodič je vždy těsně před svými potomky - UI je vloží jedním průchodem.
+
+	Parametry: stejné jako get_pivot_rows(). Mezisoučty měr se skládají z listů
+	(součty a počty sčítáním, minimum/maximum přes MIN/MAX, průměr = součet / počet).
+
+	Návrat:
+	- list slovníků { 'level': int, 'keys': [...], 'total': float, 'values': {míra: hodnota} }
+	  kde level = 1..len(dims) a keys obsahuje klíče od kořene po danou úroveň.
+	  Prázdné hodnoty (NULL i '') jsou sloučeny do '' (jedna skupina).
+	  Bez dimenzí vrací jediný řádek { 'level': 0, 'keys': [], 'total': celkem, 'values': ... }.
+	"""
+
+	dims = [d for d in dims if d in _WHITELIST]
+	measures = _clean_measures(measures)
+	if not dims:
+		rows = get_pivot_rows(db_path, [], is_current, allowed_types, measures=measures)
+		return [{"level": 0, "keys": [], "total": rows[0]["total"], "values": rows[0]["values"]}]
+
+	leaf_sql, params, value_cols = _aggregate_sql(dims, is_current, allowed_types, {}, measures)
+	n = len(dims)
+
+	# Jeden SELECT na každou úroveň - sloupce hlubších úrovní jsou NULL
+	level_selects: List[str] = []
+	for level in range(1, n + 1):
+		is_leaf = level == n
+		cols = [f"{level} AS lvl"]
+		for j in range(1, n + 1):
+			if j > level:
+				cols.append(f"NULL AS g{j}, NULL AS n{j}")
+			elif is_leaf:
+				cols.append(f"g{j}, n{j}")
+			else:
+				cols.append(f"g{j}, MIN(n{j}) AS n{j}")
+		for col, rollup in value_cols:
+			cols.append(col if is_leaf else f"{rollup}({col}) AS {col}")
+		group_by = "" if is_leaf else " GROUP BY " + ", ".join(f"g{j}" for j in range(1, level + 1))
+		level_selects.append(f"SELECT {', '.join(cols)} FROM leaf{group_by}")
+
+	order_parts: List[str] = []
+	for j in range(1, n + 1):
+		if j > 1:
+			# Mezisoučet úrovně j-1 předchází svým potomkům
+			order_parts.append(f"lvl >= {j}")
+		order_parts.append(f"n{j} COLLATE NOCASE")
+		order_parts.append(f"g{j}")
+
+	sql = f"""
+		WITH leaf AS (
+			{leaf_sql}
+		)
+		SELECT * FROM (
+			{" UNION ALL ".join(level_selects)}
+		)
+		ORDER BY {", ".join(order_parts)}
+	"""
 
+	conn = sqlite3.connect(db_path)
+	cursor = conn.cursor()
+	try:
+		cursor.execute(sql, tuple(params))
+		columns = [c[0] for c in cursor.description]
 		out: List[Dict[str, Any]] = []
-		for r in rows:
-			key_vals = [("" if v is None else str(v)) for v in r[:-1]]
-			total = float(r[-1] or 0.0)
-			out.append({"keys": key_vals, "total": total})
+		for r in cursor.fetchall():
+			row = dict(zip(columns, r))
+			level = int(row["lvl"])
+			names = [row[f"n{j}"] for j in range(1, level + 1)]
+			out.append({
+				"level": level,
+				"keys": [("" if v is None else str(v)) for v in names],
+				"total": float(row["total"] or 0.0),
+				"values": _measure_values(row, measures),
+			})
 		return out
 	finally:
 		conn.close()
 
+
+def _clean_measures(measures: Optional[List[str]]) -> List[str]:
+	"""Ponechá jen známé míry (MEASURES) v zadaném pořadí; výchozí je ['soucet']."""
+	cleaned = [m for m in dict.fromkeys(measures or []) if m in MEASURES]
+	return cleaned or ["soucet"]
+
+
+def _aggregate_sql(dims, is_current, allowed_types, filters, measures):
+	"""Sestaví jednu agregaci items (skupiny g{j}/n{j} + sloupce měr) pro pivot dotazy.
+
+	Návrat: (sql, parametry, [(sloupec míry, agregace pro mezisoučty), ...]).
+	Rozpočet se připojí LEFT JOINem malé agregace nad kategoriemi (LEAF) se stejnými
+	klíči skupin, takže se nenásobí počtem transakcí.
+	"""
+	where_clauses, params = _build_where(is_current, allowed_types, filters)
+
+	select_parts: List[str] = []
+	group_parts: List[str] = []
+	for j, d in enumerate(dims, start=1):
+		group_expr, name_expr = _dim_exprs(d)
+		select_parts.append(f"{group_expr} AS g{j}")
+		select_parts.append(f"MIN({name_expr}) AS n{j}")
+		group_parts.append(f"g{j}")
+
+	value_cols = [("total", "SUM"), ("pocet", "SUM")]
+	select_parts.append("COALESCE(SUM(i.castka), 0) AS total")
+	select_parts.append("COUNT(*) AS pocet")
+	for m in measures:
+		if m in _MEASURE_SQL:
+			aggregate, rollup = _MEASURE_SQL[m]
+			select_parts.append(f"{aggregate} AS m_{m}")
+			value_cols.append((f"m_{m}", rollup))
+
+	group_by = f"GROUP BY {', '.join(group_parts)}" if group_parts else ""
+	sql = f"""
+		SELECT {", ".join(select_parts)}
+		{_from_clause(dims + list(filters), allowed_types)}
+		WHERE {' AND '.join(where_clauses)}
+		{group_by}
+	"""
+
+	if "rozpocet" not in measures or not _is_category_only(dims + list(filters)):
+		return sql, params, value_cols
+
+	# Rozpočet: stejné klíče skupin nad LEAF kategoriemi (alias i = "transakce" s kategorie_id)
+	budget_where, budget_params = _build_where(None, allowed_types, filters)
+	budget_groups = [f"{_dim_exprs(d)[0]} AS g{j}" for j, d in enumerate(dims, start=1)]
+	budget_sql = f"""
+		SELECT {", ".join(budget_groups + ["COALESCE(SUM(r.budget_plan), 0) AS rozpocet"])}
+		{_from_clause(dims + list(filters), allowed_types, source=_LEAF_CATEGORIES_SQL)}
+		JOIN rozpocty r ON r.kategorie_id = i.kategorie_id
+		WHERE {' AND '.join(budget_where) or '1'}
+		{group_by}
+	"""
+	join_on = " AND ".join(f"d.g{j} = b.g{j}" for j in range(1, len(dims) + 1)) or "1"
+	sql = f"""
+		SELECT d.*, COALESCE(b.rozpocet, 0) AS rozpocet
+		FROM ({sql}) d
+		LEFT JOIN ({budget_sql}) b ON {join_on}
+	"""
+	value_cols.append(("rozpocet", "SUM"))
+	return sql, params + budget_params, value_cols
+
+
+def _top_n_sql(sql: str, n: int, value_cols, top_n: int) -> str:
+	"""Obalí agregaci tak, že poslední dimenze má u každého rodiče jen top_n skupin + 'Ostatní'.
+
+	Skupiny se v rámci rodiče očíslují podle ABS(total) (okenní ROW_NUMBER) a vše
+	za top_n se seskupí do jedné skupiny s klíčem NULL; míry se sloučí stejně
+	jako mezisoučty stromu.
+	"""
+	parents = [f"g{j}" for j in range(1, n)]
+	partition = f"PARTITION BY {', '.join(parents)} " if parents else ""
+	cols: List[str] = []
+	for j in range(1, n):
+		cols.append(f"g{j}, MIN(n{j}) AS n{j}")
+	cols.append(f"CASE WHEN MIN(poradi) <= {top_n} THEN MIN(g{n}) END AS g{n}")
+	cols.append(f"CASE WHEN MIN(poradi) <= {top_n} THEN MIN(n{n}) ELSE '{OTHERS_LABEL}' END AS n{n}")
+	for col, rollup in value_cols:
+		cols.append(f"{rollup}({col}) AS {col}")
+	return f"""
+		SELECT {", ".join(cols)}
+		FROM (
+			SELECT agg.*, ROW_NUMBER() OVER ({partition}ORDER BY ABS(total) DESC, n{n} COLLATE NOCASE, g{n}) AS poradi
+			FROM ({sql}) agg
+		)
+		GROUP BY {", ".join(parents + [f"MIN(poradi, {top_n + 1})"])}
+	"""
+
+
+def _measure_values(row: Dict[str, Any], measures: List[str]) -> Dict[str, Any]:
+	"""Převede sloupce agregace na { míra: hodnota } (None = míru nelze spočítat)."""
+	total = float(row["total"] or 0.0)
+	count = int(row["pocet"] or 0)
+	values: Dict[str, Any] = {}
+	for m in measures:
+		if m == "soucet":
+			values[m] = total
+		elif m == "pocet":
+			values[m] = count
+		elif m == "prumer":
+			values[m] = total / count if count else None
+		elif m == "rozpocet":
+			values[m] = None if row.get("rozpocet") is None else float(row["rozpocet"])
+		else:
+			value = row.get(f"m_{m}")
+			values[m] = None if value is None else float(value)
+	return values
+
+
+def _is_category_only(dims: List[str]) -> bool:
+	"""True, pokud jsou všechny dimenze kategoriální (rozpočet je definovaný pro kategorie)."""
+	return all(d == "kategorie_id" or _category_level(d) for d in dims)
+
+
+def _dim_exprs(dim: str):
+	"""Vrátí (výraz klíče skupiny, výraz zobrazovaného názvu) pro dimenzi (aliasy i/k/c_<dim>).
+
+	Kategorie a slovníkové dimenze se seskupují podle celočíselného ID,
+	název se dohledá až pro výsledné skupiny.
+	"""
+	if dim == "kategorie_id":
+		return "COALESCE(i.kategorie_id, 0)", "COALESCE(k.nazev, '')"
+	level = _category_level(dim)
+	if level:
+		return f"COALESCE(u{level}.skupina_id, 0)", f"COALESCE(ku{level}.nazev, '')"
+	if dim in TIME_DIMS:
+		key_expr, name_expr = TIME_DIMS[dim]
+		return f"COALESCE({key_expr}, 0)", f"CASE WHEN {key_expr} IS NULL THEN '' ELSE {name_expr} END"
+	if dim in DICTIONARY_COLUMNS:
+		return f"COALESCE(i.{dim}_id, 0)", f"COALESCE(c_{dim}.hodnota, '')"
+	return f"COALESCE(i.{dim}, '')", f"COALESCE(i.{dim}, '')"
+
+
+def _from_clause(dims: List[str], allowed_types: Optional[List[str]], source: str = "items_data") -> str:
+	"""Sestaví FROM nad items_data (nebo jiným zdrojem s aliasem i) s JOINy jen na potřebné číselníky a kategorie."""
+	parts = [f"FROM {source} i"]
+	if ("kategorie_id" in dims) or allowed_types:
+		parts.append("LEFT JOIN kategorie k ON k.id = i.kategorie_id")
+	for d in dict.fromkeys(dims):
+		level = _category_level(d)
+		if level:
+			parts.append(f"LEFT JOIN ({_level_mapping_sql(level)}) u{level} ON u{level}.kategorie_id = i.kategorie_id")
+			parts.append(f"LEFT JOIN kategorie ku{level} ON ku{level}.id = u{level}.skupina_id")
+		elif d in DICTIONARY_COLUMNS:
+			parts.append(f"LEFT JOIN ciselnik_{d} c_{d} ON c_{d}.id = i.{d}_id")
+	return "\n".join(parts)
+
+
+def _category_level(dim: str) -> Optional[int]:
+	"""Vrátí číslo úrovně pro dimenzi 'kategorie_uroven_N', jinak None."""
+	if dim.startswith(CATEGORY_LEVEL_PREFIX) and dim in _WHITELIST:
+		return int(dim[len(CATEGORY_LEVEL_PREFIX):])
+	return None
+
+
+def _level_mapping_sql(level: int) -> str:
+	"""Mapování kategorie → její předek na dané úrovni (kategorie, skupina_id).
+
+	Počítá se jednou na dotaz z uzávěru hierarchie (kategorie_closure): úroveň
+	předka = jeho vzdálenost od kořene + 1. Kategorie bez předka na této úrovni
+	(mělčí větev stromu) zůstává ve skupině sama za sebe.
+	"""
+	return f"""
+		SELECT c.descendant_id AS kategorie_id,
+			COALESCE(MAX(CASE WHEN a.hloubka = {int(level) - 1} THEN c.ancestor_id END), c.descendant_id) AS skupina_id
+		FROM kategorie_closure c
+		JOIN (
+			SELECT descendant_id AS id, MAX(depth) AS hloubka
+			FROM kategorie_closure
+			GROUP BY descendant_id
+		) a ON a.id = c.ancestor_id
+		GROUP BY c.descendant_id
+	"""
+
+
+def _build_where(is_current: Optional[int], allowed_types: Optional[List[str]], filters: Optional[Dict[str, Any]] = None):
+	"""Sestaví WHERE podmínky (nad aliasy i/k) a jejich parametry pro pivot dotazy.
+
+	is_current=None podmínku na stav vynechá (agregace rozpočtu nad kategoriemi).
+
+	Filtry na klíč skupiny se skládají tak, aby šly použít indexy
+	(ID: 0 = IS NULL, jinak rovnost; text: prázdný klíč = IS NULL nebo '').
+	"""
+	where_clauses: List[str] = []
+	params: List[Any] = []
+	if is_current is not None:
+		where_clauses.append("i.is_current = ?")
+		params.append(is_current)
+	if allowed_types:
+		filtered = [t for t in allowed_types if t in VALID_TYPES]
+		if filtered:
+			placeholders = ", ".join(["?"] * len(filtered))
+			where_clauses.append(f"k.typ IN ({placeholders})")
+			params.extend(filtered)
+	for dim, value in (filters or {}).items():
+		level = _category_level(dim)
+		if level:
+			where_clauses.append(f"COALESCE(u{level}.skupina_id, 0) = ?")
+			params.append(value or 0)
+		elif dim in TIME_DIMS:
+			clause, values = _time_filter(dim, value)
+			where_clauses.append(clause)
+			params.extend(values)
+		elif dim == "kategorie_id" or dim in DICTIONARY_COLUMNS:
+			column = "i.kategorie_id" if dim == "kategorie_id" else f"i.{dim}_id"
+			if not value:
+				where_clauses.append(f"{column} IS NULL")
+			else:
+				where_clauses.append(f"{column} = ?")
+				params.append(value)
+		elif value is None or value == "":
+			where_clauses.append(f"(i.{dim} IS NULL OR i.{dim} = '')")
+		else:
+			where_clauses.append(f"i.{dim} = ?")
+			params.append(value)
+	return where_clauses, params
+
+
+def _time_filter(dim: str, value):
+	"""Podmínka na klíč časové dimenze rozložená na indexované sloupce (rok, ctvrtleti, mesic, tyden)."""
+	value = int(value or 0)
+	if dim == "tyden":
+		return ("i.tyden IS NULL", []) if not value else ("i.tyden = ?", [value])
+	if not value:
+		return "i.rok IS NULL", []
+	if dim == "rok":
+		return "i.rok = ?", [value]
+	if dim == "ctvrtleti":
+		return "i.rok = ? AND i.ctvrtleti = ?", [value // 10, value % 10]
+	return "i.rok = ? AND i.mesic = ?", [value // 100, value % 100]
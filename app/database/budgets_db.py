@@ -149,17 +149,15 @@ def get_budget_overview(db_path: str):
       - Načte přímo z tabulky rozpocty: sum_past, sum_current, budget_plan
       
     Pro CUSTOM kategorie (is_custom=1):
-      - Prázdné hodnoty se nahradí runtime součtem dětí pomocí rekurzivní agregace
+      - Součet hodnot všech LEAF potomků (JOIN přes kategorie_closure, bez rekurze)
       
     Výsledek: list dictů se sloupci: id, nazev, typ, parent_id, is_custom, sum_past, sum_current, budget_plan
     """
-    from . import categories_db
-    
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
-    # Jednoduchý SELECT s JOIN na rozpocty (pre-computed metriky)
+    # Každá kategorie = součet LEAF kategorií ve svém podstromu (LEAF = jen ona sama)
     sql = """
     SELECT 
         k.id,
@@ -167,43 +165,23 @@ def get_budget_overview(db_path: str):
         k.typ,
         k.parent_id,
         k.is_custom,
-        COALESCE(r.sum_past, 0) AS sum_past,
-        COALESCE(r.sum_current, 0) AS sum_current,
-        COALESCE(r.budget_plan, 0) AS budget_plan
+        COALESCE(SUM(r.sum_past), 0) AS sum_past,
+        COALESCE(SUM(r.sum_current), 0) AS sum_current,
+        COALESCE(SUM(r.budget_plan), 0) AS budget_plan
     FROM kategorie k
-    LEFT JOIN rozpocty r ON r.kategorie_id = k.id
+    LEFT JOIN (
+        kategorie_closure c
+        JOIN kategorie d ON d.id = c.descendant_id AND d.is_custom = 0
+    ) ON c.ancestor_id = k.id
+    LEFT JOIN rozpocty r ON r.kategorie_id = d.id
+    GROUP BY k.id
     ORDER BY k.typ, k.nazev
     """
 
     cursor.execute(sql)
-    rows = cursor.fetchall()
+    result = [dict(row) for row in cursor.fetchall()]
     conn.close()
     
-    # Vytvoř dict s children pro calculate_custom_values()
-    data_dict = {}
-    for row in rows:
-        cat_id = row['id']
-        data_dict[cat_id] = dict(row)
-        data_dict[cat_id]['children'] = []
-    
-    # Přiřaď děti k parentům
-    for row in rows:
-        parent_id = row['parent_id']
-        if parent_id and parent_id in data_dict:
-            data_dict[parent_id]['children'].append(row['id'])
-    
-    # Přepočítej custom kategorie runtime
-    result = []
-    for row in rows:
-        row_dict = dict(row)
-        if row_dict['is_custom'] == 1:
-            # Vypočítej hodnoty custom kategorie rekurzivně
-            custom_values = categories_db.calculate_custom_values(data_dict, row_dict['id'])
-            row_dict['sum_past'] = custom_values['sum_past']
-            row_dict['sum_current'] = custom_values['sum_current']
-            row_dict['budget_plan'] = custom_values['budget_plan']
-        result.append(row_dict)
-    
     return result
 
 def has_any_budget(db_path) -> bool:
@@ -230,31 +208,48 @@ def get_own_budget(db_path: str, category_id: int) -> float:
     conn.close()
     return float(row[0]) if row is not None else 0.0
 
-def update_custom_category_budgets(db_path):
-    """Automaticky aktualizuje rozpočty custom kategorií jako součet jejich podkategorií."""
+def update_custom_category_budgets(db_path, category_id=None):
+    """
+    Automaticky aktualizuje rozpočty custom kategorií jako součet LEAF kategorií v jejich podstromu.
+
+    Celý přepočet běží jako JEDEN SQL příkaz nad uzávěrem hierarchie (kategorie_closure)
+    v jedné transakci, takže funguje správně pro libovolnou hloubku hierarchie - hodnota
+    custom kategorie nezávisí na tom, v jakém pořadí se přepočítají její custom děti.
+
+    Args:
+        db_path: Cesta k databázi
+        category_id: Volitelně ID změněné kategorie. Pokud je zadáno, přepočítají se
+                     jen custom PŘEDCI této kategorie (ostatní se změnou nejsou dotčeny).
+                     None = přepočet všech custom kategorií.
+    """
+    if category_id is None:
+        # Kořeny přepočtu = všechny custom kategorie
+        roots_sql = "SELECT id FROM kategorie WHERE is_custom = 1"
+        params = ()
+    else:
+        # Kořeny přepočtu = custom předci změněné kategorie
+        roots_sql = """
+            SELECT c.ancestor_id
+            FROM kategorie_closure c
+            JOIN kategorie k ON k.id = c.ancestor_id
+            WHERE c.descendant_id = ? AND c.depth > 0 AND k.is_custom = 1"""
+        params = (category_id,)
+
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
-    # Najdi všechny custom kategorie
-    cursor.execute("SELECT id FROM kategorie WHERE is_custom = 1")
-    custom_categories = cursor.fetchall()
-    
-    for (custom_id,) in custom_categories:
-        # Spočítej součet rozpočtů podkategorií
-        cursor.execute("""
-            SELECT COALESCE(SUM(r.budget_plan), 0)
-            FROM kategorie k
-            LEFT JOIN rozpocty r ON k.id = r.kategorie_id
-            WHERE k.parent_id = ?
-        """, (custom_id,))
-        
-        total_budget = cursor.fetchone()[0]
-        
-        # Aktualizuj nebo vlož rozpočet custom kategorie
-        cursor.execute("""
-            INSERT OR REPLACE INTO rozpocty (kategorie_id, budget_plan)
-            VALUES (?, ?)
-        """, (custom_id, total_budget))
-    
+
+    # Rozpočet kořene = SUM(budget_plan) jeho LEAF potomků (custom mezistupně se přeskakují)
+    cursor.execute(f"""
+        INSERT INTO rozpocty (kategorie_id, budget_plan)
+        SELECT c.ancestor_id, COALESCE(SUM(CASE WHEN k.is_custom = 0 THEN r.budget_plan END), 0)
+        FROM kategorie_closure c
+        JOIN kategorie k ON k.id = c.descendant_id
+        LEFT JOIN rozpocty r ON r.kategorie_id = c.descendant_id
+        WHERE c.ancestor_id IN ({roots_sql})
+        GROUP BY c.ancestor_id
+        ON CONFLICT(kategorie_id) DO UPDATE SET
+            budget_plan = excluded.budget_plan
+    """, params)
+
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
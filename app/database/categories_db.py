@@ -1,5 +1,7 @@
 import sqlite3
 
+from .category_index import get_category_index, invalidate_category_index
+
 def create_categories_table(cursor):
     """Vytvoří tabulku 'kategorie', pokud neexistuje."""
     cursor.execute('''
@@ -14,6 +16,52 @@ def create_categories_table(cursor):
         )
     ''')
 
+def rebuild_category_closure(cursor):
+    """
+    Znovu naplní tabulku kategorie_closure z aktuální hierarchie (parent_id).
+
+    kategorie_closure obsahuje pro každou kategorii řádek (předek, potomek, hloubka)
+    pro všechny její předky včetně sebe sama (hloubka 0). Běžné změny (přidání,
+    smazání, přesun kategorie) udržují triggery - přestavba je nutná jen při
+    migraci nebo po ručním zásahu do databáze.
+    """
+    cursor.execute("DELETE FROM kategorie_closure")
+    cursor.execute("""
+        WITH RECURSIVE closure(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM kategorie
+            UNION ALL
+            SELECT c.ancestor_id, k.id, c.depth + 1
+            FROM kategorie k
+            JOIN closure c ON k.parent_id = c.descendant_id
+        )
+        INSERT OR IGNORE INTO kategorie_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM closure
+    """)
+
+def get_subtree_leaf_ids(db_path, category_id):
+    """Vrátí ID všech LEAF kategorií v podstromu kategorie (u LEAF kategorie jen ji samotnou)."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.descendant_id
+        FROM kategorie_closure c
+        JOIN kategorie k ON k.id = c.descendant_id
+        WHERE c.ancestor_id = ?
+          AND k.is_custom = 0
+    """, (category_id,))
+    result = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return result
+
+def get_category_level_count(db_path):
+    """Vrátí počet úrovní hierarchie kategorií (0 = žádné kategorie, 1 = jen kořeny)."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(depth) FROM kategorie_closure")
+    result = cursor.fetchone()[0]
+    conn.close()
+    return 0 if result is None else result + 1
+
 def get_all_categories(db_path):
     """Získá všechny kategorie z databáze."""
     conn = sqlite3.connect(db_path)
@@ -37,7 +85,26 @@ def add_category(db_path, nazev, typ, parent_id, is_custom=0):
     
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
+    try:
+        new_id = insert_category(cursor, nazev, typ, parent_id, is_custom)
+        conn.commit()
+        invalidate_category_index(db_path)
+        return new_id
+    finally:
+        conn.close()
+
+
+def insert_category(cursor, nazev, typ, parent_id, is_custom=0):
+    """
+    Vloží kategorii v rámci otevřené transakce (bez commitu) a vrátí její ID.
+
+    Provádí stejné validace jako add_category() - ta ji volá s vlastním spojením,
+    hromadné operace (categorization_manager.apply_category_decisions) ji volají
+    opakovaně v jedné transakci.
+
+    Raises:
+        ValueError: Při validačních chybách (duplicita, špatný parent, typ)
+    """
     # VALIDACE 1: Pokud má rodiče, zkontroluj hierarchická pravidla
     if parent_id is not None:
         # Získej informace o rodičovské kategorii
@@ -47,14 +114,12 @@ def add_category(db_path, nazev, typ, parent_id, is_custom=0):
         # Note: parent_result by měl vždy existovat díky FOREIGN KEY constraint,
         # ale pro jistotu (např. při přímé manipulaci s DB) kontrolujeme
         if not parent_result:
-            conn.close()
             raise ValueError(f"Rodičovská kategorie s ID {parent_id} neexistuje.")
         
         parent_is_custom, parent_typ = parent_result
         
         # PRAVIDLO 1: Transakční kategorie nemohou mít žádné podkategorie
         if parent_is_custom == 0:
-            conn.close()
             raise ValueError(
                 "Transakční kategorie nemohou mít podkategorie.\n\n"
                 "Pouze custom kategorie (červené s 📁) mohou obsahovat podkategorie."
@@ -62,7 +127,6 @@ def add_category(db_path, nazev, typ, parent_id, is_custom=0):
         
         # PRAVIDLO 2: Typ child musí být stejný jako typ parent
         if typ != parent_typ:
-            conn.close()
             raise ValueError(
                 f"Nelze zařadit položku typu '{typ.capitalize()}' pod '{parent_typ.capitalize()}'."
             )
@@ -73,13 +137,9 @@ def add_category(db_path, nazev, typ, parent_id, is_custom=0):
     # VALIDACE 2: Vložení kategorie (duplicita se ošetří přes UNIQUE constraint)
     try:
         cursor.execute("INSERT INTO kategorie (nazev, typ, parent_id, is_custom) VALUES (?, ?, ?, ?)", (nazev, typ, parent_id, is_custom))
-        new_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return new_id
     except sqlite3.IntegrityError:
-        conn.close()
         raise ValueError(f"Kategorie '{nazev}' typu '{typ}' již existuje.")
+    return cursor.lastrowid
 
 
 def add_category_with_workflow(db_path, nazev, typ, parent_id=None, is_custom=0, assign_transactions=False):
@@ -125,16 +185,9 @@ def add_category_with_workflow(db_path, nazev, typ, parent_id=None, is_custom=0,
     return new_category_id
 
 def get_custom_category_names(db_path):
-    """Vrátí seznam názvů custom kategorií (is_custom = 1)."""
+    """Vrátí seznam názvů custom kategorií (is_custom = 1) z indexu kategorií."""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT nazev FROM kategorie WHERE is_custom = 1")
-        result = cursor.fetchall()
-        
-        conn.close()
-        return [row[0] for row in result]
+        return sorted(get_category_index(db_path).custom_names)
     except Exception as e:
         print(f"Chyba při získávání custom kategorií: {e}")
         return []
@@ -142,14 +195,7 @@ def get_custom_category_names(db_path):
 def is_custom_category(db_path, category_id):
     """Vrátí True pokud kategorie je custom (is_custom = 1)."""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT is_custom FROM kategorie WHERE id = ?", (category_id,))
-        result = cursor.fetchone()
-        
-        conn.close()
-        return result and result[0] == 1
+        return category_id in get_category_index(db_path).custom_ids
     except Exception as e:
         print(f"Chyba při kontrole custom kategorie: {e}")
         return False
@@ -162,6 +208,7 @@ def delete_category(db_path, category_id):
     cursor.execute("DELETE FROM kategorie WHERE id = ?", (category_id,))
     conn.commit()
     conn.close()
+    invalidate_category_index(db_path)
 
 def has_categories(db_path):
     """Vrátí True, pokud v databázi existuje alespoň jedna kategorie."""
@@ -189,24 +236,21 @@ def update_category_metrics(db_path: str, category_id: int):
         
     DŮLEŽITÉ:
     - Počítá JEN pro LEAF kategorie (is_custom=0)
-    - Custom kategorie se počítají za běhu v calculate_custom_values()
+    - Custom kategorie se počítají za běhu jako součet LEAF potomků (kategorie_closure)
     - Historical = všechny transakce s is_current=0
     - YTD = všechny transakce s is_current=1
     """
+    # Kontrola: je to LEAF kategorie? (z indexu kategorií, bez dotazu)
+    if not get_category_index(db_path).is_leaf(category_id):
+        return  # Skip - custom kategorie se nepočítají zde
+
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Kontrola: je to LEAF kategorie?
-    cursor.execute("SELECT is_custom FROM kategorie WHERE id = ?", (category_id,))
-    result = cursor.fetchone()
-    if not result or result[0] == 1:
-        conn.close()
-        return  # Skip - custom kategorie se nepočítají zde
-    
     # 1. HISTORICAL ROZPOČET = všechny historical transakce (is_current=0)
     cursor.execute("""
         SELECT COALESCE(SUM(ABS(castka)), 0)
-        FROM items
+        FROM items_data
         WHERE kategorie_id = ? 
           AND is_current = 0
           AND castka != 0
@@ -216,7 +260,7 @@ def update_category_metrics(db_path: str, category_id: int):
     # 2. YTD PLNĚNÍ = všechny current transakce (is_current=1)
     cursor.execute("""
         SELECT COALESCE(SUM(ABS(castka)), 0)
-        FROM items
+        FROM items_data
         WHERE kategorie_id = ?
           AND is_current = 1
           AND castka != 0
@@ -236,6 +280,47 @@ def update_category_metrics(db_path: str, category_id: int):
     conn.close()
 
 
+def update_categories_metrics(db_path: str, category_ids=None):
+    """
+    Přepočítá pre-computed metriky (sum_past, sum_current) více LEAF kategorií najednou.
+
+    Obdoba update_category_metrics() jedním dotazem (INSERT ... SELECT ... GROUP BY)
+    místo dotazu na každou kategorii - vhodné po hromadných změnách (import,
+    pravidla kategorizace).
+
+    Args:
+        db_path: Cesta k databázi
+        category_ids: ID kategorií k přepočtu; None = všechny LEAF kategorie.
+                      CUSTOM kategorie se přeskočí.
+    """
+    params = []
+    id_filter = ""
+    if category_ids is not None:
+        category_ids = list(category_ids)
+        if not category_ids:
+            return
+        id_filter = f"AND k.id IN ({', '.join('?' * len(category_ids))})"
+        params = category_ids
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        INSERT INTO rozpocty (kategorie_id, budget_plan, sum_past, sum_current)
+        SELECT k.id, 0,
+               COALESCE(SUM(CASE WHEN i.is_current = 0 THEN ABS(i.castka) END), 0),
+               COALESCE(SUM(CASE WHEN i.is_current = 1 THEN ABS(i.castka) END), 0)
+        FROM kategorie k
+        LEFT JOIN items_data i ON i.kategorie_id = k.id AND i.castka != 0
+        WHERE k.is_custom = 0 {id_filter}
+        GROUP BY k.id
+        ON CONFLICT(kategorie_id) DO UPDATE SET
+            sum_past = excluded.sum_past,
+            sum_current = excluded.sum_current
+    """, tuple(params))
+    conn.commit()
+    conn.close()
+
+
 def calculate_custom_values(data: dict, cat_id: int) -> dict:
     """
     Vypočítá hodnoty pro kategorii (LEAF nebo CUSTOM) rekurzivně.
@@ -8,27 +8,23 @@ def get_unassigned_categories_by_type(db_path):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Získáme pouze položky s validním "co" A částkou != 0
+    # Jediný průchod: nezařazené transakce seskupené podle ID z číselníku 'co'
+    # (číselník neobsahuje prázdné hodnoty, nulové částky se vynechají)
     cursor.execute("""
-        SELECT DISTINCT co FROM items 
-        WHERE kategorie_id IS NULL 
-        AND co IS NOT NULL 
-        AND co != '' 
-        AND castka != 0
+        SELECT c.hodnota,
+               MAX(i.castka > 0) AS has_income,
+               MAX(i.castka < 0) AS has_expense
+        FROM items_data i
+        JOIN ciselnik_co c ON c.id = i.co_id
+        WHERE i.kategorie_id IS NULL
+          AND i.castka != 0
+        GROUP BY i.co_id
     """)
-    unassigned_items = [item[0] for item in cursor.fetchall()]
 
     # Připravíme si slovník pro výsledky (BEZ neurčeno)
     result = {'příjem': [], 'výdej': []}
 
-    for item_name in unassigned_items:
-        # Zkontrolujeme typ transakcí
-        cursor.execute("SELECT COUNT(*) FROM items WHERE co = ? AND castka > 0 AND kategorie_id IS NULL", (item_name,))
-        has_income = cursor.fetchone()[0] > 0
-        
-        cursor.execute("SELECT COUNT(*) FROM items WHERE co = ? AND castka < 0 AND kategorie_id IS NULL", (item_name,))
-        has_expense = cursor.fetchone()[0] > 0
-        
+    for item_name, has_income, has_expense in cursor.fetchall():
         # Přidáme do příslušných kategorií
         if has_income:
             result['příjem'].append(item_name)
@@ -52,10 +48,12 @@ def assign_category_to_items_by_type(db_path, co_name, category_id, transaction_
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    # Hodnota 'co' se převede na ID z číselníku (index idx_items_co_kategorie)
+    co_filter = "co_id = (SELECT id FROM ciselnik_co WHERE hodnota = ?)"
     if transaction_type == 'příjem':
-        cursor.execute("UPDATE items SET kategorie_id = ? WHERE co = ? AND castka > 0 AND kategorie_id IS NULL", (category_id, co_name))
+        cursor.execute(f"UPDATE items_data SET kategorie_id = ? WHERE {co_filter} AND castka > 0 AND kategorie_id IS NULL", (category_id, co_name))
     elif transaction_type == 'výdej':
-        cursor.execute("UPDATE items SET kategorie_id = ? WHERE co = ? AND castka < 0 AND kategorie_id IS NULL", (category_id, co_name))
+        cursor.execute(f"UPDATE items_data SET kategorie_id = ? WHERE {co_filter} AND castka < 0 AND kategorie_id IS NULL", (category_id, co_name))
     
     conn.commit()
     conn.close()
@@ -67,6 +65,77 @@ def unassign_items_from_category(db_path, category_id):
     """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute("UPDATE items SET kategorie_id = NULL WHERE kategorie_id = ?", (category_id,))
+    cursor.execute("UPDATE items_data SET kategorie_id = NULL WHERE kategorie_id = ?", (category_id,))
     conn.commit()
     conn.close()
+
+def apply_category_decisions(db_path, decisions):
+    """
+    Hromadně zařadí nezařazené hodnoty 'co' - vše v jedné transakci.
+
+    Každé rozhodnutí je slovník:
+    - 'co': hodnota 'co' nezařazených transakcí
+    - 'typ': 'příjem' nebo 'výdej' (zařadí se jen transakce s odpovídajícím znaménkem)
+    - 'kategorie_id': existující LEAF kategorie (mapování), nebo None = vytvořit
+      novou LEAF kategorii se jménem 'co'
+    - 'parent_id': rodič nové kategorie (CUSTOM) nebo None = kořen; u mapování se ignoruje
+
+    Mapování na existující kategorii jiného jména přidá přesné pravidlo kategorizace
+    (pravidla_kategorizace), aby se hodnota zařazovala i při dalších importech.
+    Přiřazení transakcí proběhne jedním executemany a metriky všech dotčených
+    kategorií jedním přepočtem na konci.
+
+    Returns:
+        Seznam ID kategorií (v pořadí rozhodnutí)
+
+    Raises:
+        ValueError: Při validační chybě kteréhokoli rozhodnutí - nic se neuloží
+    """
+    from . import categories_db
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    category_ids = []
+    try:
+        for decision in decisions:
+            co_name = decision['co']
+            typ = decision['typ']
+            category_id = decision.get('kategorie_id')
+            if category_id is None:
+                category_id = categories_db.insert_category(cursor, co_name, typ, decision.get('parent_id'), 0)
+            else:
+                cursor.execute("SELECT nazev, typ, is_custom FROM kategorie WHERE id = ?", (category_id,))
+                row = cursor.fetchone()
+                if not row or row[2] == 1:
+                    raise ValueError(f"'{co_name}': transakce lze zařadit jen do existující LEAF kategorie.")
+                if row[1] != typ:
+                    raise ValueError(f"Nelze zařadit položku typu '{typ.capitalize()}' pod '{row[1].capitalize()}'.")
+                if row[0] != co_name:
+                    cursor.execute("""
+                        INSERT INTO pravidla_kategorizace (pole, typ_shody, vzor, znamenko, kategorie_id)
+                        SELECT 'co', 'presne', ?, ?, ?
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM pravidla_kategorizace
+                            WHERE pole = 'co' AND typ_shody = 'presne' AND vzor = ? AND znamenko = ? AND kategorie_id = ?
+                        )
+                    """, (co_name, typ, category_id) * 2)
+            category_ids.append(category_id)
+
+        sign = {'příjem': "castka > 0", 'výdej': "castka < 0"}
+        for typ, condition in sign.items():
+            cursor.executemany(
+                f"""UPDATE items_data SET kategorie_id = ?
+                    WHERE co_id = (SELECT id FROM ciselnik_co WHERE hodnota = ?) AND {condition} AND kategorie_id IS NULL""",
+                [(category_id, decision['co'])
+                 for decision, category_id in zip(decisions, category_ids) if decision['typ'] == typ],
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    categories_db.invalidate_category_index(db_path)
+    categories_db.update_categories_metrics(db_path, set(category_ids))
+    return category_ids
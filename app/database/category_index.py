@@ -0,0 +1,93 @@
+import os
+import sqlite3
+
+# Načtené indexy kategorií podle (absolutní) cesty profilu
+_INDEXES = {}
+
+
+class CategoryIndex:
+    """
+    Paměťový index kategorií jednoho profilu (načtený jedním dotazem).
+
+    - leaf_ids: (nazev, typ) → ID LEAF kategorie (automatické přiřazení podle 'co')
+    - custom_names: názvy CUSTOM kategorií (nesmí se použít jako 'co')
+    - custom_ids: ID CUSTOM kategorií
+    - parent: ID → parent_id, children: ID → [ID potomků]
+    - rules: zkompilovaná pravidla kategorizace (rules_db.load_rule_matcher) nebo None
+
+    Index platí, dokud se nezmění tabulka kategorie nebo pravidla - zápisy v categories_db,
+    rules_db a categorization_manager volají invalidate_category_index().
+    """
+
+    def __init__(self, rows, rules=None):
+        # rows: iterable (id, nazev, typ, parent_id, is_custom)
+        self.rules = rules
+        self.leaf_ids = {}
+        self.custom_names = set()
+        self.custom_ids = set()
+        self.parent = {}
+        self.children = {}
+        for category_id, nazev, typ, parent_id, is_custom in rows:
+            self.parent[category_id] = parent_id
+            self.children.setdefault(category_id, [])
+            if is_custom:
+                self.custom_names.add(nazev)
+                self.custom_ids.add(category_id)
+            else:
+                self.leaf_ids[(nazev, typ)] = category_id
+        for category_id, parent_id in self.parent.items():
+            if parent_id in self.children:
+                self.children[parent_id].append(category_id)
+
+    def leaf_id_for(self, co, castka):
+        """
+        Vrátí ID LEAF kategorie pro hodnotu 'co' a typ podle znaménka částky.
+
+        Nulová částka, prázdné 'co' nebo neexistující kategorie → None (nezařazeno).
+        """
+        if not co or not str(co).strip() or not castka:
+            return None
+        typ = 'příjem' if castka > 0 else 'výdej'
+        return self.leaf_ids.get((co, typ))
+
+    def category_for(self, co, castka, text="", firma="", stredisko=""):
+        """
+        Vrátí ID LEAF kategorie pro transakci: podle názvu 'co' (leaf_id_for),
+        jinak podle pravidel kategorizace (včetně mapování z účetní osnovy).
+        """
+        category_id = self.leaf_id_for(co, castka)
+        if category_id is None and self.rules is not None and castka:
+            values = {"co": str(co or ""), "text": str(text or ""), "firma": str(firma or "")}
+            rule = self.rules.match(values, castka, str(stredisko or ""))
+            if rule is not None:
+                category_id = rule[6]
+        return category_id
+
+    def is_leaf(self, category_id):
+        """True pro existující LEAF (transakční) kategorii."""
+        return category_id in self.parent and category_id not in self.custom_ids
+
+
+def get_category_index(db_path):
+    """Vrátí (případně načte) index kategorií profilu."""
+    key = os.path.abspath(db_path)
+    index = _INDEXES.get(key)
+    if index is None:
+        # rules_db importuje categories_db (a ten tento modul) - import až zde
+        from .rules_db import load_rule_matcher
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nazev, typ, parent_id, is_custom FROM kategorie")
+        rows = cursor.fetchall()
+        index = CategoryIndex(rows, load_rule_matcher(cursor))
+        conn.close()
+        _INDEXES[key] = index
+    return index
+
+
+def invalidate_category_index(db_path=None):
+    """Zahodí index kategorií profilu (None = všech profilů); další přístup ho načte znovu."""
+    if db_path is None:
+        _INDEXES.clear()
+    else:
+        _INDEXES.pop(os.path.abspath(db_path), None)
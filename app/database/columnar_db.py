@@ -0,0 +1,567 @@
+"""
+Sloupcový (in-memory) snapshot tabulky items pro rychlé analytické dotazy.
+
+Tabulka se načte JEDNOU pro danou verzi dat profilu (viz manager.get_data_version)
+do NumPy polí a skupinové součty, filtry a měsíční/YTD výpočty se pak počítají
+vektorově bez dalších dotazů do SQLite.
+
+Textové dimenze (co, stredisko, firma, kdo, text) jsou slovníkově kódované:
+pole int32 kódů + seznam hodnot. Prázdná hodnota (NULL i '') má vždy kód 0.
+Pro dimenze s číselníkem v databázi (items_db.DICTIONARY_COLUMNS) je kódem
+přímo ID z číselníku, takže klíče skupin odpovídají SQL verzi pivotu.
+
+Snapshot se ukládá i na disk vedle profilu (<profil>.db.snapshot.<verze dat>) -
+pevně široká pole + slovníky. Při dalším otevření profilu se soubor jen namapuje
+do paměti (numpy.memmap), takže odpadá celý průchod tabulkou items. Každá verze
+má vlastní soubor: nový snapshot tak nikdy nepřepisuje soubor, který je ještě
+namapovaný (Windows to nedovolí), staré soubory se mažou až po uvolnění.
+
+Analytické funkce používají get_current_snapshot(): pokud snapshot pro aktuální
+verzi dat ještě není, odpoví SQL verze a snapshot se sestaví na pozadí.
+
+Modul vyžaduje NumPy, proto ho balíček app.database neimportuje automaticky
+- funkce v analysis_db/dashboard_db ho načtou až při volbě backend="columnar".
+"""
+import glob
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from . import manager
+from .items_db import DICTIONARY_COLUMNS
+from .analysis_db import OTHERS_LABEL, PIVOT_DIMS, TIME_DIMS, _category_level, _clean_measures, _measure_values
+
+# Slovníkově kódované textové dimenze
+TEXT_DIMS = ("co", "stredisko", "firma", "kdo", "text")
+# Dimenze, jejichž kód je ID z číselníku ciselnik_<dim> (ostatní se kódují při načtení)
+CODED_DIMS = tuple(d for d in TEXT_DIMS if d in DICTIONARY_COLUMNS)
+# Kódy typů kategorií v poli cat_typ
+TYPE_CODES = {"příjem": 1, "výdej": 2}
+
+# Řazení shodné s COLLATE NOCASE v SQLite (mění jen ASCII A-Z)
+_NOCASE = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# Cache snapshotů: db_path -> ColumnarSnapshot (platný pro snapshot.data_version)
+_snapshots = {}
+# Profily, pro které právě běží sestavení snapshotu na pozadí
+_rebuilding = set()
+_rebuild_lock = threading.Lock()
+
+# Formát souboru: MAGIC, délka JSON hlavičky (uint64 LE), hlavička, zarovnaná pole
+SNAPSHOT_SUFFIX = ".snapshot"
+_MAGIC = b"RZSNAP04"
+_ALIGN = 64
+
+# Jak dlouho (s) čekat na zámek profilu, když do něj právě zapisuje UI nebo import
+LOAD_TIMEOUT = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarSnapshot:
+    """Sloupcová kopie tabulky items (a typů kategorií) pro jednu verzi dat profilu."""
+
+    def __init__(self, data_version: int, columns: Dict[str, np.ndarray],
+                 dictionaries: Dict[str, List[str]], categories: List[tuple]):
+        """
+        Args:
+            data_version: Verze dat profilu, ze které snapshot vznikl
+            columns: Pole stejné délky - id, castka, is_current, kategorie_id,
+                     datum_ymd (0 = bez data), mesic, tyden a kódy textových dimenzí (TEXT_DIMS).
+                     Mohou to být i pole namapovaná ze souboru (numpy.memmap).
+            dictionaries: Pro každou textovou dimenzi seznam hodnot (index = kód)
+            categories: Seznam (id, nazev, typ, parent_id) všech kategorií
+        """
+        self.data_version = data_version
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.row_count = len(columns["castka"])
+        self.mesic = columns["mesic"]
+        self.categories = [tuple(c) for c in categories]
+
+        # Lookup podle ID kategorie: typ (0 = nezařazeno) a název
+        max_cat_id = max([c[0] for c in categories], default=0)
+        if self.row_count:
+            max_cat_id = max(max_cat_id, int(columns["kategorie_id"].max()))
+        self.cat_typ = np.zeros(max_cat_id + 1, dtype=np.int8)
+        self.cat_names = {0: ""}
+        self.cat_parent = {}
+        for cat_id, nazev, typ, parent_id in self.categories:
+            self.cat_typ[cat_id] = TYPE_CODES.get(typ, 0)
+            self.cat_names[cat_id] = nazev
+            self.cat_parent[cat_id] = parent_id
+
+        self._month_matrix = {}  # is_current -> matice součtů [kategorie, měsíc]
+        self._code_index = {}    # dimenze -> {hodnota: kód}
+        self._level_map = {}     # úroveň -> pole [kategorie_id] = ID předka na úrovni
+
+    # ------------------------------------------------------------------
+    # Načtení
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, db_path: str) -> "ColumnarSnapshot":
+        """
+        Načte snapshot z databáze jedním průchodem tabulkou items.
+
+        Vše se čte v jedné čtecí transakci, takže verze dat, kategorie
+        i transakce odpovídají stejnému stavu profilu i při souběžném zápisu.
+        """
+        conn = sqlite3.connect(db_path, timeout=LOAD_TIMEOUT, isolation_level=None)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            data_version = _read_data_version(cursor)
+
+            cursor.execute("SELECT id, nazev, typ, parent_id FROM kategorie")
+            categories = cursor.fetchall()
+
+            dim_columns = [f"{d}_id" if d in CODED_DIMS else d for d in TEXT_DIMS]
+            cursor.execute(f"""
+                SELECT id, castka, is_current, kategorie_id, datum_ymd, tyden, {", ".join(dim_columns)}
+                FROM items_data
+                ORDER BY id
+            """)
+            rows = cursor.fetchall()
+
+            dictionaries = {}
+            for dim in CODED_DIMS:
+                cursor.execute(f"SELECT id, hodnota FROM ciselnik_{dim}")
+                entries = cursor.fetchall()
+                values = [""] * (max([e[0] for e in entries], default=0) + 1)
+                for code, value in entries:
+                    values[code] = value
+                dictionaries[dim] = values
+            cursor.execute("COMMIT")
+        finally:
+            conn.close()
+
+        n = len(rows)
+        columns = {
+            "id": np.fromiter((r[0] for r in rows), dtype=np.int64, count=n),
+            "castka": np.fromiter((r[1] or 0.0 for r in rows), dtype=np.float64, count=n),
+            "is_current": np.fromiter((r[2] or 0 for r in rows), dtype=np.int8, count=n),
+            "kategorie_id": np.fromiter((r[3] or 0 for r in rows), dtype=np.int32, count=n),
+            "datum_ymd": np.fromiter((r[4] or 0 for r in rows), dtype=np.int32, count=n),
+        }
+        columns["mesic"] = (columns["datum_ymd"] // 100 % 100).astype(np.int8)
+        columns["tyden"] = np.fromiter((r[5] or 0 for r in rows), dtype=np.int32, count=n)
+        for offset, dim in enumerate(TEXT_DIMS, start=6):
+            if dim in CODED_DIMS:
+                columns[dim] = np.fromiter((r[offset] or 0 for r in rows), dtype=np.int32, count=n)
+            else:
+                columns[dim], dictionaries[dim] = _encode((r[offset] for r in rows), n)
+
+        return cls(data_version, columns, dictionaries, categories)
+
+    # ------------------------------------------------------------------
+    # Uložení / namapování souboru
+    # ------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """
+        Uloží snapshot do souboru (atomicky přes dočasný soubor).
+
+        Pole se zapisují za JSON hlavičku zarovnaná na 64 B, aby je šlo
+        přímo namapovat přes numpy.memmap bez kopírování.
+        """
+        layout = {}
+        offset = 0
+        for name, array in self.columns.items():
+            offset = _aligned(offset)
+            layout[name] = {"dtype": array.dtype.str, "offset": offset, "length": int(len(array))}
+            offset += array.nbytes
+
+        header = json.dumps({
+            "data_version": self.data_version,
+            "row_count": self.row_count,
+            "columns": layout,
+            "dictionaries": self.dictionaries,
+            "categories": self.categories,
+        }, ensure_ascii=False).encode("utf-8")
+        data_start = _aligned(len(_MAGIC) + 8 + len(header))
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for name, array in self.columns.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open_mapped(cls, path: str) -> "ColumnarSnapshot":
+        """Otevře snapshot ze souboru - pole jsou jen namapovaná (numpy.memmap, read-only)."""
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"Soubor {path} není snapshot profilu.")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        data_start = _aligned(len(_MAGIC) + 8 + header_len)
+
+        columns = {}
+        for name, info in header["columns"].items():
+            if info["length"] == 0:
+                columns[name] = np.empty(0, dtype=np.dtype(info["dtype"]))
+                continue
+            columns[name] = np.memmap(
+                path, dtype=np.dtype(info["dtype"]), mode="r",
+                offset=data_start + info["offset"], shape=(info["length"],)
+            )
+        return cls(header["data_version"], columns, header["dictionaries"], header["categories"])
+
+    # ------------------------------------------------------------------
+    # Dotazy
+    # ------------------------------------------------------------------
+
+    def group_by(
+        self,
+        dims: List[str],
+        is_current: int,
+        allowed_types: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        measures: Optional[List[str]] = None,
+        top_n: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Vektorová obdoba analysis_db.get_pivot_rows() - stejné parametry i tvar výsledku.
+
+        Skupiny se tvoří nad celočíselnými kódy (kategorie_id, slovníkové kódy),
+        součty a počty přes np.bincount, minimum/maximum přes np.minimum.at/np.maximum.at.
+        Řazení odpovídá SQL verzi (NOCASE podle názvu). Míru 'rozpocet' snapshot
+        nezná - počítá ji jen SQL verze. Při top_n se skupiny poslední dimenze mimo
+        top-N přečíslují na kód -1 ('Ostatní') a agregace se spočítá znovu.
+        """
+        # Stejná validace dimenzí jako v SQL verzi (analysis_db.PIVOT_DIMS)
+        dims = [d for d in dims if d in PIVOT_DIMS]
+        filters = {d: v for d, v in (filters or {}).items() if d in PIVOT_DIMS}
+        measures = _clean_measures(measures)
+        mask = self._mask(is_current, allowed_types, filters)
+        castka = self.columns["castka"][mask]
+
+        if not dims:
+            inverse = np.zeros(len(castka), dtype=np.int64)
+            aggregates = _aggregate(castka, inverse, 1, measures)
+            row = {col: values[0] for col, values in aggregates.items()}
+            return [{"keys": [], "group_keys": [], "total": float(row["total"]),
+                     "values": _measure_values(row, measures)}]
+
+        code_columns = [self._codes(d)[mask] for d in dims]
+        if len(castka) == 0:
+            return []
+
+        # Složený klíč skupiny → index skupiny
+        stacked = np.stack([c.astype(np.int64) for c in code_columns], axis=1)
+        unique_codes, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        if top_n:
+            folded = self._top_n_groups(dims, unique_codes, inverse.ravel(), castka, int(top_n))
+            stacked[folded[inverse.ravel()], -1] = -1
+            unique_codes, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        aggregates = _aggregate(castka, inverse.ravel(), len(unique_codes), measures)
+
+        out = []
+        for index, codes in enumerate(unique_codes.tolist()):
+            row = {col: values[index] for col, values in aggregates.items()}
+            group_keys = [self._group_key(d, c) for d, c in zip(dims, codes)]
+            keys = [self._name(d, c) for d, c in zip(dims, codes)]
+            out.append({"keys": keys, "group_keys": group_keys, "total": float(row["total"]),
+                        "values": _measure_values(row, measures)})
+
+        out.sort(key=lambda r: [part for k, g in zip(r["keys"], r["group_keys"])
+                                for part in (g is None, k.translate(_NOCASE), g)])
+        return out
+
+    def month_sum(self, category_ids: List[int], is_current: int, month_from: int, month_to: int) -> float:
+        """
+        Součet ABS(castka) pro dané kategorie a rozsah měsíců (včetně).
+
+        Používá předpočítanou matici [kategorie × měsíc] pro daný stav,
+        takže každý dotaz je jen součet několika buněk.
+        """
+        matrix = self._month_sums(is_current)
+        ids = [c for c in category_ids if 0 < c < matrix.shape[0]]
+        if not ids:
+            return 0.0
+        return float(matrix[ids, month_from:month_to + 1].sum())
+
+    # ------------------------------------------------------------------
+    # Interní pomocné metody
+    # ------------------------------------------------------------------
+
+    def _mask(self, is_current, allowed_types, filters):
+        """Vrátí booleovskou masku řádků pro stav, typy kategorií a filtry na klíč skupiny."""
+        mask = self.columns["is_current"] == is_current
+        if allowed_types:
+            codes = [TYPE_CODES[t] for t in allowed_types if t in TYPE_CODES]
+            if codes:
+                row_types = self.cat_typ[self.columns["kategorie_id"]]
+                mask &= np.isin(row_types, codes)
+        for dim, value in (filters or {}).items():
+            if dim == "kategorie_id" or dim in CODED_DIMS or dim in TIME_DIMS or _category_level(dim):
+                mask &= self._codes(dim) == (value or 0)
+            elif dim in TEXT_DIMS:
+                code = self._lookup_code(dim, value or "")
+                mask &= self.columns[dim] == code
+        return mask
+
+    def _codes(self, dim):
+        if dim == "kategorie_id":
+            return self.columns["kategorie_id"]
+        level = _category_level(dim)
+        if level:
+            return self._category_levels(level)[self.columns["kategorie_id"]]
+        if dim in TIME_DIMS:
+            return self._time_codes(dim)
+        if dim in TEXT_DIMS:
+            return self.columns[dim]
+        raise ValueError(f"Neznámá dimenze: {dim}")
+
+    def _lookup_code(self, dim, value):
+        if dim not in self._code_index:
+            self._code_index[dim] = {v: i for i, v in enumerate(self.dictionaries[dim])}
+        return self._code_index[dim].get(value, -1)
+
+    def _top_n_groups(self, dims, unique_codes, inverse, castka, top_n):
+        """Vrátí masku skupin, které v rámci rodiče nepatří mezi top_n podle ABS(total).
+
+        Pořadí shodné s SQL (ROW_NUMBER): ABS(total) sestupně, pak název NOCASE a klíč.
+        """
+        totals = np.bincount(inverse, weights=castka, minlength=len(unique_codes))
+        if unique_codes.shape[1] > 1:
+            _, parent = np.unique(unique_codes[:, :-1], axis=0, return_inverse=True)
+            parent = parent.ravel()
+        else:
+            parent = np.zeros(len(unique_codes), dtype=np.int64)
+        last = dims[-1]
+        codes = unique_codes[:, -1].tolist()
+        names = np.array([self._name(last, c).translate(_NOCASE) for c in codes])
+        keys = np.array([self._group_key(last, c) for c in codes])
+        order = np.lexsort((keys, names, -np.abs(totals), parent))
+        # Pořadí skupiny v rámci rodiče (0 = největší)
+        starts = np.searchsorted(parent[order], parent[order], side="left")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order)) - starts
+        return rank >= top_n
+
+    def _group_key(self, dim, code):
+        if code == -1:
+            return None
+        if dim == "kategorie_id" or dim in CODED_DIMS or dim in TIME_DIMS or _category_level(dim):
+            return code
+        return self.dictionaries[dim][code]
+
+    def _name(self, dim, code):
+        if code == -1:
+            return OTHERS_LABEL
+        if dim == "kategorie_id" or _category_level(dim):
+            return self.cat_names.get(code, "")
+        if dim in TIME_DIMS:
+            return _time_name(dim, code)
+        return self.dictionaries[dim][code]
+
+    def _time_codes(self, dim):
+        """Klíče časové dimenze stejné jako v analysis_db.TIME_DIMS (0 = bez data)."""
+        if dim == "tyden":
+            return self.columns["tyden"]
+        rok = (self.columns["datum_ymd"] // 10000).astype(np.int64)
+        mesic = self.mesic.astype(np.int64)
+        if dim == "rok":
+            return rok
+        if dim == "ctvrtleti":
+            return np.where(rok > 0, rok * 10 + (mesic + 2) // 3, 0)
+        return np.where(rok > 0, rok * 100 + mesic, 0)
+
+    def _category_levels(self, level):
+        """Pole [kategorie_id] → ID předka na dané úrovni (1 = kořen); mělčí kategorie = ona sama."""
+        if level not in self._level_map:
+            mapping = np.zeros(len(self.cat_typ), dtype=np.int32)
+            for cat_id in self.cat_parent:
+                path = [cat_id]
+                while self.cat_parent.get(path[-1]) is not None and len(path) <= len(self.cat_parent):
+                    path.append(self.cat_parent[path[-1]])
+                path.reverse()  # kořen → kategorie
+                mapping[cat_id] = path[level - 1] if len(path) >= level else cat_id
+            self._level_map[level] = mapping
+        return self._level_map[level]
+
+    def _month_sums(self, is_current):
+        """Matice součtů ABS(castka) [kategorie_id, měsíc 0..12] pro daný stav (lazy)."""
+        if is_current not in self._month_matrix:
+            cat = self.columns["kategorie_id"]
+            mask = (self.columns["is_current"] == is_current) & (cat > 0) & (self.mesic > 0)
+            n_cats = len(self.cat_typ)
+            flat = cat[mask].astype(np.int64) * 13 + self.mesic[mask]
+            sums = np.bincount(flat, weights=np.abs(self.columns["castka"][mask]), minlength=n_cats * 13)
+            self._month_matrix[is_current] = sums[:n_cats * 13].reshape(n_cats, 13)
+        return self._month_matrix[is_current]
+
+
+def get_snapshot(db_path: str) -> ColumnarSnapshot:
+    """
+    Vrátí sloupcový snapshot profilu platný pro aktuální verzi dat.
+
+    Pořadí zdrojů: cache v paměti → soubor snapshotu pro aktuální verzi dat
+    (namapuje se, bez čtení items) → nové načtení z databáze, které se
+    zároveň uloží do souboru pro příští otevření profilu.
+
+    Nové načtení trvá úměrně počtu transakcí - z UI používejte get_current_snapshot().
+    """
+    version = manager.get_data_version(db_path)
+    snapshot = _cached_or_mapped(db_path, version)
+    if snapshot is None:
+        snapshot = _rebuild(db_path)
+    return snapshot
+
+
+def get_current_snapshot(db_path: str, rebuild: bool = True) -> Optional[ColumnarSnapshot]:
+    """
+    Vrátí snapshot platný pro aktuální verzi dat, nebo None - bez čekání na sestavení.
+
+    Pokud snapshot chybí nebo je zastaralý (po zápisu do profilu), spustí se
+    jeho sestavení a uložení ve vlákně na pozadí (rebuild=True) a volající
+    mezitím odpoví z SQL; po dokončení se další dotazy vrací k snapshotu.
+    """
+    snapshot = _cached_or_mapped(db_path, manager.get_data_version(db_path))
+    if snapshot is None and rebuild:
+        with _rebuild_lock:
+            if db_path in _rebuilding:
+                return None
+            _rebuilding.add(db_path)
+        threading.Thread(target=_rebuild_in_background, args=(db_path,), daemon=True).start()
+    return snapshot
+
+
+def get_snapshot_path(db_path: str, data_version: int) -> str:
+    """Vrátí cestu k souboru se snapshotem dané verze dat (vedle profilu)."""
+    return f"{db_path}{SNAPSHOT_SUFFIX}.{data_version}"
+
+
+def _cached_or_mapped(db_path: str, version: int) -> Optional[ColumnarSnapshot]:
+    """Snapshot pro danou verzi dat z cache v paměti nebo ze souboru; jinak None."""
+    snapshot = _snapshots.get(db_path)
+    if snapshot is not None and snapshot.data_version == version:
+        return snapshot
+
+    path = get_snapshot_path(db_path, version)
+    if not os.path.exists(path):
+        return None
+    try:
+        mapped = ColumnarSnapshot.open_mapped(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Snapshot profilu nelze načíst, vytvoří se znovu: %s", e)
+        return None
+    if mapped.data_version != version:
+        return None
+    _snapshots[db_path] = mapped
+    _remove_old_snapshot_files(db_path, version)
+    return mapped
+
+
+def _rebuild(db_path: str) -> ColumnarSnapshot:
+    """Načte snapshot z databáze, uloží ho do souboru své verze a zapamatuje v cache."""
+    snapshot = ColumnarSnapshot.load(db_path)
+    try:
+        snapshot.save(get_snapshot_path(db_path, snapshot.data_version))
+    except OSError as e:
+        logger.warning("Snapshot profilu se nepodařilo uložit: %s", e)
+    # Zahozením staré instance se uvolní její namapování, starý soubor pak jde smazat
+    _snapshots[db_path] = snapshot
+    _remove_old_snapshot_files(db_path, snapshot.data_version)
+    return snapshot
+
+
+def _rebuild_in_background(db_path: str) -> None:
+    try:
+        _rebuild(db_path)
+    except Exception:
+        # Analytické dotazy dál odpovídají z SQL; příště se sestavení zkusí znovu
+        logger.exception("Sloupcový snapshot se nepodařilo sestavit")
+    finally:
+        with _rebuild_lock:
+            _rebuilding.discard(db_path)
+
+
+def _remove_old_snapshot_files(db_path: str, keep_version: int) -> None:
+    """
+    Smaže soubory snapshotů jiných verzí (i nedokončené .tmp).
+
+    Soubor, který je ještě někde namapovaný, Windows smazat nedovolí - zůstane
+    a smaže se při některém dalším úklidu.
+    """
+    keep = get_snapshot_path(db_path, keep_version)
+    for path in glob.glob(glob.escape(db_path + SNAPSHOT_SUFFIX) + "*"):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _time_name(dim: str, code: int) -> str:
+    """Zobrazovaný název období - stejný formát jako SQL výrazy v analysis_db.TIME_DIMS."""
+    if not code:
+        return ""
+    if dim == "rok":
+        return str(code)
+    if dim == "ctvrtleti":
+        return f"{code // 10} Q{code % 10}"
+    if dim == "mesic":
+        return f"{code // 100}-{code % 100:02d}"
+    return f"{code // 100}-T{code % 100:02d}"
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _read_data_version(cursor) -> int:
+    cursor.execute("SELECT verze FROM verze_dat WHERE id = 1")
+    result = cursor.fetchone()
+    return result[0] if result else 0
+
+
+def _encode(values, n):
+    """Slovníkově zakóduje hodnoty: vrací (pole int32 kódů, seznam hodnot). Prázdné = kód 0."""
+    mapping = {"": 0}
+    dictionary = [""]
+    codes = np.empty(n, dtype=np.int32)
+    for i, value in enumerate(values):
+        key = "" if value is None else str(value)
+        code = mapping.get(key)
+        if code is None:
+            code = len(dictionary)
+            mapping[key] = code
+            dictionary.append(key)
+        codes[i] = code
+    return codes, dictionary
+
+
+def _aggregate(castka, inverse, group_count, measures):
+    """Spočítá sloupce agregace (total, pocet, m_<míra>) po skupinách - obdoba SQL agregace v analysis_db."""
+    counts = np.bincount(inverse, minlength=group_count)
+    out = {
+        "total": np.bincount(inverse, weights=castka, minlength=group_count).tolist(),
+        "pocet": counts.tolist(),
+    }
+    if "soucet_abs" in measures:
+        out["m_soucet_abs"] = np.bincount(inverse, weights=np.abs(castka), minlength=group_count).tolist()
+    if "prijmy" in measures:
+        out["m_prijmy"] = np.bincount(inverse, weights=np.where(castka > 0, castka, 0.0), minlength=group_count).tolist()
+    if "vydaje" in measures:
+        out["m_vydaje"] = np.bincount(inverse, weights=np.where(castka < 0, castka, 0.0), minlength=group_count).tolist()
+    for measure, ufunc, start in (("minimum", np.minimum, np.inf), ("maximum", np.maximum, -np.inf)):
+        if measure in measures:
+            values = np.full(group_count, start)
+            ufunc.at(values, inverse, castka)
+            # Prázdná skupina nemá minimum/maximum (SQL vrací NULL)
+            out[f"m_{measure}"] = [v if c else None for v, c in zip(values.tolist(), counts.tolist())]
+    return out
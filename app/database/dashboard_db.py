@@ -6,16 +6,17 @@ from . import budgets_db, categories_db
 # DASHBOARD & STATS WINDOW - ROZPOČTOVÉ PLNĚNÍ
 # ============================================================================
 
-def get_month_total_budget_summary(db_path: str, transaction_type: str, month: int) -> dict:
+def get_month_total_budget_summary(db_path: str, transaction_type: str, month: int, backend: str = "sql") -> dict:
     """
     Vypočítá celkový rozpočet a YTD plnění pro Dashboard tlačítko.
     
-    OPTIMALIZOVÁNO: Používá funkci get_ytd_for_category() pro YTD do daného měsíce.
+    OPTIMALIZOVÁNO: YTD do daného měsíce se sčítá jedním dotazem přes kategorie_closure.
     
     Args:
         db_path: Cesta k databázi
         transaction_type: 'výdej' nebo 'príjem'
         month: Číslo měsíce (1-12) - YTD se počítá od ledna do tohoto měsíce
+        backend: "sql" nebo "columnar" - zdroj dat pro YTD součty (viz get_ytd_for_category)
         
     Returns:
         {
@@ -31,31 +32,47 @@ def get_month_total_budget_summary(db_path: str, transaction_type: str, month: i
     if total_budget == 0:
         return None  # Žádný rozpočet nastaven
     
-    # Načti stats_data pro správné zpracování CUSTOM kategorií
-    stats_data = get_stats_data(db_path, transaction_type)
-    
-    # YTD spending - sečti YTD do měsíce pro top-level kategorie s rozpočtem
+    # YTD spending - top-level kategorie s rozpočtem a součet jejich LEAF potomků
+    # (kategorie_closure), vše jedním dotazem
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
-    # Najdi top-level kategorie (parent_id IS NULL) s rozpočtem
-    cursor.execute("""
-        SELECT k.id
-        FROM kategorie k
-        JOIN rozpocty r ON r.kategorie_id = k.id
-        WHERE k.typ = ?
-          AND k.parent_id IS NULL
-          AND r.budget_plan != 0
-    """, (transaction_type,))
-    
-    top_level_cats = cursor.fetchall()
-    conn.close()
-    
-    # Spočítaj YTD pro každou top-level kategorii (použije rekurzivní sčítání pro CUSTOM)
-    ytd_spending = 0.0
-    for (cat_id,) in top_level_cats:
-        ytd = get_ytd_for_category(db_path, cat_id, month, stats_data)
-        ytd_spending += abs(ytd)  # ABS pro výdaje
+
+    snapshot = None
+    if backend == "columnar":
+        from . import columnar_db
+        # Zastaralý snapshot se sestaví na pozadí, do té doby odpoví SQL
+        snapshot = columnar_db.get_current_snapshot(db_path)
+
+    if snapshot is not None:
+        # Najdi LEAF kategorie pod top-level kategoriemi s rozpočtem, součty ze snapshotu
+        cursor.execute("""
+            SELECT c.descendant_id
+            FROM kategorie k
+            JOIN rozpocty r ON r.kategorie_id = k.id
+            JOIN kategorie_closure c ON c.ancestor_id = k.id
+            WHERE k.typ = ?
+              AND k.parent_id IS NULL
+              AND r.budget_plan != 0
+        """, (transaction_type,))
+        leaf_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        ytd_spending = snapshot.month_sum(leaf_ids, 1, 1, month)
+    else:
+        cursor.execute("""
+            SELECT COALESCE(SUM(ABS(i.castka)), 0)
+            FROM kategorie k
+            JOIN rozpocty r ON r.kategorie_id = k.id
+            JOIN kategorie_closure c ON c.ancestor_id = k.id
+            JOIN items_data i ON i.kategorie_id = c.descendant_id
+            WHERE k.typ = ?
+              AND k.parent_id IS NULL
+              AND r.budget_plan != 0
+              AND i.is_current = 1
+              AND i.mesic BETWEEN 1 AND ?
+              AND i.castka != 0
+        """, (transaction_type, month))
+        ytd_spending = float(cursor.fetchone()[0])
+        conn.close()
     
     # Výpočet %
     ytd_percentage = (ytd_spending / total_budget) * 100 if total_budget > 0 else 0
@@ -73,13 +90,14 @@ def get_month_total_budget_summary(db_path: str, transaction_type: str, month: i
 
 def get_stats_data(db_path: str, transaction_type: str) -> dict:
     """
-    Načte VŠECHNA data pro stats_window jedním prostým SELECTem.
+    Načte VŠECHNA data pro stats_window jedním SELECTem.
     
     NAHRAZUJE: get_year_performance_summary() - už nepotřebujeme komplexní CTE!
     
     Vrací strukturu s:
     - LEAF kategorie: mají pre-computed sum_past, sum_current, budget_plan
-    - CUSTOM kategorie: budou mít 0 hodnoty (počítají se za běhu v calculate_custom_values)
+    - CUSTOM kategorie: součty pre-computed hodnot všech LEAF potomků
+      (JOIN přes kategorie_closure, bez rekurze v Pythonu)
     
     Args:
         db_path: Cesta k databázi
@@ -101,19 +119,24 @@ def get_stats_data(db_path: str, transaction_type: str) -> dict:
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    # Prostý SELECT - ŽÁDNÉ CTE!
+    # Každá kategorie = součet LEAF kategorií ve svém podstromu (LEAF = jen ona sama)
     cursor.execute("""
         SELECT 
             k.id,
             k.nazev,
             k.parent_id,
             k.is_custom,
-            COALESCE(r.sum_past, 0) as sum_past,
-            COALESCE(r.sum_current, 0) as sum_current,
-            COALESCE(r.budget_plan, 0) as budget_plan
+            COALESCE(SUM(r.sum_past), 0) as sum_past,
+            COALESCE(SUM(r.sum_current), 0) as sum_current,
+            COALESCE(SUM(r.budget_plan), 0) as budget_plan
         FROM kategorie k
-        LEFT JOIN rozpocty r ON k.id = r.kategorie_id
+        LEFT JOIN (
+            kategorie_closure c
+            JOIN kategorie d ON d.id = c.descendant_id AND d.is_custom = 0
+        ) ON c.ancestor_id = k.id
+        LEFT JOIN rozpocty r ON r.kategorie_id = d.id
         WHERE k.typ = ?
+        GROUP BY k.id
         ORDER BY k.nazev
     """, (transaction_type,))
     
@@ -146,96 +169,90 @@ def calculate_custom_values(data: dict, cat_id: int) -> dict:
     return categories_db.calculate_custom_values(data, cat_id)
 
 
-def get_month_data_for_category(db_path: str, category_id: int, month: int, is_current: bool, data: dict = None) -> float:
+def get_month_data_for_category(db_path: str, category_id: int, month: int, is_current: bool, backend: str = "sql") -> float:
     """
     Načte součet transakcí pro danou kategorii a měsíc.
     
-    Pro LEAF kategorie: Načte přímo z items
-    Pro CUSTOM kategorie: Rekurzivně sečte hodnoty všech dětí
+    Sčítá transakce kategorie i všech jejích potomků (kategorie_closure),
+    takže LEAF i CUSTOM kategorie se počítají stejným jedním dotazem.
     
     Args:
         db_path: Cesta k databázi
         category_id: ID kategorie
         month: Číslo měsíce (1-12)
         is_current: True = aktuální rok (is_current=1), False = historické roky (is_current=0)
-        data: Dict z get_stats_data() (pro rekurzivní sčítání CUSTOM kategorií)
+        backend: "sql" nebo "columnar" (sloupcový snapshot v paměti, viz columnar_db)
         
     Returns:
         Součet částek (absolutní hodnota) pro daný měsíc
     """
-    # Pokud máme data dict, zkontroluj zda je to CUSTOM kategorie
-    if data and category_id in data:
-        cat_info = data[category_id]
-        
-        # CUSTOM kategorie - sečti děti rekurzivně
-        if cat_info['is_custom'] == 1 and cat_info['children']:
-            total = 0.0
-            for child_id in cat_info['children']:
-                total += get_month_data_for_category(db_path, child_id, month, is_current, data)
-            return total
-    
-    # LEAF kategorie - načti z items
+    is_current_flag = 1 if is_current else 0
+
+    if backend == "columnar":
+        from . import columnar_db
+        snapshot = columnar_db.get_current_snapshot(db_path)
+        if snapshot is not None:
+            leaf_ids = categories_db.get_subtree_leaf_ids(db_path, category_id)
+            return snapshot.month_sum(leaf_ids, is_current_flag, month, month)
+
+    # Kategorie i všichni její potomci (kategorie_closure) - jeden indexovaný JOIN
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    is_current_flag = 1 if is_current else 0
-    
     cursor.execute("""
-        SELECT COALESCE(SUM(ABS(castka)), 0)
-        FROM items
-        WHERE kategorie_id = ?
-          AND is_current = ?
-          AND CAST(strftime('%m', datum) AS INTEGER) = ?
-          AND castka != 0
+        SELECT COALESCE(SUM(ABS(i.castka)), 0)
+        FROM kategorie_closure c
+        JOIN items_data i ON i.kategorie_id = c.descendant_id
+        WHERE c.ancestor_id = ?
+          AND i.is_current = ?
+          AND i.mesic = ?
+          AND i.castka != 0
     """, (category_id, is_current_flag, month))
     
-    result = cursor.fetchone()[0]
+    result = float(cursor.fetchone()[0])
     conn.close()
     
     return result
 
 
-def get_ytd_for_category(db_path: str, category_id: int, up_to_month: int, data: dict = None) -> float:
+def get_ytd_for_category(db_path: str, category_id: int, up_to_month: int, backend: str = "sql") -> float:
     """
     Načte YTD (Year-To-Date) součet transakcí od ledna do zadaného měsíce (včetně).
     
-    Pro LEAF kategorie: Načte přímo z items
-    Pro CUSTOM kategorie: Rekurzivně sečte hodnoty všech dětí
+    Sčítá transakce kategorie i všech jejích potomků (kategorie_closure),
+    takže LEAF i CUSTOM kategorie se počítají stejným jedním dotazem.
     
     Args:
         db_path: Cesta k databázi
         category_id: ID kategorie
         up_to_month: Měsíc do kterého počítat (1-12), např. 6 = leden až červen
-        data: Dict z get_stats_data() (pro rekurzivní sčítání CUSTOM kategorií)
+        backend: "sql" nebo "columnar" (sloupcový snapshot v paměti, viz columnar_db)
         
     Returns:
         Součet částek (absolutní hodnota) od ledna do up_to_month (včetně)
     """
-    # Pokud máme data dict, zkontroluj zda je to CUSTOM kategorie
-    if data and category_id in data:
-        cat_info = data[category_id]
-        
-        # CUSTOM kategorie - sečti děti rekurzivně
-        if cat_info['is_custom'] == 1 and cat_info['children']:
-            total = 0.0
-            for child_id in cat_info['children']:
-                total += get_ytd_for_category(db_path, child_id, up_to_month, data)
-            return total
-    
-    # LEAF kategorie - načti z items (pouze is_current=1 pro aktuální rok)
+    if backend == "columnar":
+        from . import columnar_db
+        snapshot = columnar_db.get_current_snapshot(db_path)
+        if snapshot is not None:
+            leaf_ids = categories_db.get_subtree_leaf_ids(db_path, category_id)
+            return snapshot.month_sum(leaf_ids, 1, 1, up_to_month)
+
+    # Kategorie i všichni její potomci (kategorie_closure), pouze is_current=1 pro aktuální rok
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT COALESCE(SUM(ABS(castka)), 0)
-        FROM items
-        WHERE kategorie_id = ?
-          AND is_current = 1
-          AND CAST(strftime('%m', datum) AS INTEGER) <= ?
-          AND castka != 0
+        SELECT COALESCE(SUM(ABS(i.castka)), 0)
+        FROM kategorie_closure c
+        JOIN items_data i ON i.kategorie_id = c.descendant_id
+        WHERE c.ancestor_id = ?
+          AND i.is_current = 1
+          AND i.mesic BETWEEN 1 AND ?
+          AND i.castka != 0
     """, (category_id, up_to_month))
     
-    result = cursor.fetchone()[0]
+    result = float(cursor.fetchone()[0])
     conn.close()
     
     return result
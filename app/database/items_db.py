@@ -1,8 +1,131 @@
+import re
 import sqlite3
+from datetime import date
 from . import categories_db
 
+# Odvozené datumové sloupce (typované, indexované) - plní se při INSERT/UPDATE z 'datum'
+# ctvrtleti = 1..4, tyden = ISO týden jako YYYYWW (rok podle ISO kalendáře)
+DATE_COLUMNS = ("datum_ymd", "rok", "mesic", "ctvrtleti", "tyden")
+
+# Textové sloupce uložené slovníkově: číselník ciselnik_<sloupec> + cizí klíč <sloupec>_id
+DICTIONARY_COLUMNS = ("co", "stredisko", "firma", "kdo", "zdroj")
+
+# Textová pole, která lze nastavit více položkám najednou (update_items_field)
+BATCH_EDIT_FIELDS = ("co", "stredisko", "kdo", "firma", "zdroj", "text", "doklad")
+# Pole, podle kterých se transakce zařazuje (název kategorie = 'co', pravidla kategorizace)
+CATEGORY_FIELDS = ("co", "text", "firma", "stredisko")
+
+# Sloupce vracené funkcemi get_items()/get_item_by_id() (pořadí odpovídá indexům v UI)
+ITEM_COLUMNS = (
+    "id, datum, doklad, zdroj, firma, text, madati, dal, castka, "
+    "cin, cislo, co, kdo, stredisko, kategorie_id, is_current"
+)
+
+# Fulltextový index (FTS5) nad text, firma, doklad - rowid = items_data.id (migrace verze 6)
+FTS_TABLE = "items_fts"
+
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})")
+_CZ_DATE_RE = re.compile(r"^(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})")
+# Neúplná data pro filtry: rok (2024), rok-měsíc (2024-03) a měsíc.rok (3.2024, 03/2024)
+_YEAR_RE = re.compile(r"^(\d{4})$")
+_ISO_MONTH_RE = re.compile(r"^(\d{4})-(\d{1,2})$")
+_CZ_MONTH_RE = re.compile(r"^(\d{1,2})\s*[./]\s*(\d{4})$")
+
+
+def parse_date_parts(datum):
+    """
+    Rozloží textové datum na odvozené celočíselné hodnoty (datum_ymd, rok, mesic).
+
+    Podporuje ISO formát (YYYY-MM-DD, případně s časem za datem) i český
+    formát (D.M.YYYY), který mohl projít přes normalize_date() beze změny.
+
+    Returns:
+        (datum_ymd, rok, mesic) - např. (20230315, 2023, 3)
+        nebo (None, None, None) pokud datum nelze rozpoznat
+    """
+    if datum is None:
+        return (None, None, None)
+    value = str(datum).strip()
+    match = _ISO_DATE_RE.match(value)
+    if match:
+        year, month, day = (int(g) for g in match.groups())
+    else:
+        match = _CZ_DATE_RE.match(value)
+        if not match:
+            return (None, None, None)
+        day, month, year = (int(g) for g in match.groups())
+    try:
+        date(year, month, day)  # validace (např. 2023-02-30)
+    except ValueError:
+        return (None, None, None)
+    return (year * 10000 + month * 100 + day, year, month)
+
+
+def parse_date_bound(value, end=False):
+    """
+    Převede mez datumového filtru na celé číslo YYYYMMDD.
+
+    Kromě úplného data (viz parse_date_parts) přijímá rok (2024) a měsíc
+    (2024-03, 3.2024, 03/2024) - ty se rozšíří na první den (end=False),
+    nebo poslední den (end=True) období.
+
+    Raises:
+        ValueError: mez nelze rozpoznat
+    """
+    text = str(value).strip()
+    datum_ymd = parse_date_parts(text)[0]
+    if datum_ymd is not None:
+        return datum_ymd
+
+    month = None
+    match = _YEAR_RE.match(text)
+    if match:
+        year = int(match.group(1))
+    else:
+        match = _ISO_MONTH_RE.match(text)
+        if match:
+            year, month = int(match.group(1)), int(match.group(2))
+        else:
+            match = _CZ_MONTH_RE.match(text)
+            if not match:
+                raise ValueError(f"Neplatné datum '{text}' - použijte např. 2024-03-15, 15.3.2024, 3.2024 nebo 2024.")
+            month, year = int(match.group(1)), int(match.group(2))
+    if month is not None and not 1 <= month <= 12:
+        raise ValueError(f"Neplatný měsíc v datu '{text}'.")
+
+    if month is None:
+        return year * 10000 + (1231 if end else 101)
+    # Den 99 je za posledním dnem každého měsíce - horní mez bez počítání délky měsíce
+    return year * 10000 + month * 100 + (99 if end else 1)
+
+
+def date_column_values(datum):
+    """
+    Vrátí hodnoty všech odvozených datumových sloupců (pořadí DATE_COLUMNS).
+
+    Returns:
+        např. (20230315, 2023, 3, 1, 202311) nebo samé None, pokud datum nelze rozpoznat
+    """
+    datum_ymd, rok, mesic = parse_date_parts(datum)
+    if datum_ymd is None:
+        return (None,) * len(DATE_COLUMNS)
+    iso_year, iso_week, _ = date(rok, mesic, datum_ymd % 100).isocalendar()
+    return (datum_ymd, rok, mesic, (mesic + 2) // 3, iso_year * 100 + iso_week)
+
+
 def create_items_table(cursor):
-    """Vytvoří tabulku 'items', pokud neexistuje, s novým sloupcem 'is_current'."""
+    """
+    Vytvoří tabulku 'items', pokud neexistuje, s novým sloupcem 'is_current'.
+
+    Jde o výchozí schéma (verze 0) - odvozené sloupce a další indexy přidávají
+    migrace v migrations.py. U převedeného profilu je 'items' už pohled nad
+    items_data (viz create_items_view) a tabulka se nevytváří.
+    """
+    cursor.execute("SELECT type FROM sqlite_master WHERE name = 'items'")
+    existing = cursor.fetchone()
+    if existing and existing[0] == "view":
+        return
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS items (
             id INTEGER PRIMARY KEY,
@@ -29,6 +152,65 @@ def create_items_table(cursor):
         ON items(kategorie_id, datum)
     ''')
 
+def create_items_view(cursor):
+    """
+    (Znovu) vytvoří pohled 'items' nad tabulkou items_data včetně INSTEAD OF triggerů.
+
+    Od verze schématu 3 jsou transakce uložené v items_data a slovníkové sloupce
+    (DICTIONARY_COLUMNS) jen jako celočíselné odkazy do číselníků. Pohled vrací
+    původní textové sloupce (prázdná hodnota = ''), takže dotazy i zápisy nad
+    'items' fungují beze změny; nové hodnoty se do číselníků doplní triggerem.
+
+    Sloupce se berou z PRAGMA table_info(items_data) - po přidání sloupce
+    do items_data stačí funkci zavolat znovu.
+    """
+    cursor.execute("PRAGMA table_info(items_data)")
+    data_columns = [row[1] for row in cursor.fetchall()]
+
+    select_parts, joins, values = [], [], []
+    ciselnik_inserts = []
+    for col in data_columns:
+        name = col[:-3] if col.endswith("_id") else None
+        if name in DICTIONARY_COLUMNS:
+            select_parts.append(f"COALESCE(c_{name}.hodnota, '') AS {name}")
+            joins.append(f"LEFT JOIN ciselnik_{name} c_{name} ON c_{name}.id = d.{col}")
+            values.append(f"(SELECT id FROM ciselnik_{name} WHERE hodnota = NEW.{name})")
+            ciselnik_inserts.append(
+                f"INSERT OR IGNORE INTO ciselnik_{name} (hodnota) SELECT NEW.{name} WHERE NEW.{name} <> '';"
+            )
+        else:
+            select_parts.append(f"d.{col}")
+            values.append(f"NEW.{col}")
+
+    cursor.execute("DROP VIEW IF EXISTS items")
+    cursor.execute(f"""
+        CREATE VIEW items AS
+        SELECT {", ".join(select_parts)}
+        FROM items_data d
+        {" ".join(joins)}
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_items_view_insert INSTEAD OF INSERT ON items
+        BEGIN
+            {" ".join(ciselnik_inserts)}
+            INSERT INTO items_data ({", ".join(data_columns)}) VALUES ({", ".join(values)});
+        END
+    """)
+    assignments = [f"{col} = {value}" for col, value in zip(data_columns, values) if col != "id"]
+    cursor.execute(f"""
+        CREATE TRIGGER trg_items_view_update INSTEAD OF UPDATE ON items
+        BEGIN
+            {" ".join(ciselnik_inserts)}
+            UPDATE items_data SET {", ".join(assignments)} WHERE id = OLD.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER trg_items_view_delete INSTEAD OF DELETE ON items
+        BEGIN
+            DELETE FROM items_data WHERE id = OLD.id;
+        END
+    """)
+
 def add_item(db_path, datum, doklad, zdroj, firma, text, madati, dal, castka, cin, cislo, co, kdo, stredisko, is_current, skip_metrics_update=False):
     """
     Přidá novou položku do databáze a pokusí se ji automaticky přiřadit k existující kategorii.
@@ -40,33 +222,17 @@ def add_item(db_path, datum, doklad, zdroj, firma, text, madati, dal, castka, ci
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Pokusíme se najít existující kategorii pro automatické přiřazení
+    # Automatické přiřazení k existující kategorii podle 'co' a znaménka částky,
+    # jinak podle pravidel kategorizace (i mapování z účetní osnovy)
     # DŮLEŽITÉ: Pouze LEAF kategorie (is_custom=0) mohou mít transakce!
-    kategorie_id = None
-    if co and co.strip() and castka != 0:
-        # Určíme typ podle znaménka částky
-        if castka > 0:
-            transaction_type = 'příjem'
-        elif castka < 0:
-            transaction_type = 'výdej'
-        else:
-            transaction_type = None
-        
-        # Pokud dokážeme určit typ, pokusíme se najít existující LEAF kategorii
-        if transaction_type:
-            cursor.execute(
-                "SELECT id FROM kategorie WHERE nazev = ? AND typ = ? AND is_custom = 0", 
-                (co, transaction_type)
-            )
-            existing_category = cursor.fetchone()
-            if existing_category:
-                kategorie_id = existing_category[0]
+    # Hledá se v paměťovém indexu kategorií (bez dotazu na tabulku kategorie)
+    kategorie_id = categories_db.get_category_index(db_path).category_for(co, castka, text, firma, stredisko)
     
     # Vložíme transakci s příslušnou kategorie_id (může být None nebo nalezená)
-    cursor.execute('''
-        INSERT INTO items (datum, doklad, zdroj, firma, text, madati, dal, castka, cin, cislo, co, kdo, stredisko, is_current, kategorie_id) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (datum, doklad, zdroj, firma, text, madati, dal, castka, cin, cislo, co, kdo, stredisko, is_current, kategorie_id))
+    cursor.execute(f'''
+        INSERT INTO items (datum, doklad, zdroj, firma, text, madati, dal, castka, cin, cislo, co, kdo, stredisko, is_current, kategorie_id, {", ".join(DATE_COLUMNS)}) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {", ".join("?" * len(DATE_COLUMNS))})
+    ''', (datum, doklad, zdroj, firma, text, madati, dal, castka, cin, cislo, co, kdo, stredisko, is_current, kategorie_id) + date_column_values(datum))
     
     conn.commit()
     conn.close()
@@ -79,23 +245,135 @@ def get_items(db_path, is_current):
     """Získá všechny položky z databáze pro daný stav (historické/aktuální)."""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM items WHERE is_current = ? ORDER BY datum DESC", (is_current,))
+    cursor.execute(f"SELECT {ITEM_COLUMNS} FROM items WHERE is_current = ? ORDER BY datum DESC", (is_current,))
     items = cursor.fetchall()
     conn.close()
     return items
 
+def get_co_values(db_path, is_current=None):
+    """
+    Vrátí seřazené neprázdné hodnoty 'co' z číselníku ciselnik_co (bez načítání transakcí).
+
+    is_current omezí seznam na hodnoty použité v transakcích daného stavu.
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    if is_current is None:
+        cursor.execute("SELECT hodnota FROM ciselnik_co c WHERE EXISTS (SELECT 1 FROM items_data i WHERE i.co_id = c.id)")
+    else:
+        cursor.execute(
+            "SELECT hodnota FROM ciselnik_co c WHERE EXISTS "
+            "(SELECT 1 FROM items_data i WHERE i.co_id = c.id AND i.is_current = ?)",
+            (is_current,),
+        )
+    values = sorted(row[0] for row in cursor.fetchall() if row[0] and str(row[0]).strip())
+    conn.close()
+    return values
+
+def get_filtered_items(db_path, is_current, castka_min=None, castka_max=None, co=None, datum_od=None, datum_do=None,
+                       hledat=None, limit=None):
+    """
+    Získá položky pro daný stav s filtry aplikovanými přímo v SQL.
+
+    Datumové filtry se převádějí na celé číslo YYYYMMDD a porovnávají se
+    rozsahem nad indexovaným sloupcem datum_ymd (is_current, datum_ymd).
+
+    Args:
+        db_path: Cesta k databázi
+        is_current: 0 = historické, 1 = aktuální
+        castka_min, castka_max: Volitelné meze částky (včetně)
+        co: Volitelná přesná hodnota pole 'co'
+        datum_od, datum_do: Volitelné meze data (včetně) - text ve formátu YYYY-MM-DD
+                            nebo D.M.YYYY, případně jen rok nebo měsíc (viz parse_date_bound)
+        hledat: Volitelný fulltext nad text, firma a doklad - všechna slova musí
+                sedět jako prefix (bez ohledu na velikost písmen a diakritiku).
+                Používá index items_fts, bez něj (SQLite bez FTS5) LIKE.
+        limit: Volitelný maximální počet vrácených položek (nejnovější první)
+
+    Returns:
+        list tuple ve stejném tvaru jako get_items()
+
+    Raises:
+        ValueError: mez data nelze rozpoznat
+    """
+    where = ["is_current = ?"]
+    params = [is_current]
+
+    ymd_od = parse_date_bound(datum_od) if datum_od else None
+    ymd_do = parse_date_bound(datum_do, end=True) if datum_do else None
+    if ymd_od is not None:
+        where.append("datum_ymd >= ?")
+        params.append(ymd_od)
+    if ymd_do is not None:
+        where.append("datum_ymd <= ?")
+        params.append(ymd_do)
+    if castka_min is not None:
+        where.append("castka >= ?")
+        params.append(castka_min)
+    if castka_max is not None:
+        where.append("castka <= ?")
+        params.append(castka_max)
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    if co:
+        # Hodnotu převedeme na ID z číselníku jednou - filtr pak jde přes index (co_id, kategorie_id)
+        cursor.execute("SELECT id FROM ciselnik_co WHERE hodnota = ?", (co,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.close()
+            return []
+        where.append("id IN (SELECT id FROM items_data WHERE co_id = ?)")
+        params.append(row[0])
+    words = str(hledat or "").split()
+    if words:
+        if _has_fts_index(cursor):
+            # Řádky hledáme přes rowid z FTS indexu, ne průchodem indexu is_current
+            where[0] = "+is_current = ?"
+            where.append(f"id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)")
+            params.append(build_fts_query(words))
+        else:
+            for word in words:
+                where.append("(text LIKE ? OR firma LIKE ? OR doklad LIKE ?)")
+                params.extend([f"%{word}%"] * 3)
+    limit_sql = f" LIMIT {int(limit)}" if limit else ""
+    cursor.execute(
+        f"SELECT {ITEM_COLUMNS} FROM items WHERE {' AND '.join(where)} ORDER BY datum DESC{limit_sql}",
+        tuple(params),
+    )
+    items = cursor.fetchall()
+    conn.close()
+    return items
+
+def build_fts_query(words):
+    """
+    Sestaví FTS5 dotaz: každé slovo jako prefix v uvozovkách, slova spojená AND.
+
+    Uvozovky chrání před syntaxí FTS5 (operátory, závorky, dvojtečky) ve vstupu.
+    """
+    terms = []
+    for word in words:
+        escaped = word.replace('"', '""')
+        terms.append(f'"{escaped}"*')
+    return " AND ".join(terms)
+
+def _has_fts_index(cursor):
+    """Vrátí True, pokud profil má fulltextový index transakcí."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,))
+    return cursor.fetchone() is not None
+
 def delete_item(db_path, item_id):
     """Smaže položku z databáze podle jejího ID."""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Před smazáním uložíme kategorie_id pro přepočet metrik
-    cursor.execute("SELECT kategorie_id FROM items WHERE id = ?", (item_id,))
+    cursor.execute("SELECT kategorie_id FROM items_data WHERE id = ?", (item_id,))
     result = cursor.fetchone()
     kategorie_id = result[0] if result else None
     
     # Smažeme transakci
-    cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
+    cursor.execute("DELETE FROM items_data WHERE id = ?", (item_id,))
     conn.commit()
     conn.close()
     
@@ -103,6 +381,120 @@ def delete_item(db_path, item_id):
     if kategorie_id:
         categories_db.update_category_metrics(db_path, kategorie_id)
 
+def delete_items(db_path, item_ids):
+    """
+    Smaže více položek najednou (jedna transakce).
+
+    Metriky se přepočítají jednou na konci pro každou dotčenou kategorii
+    (categories_db.update_categories_metrics).
+
+    Returns:
+        Počet smazaných položek
+    """
+    item_ids = [int(item_id) for item_id in item_ids]
+    if not item_ids:
+        return 0
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        affected = _categories_of_items(cursor, item_ids)
+        cursor.executemany("DELETE FROM items_data WHERE id = ?", [(item_id,) for item_id in item_ids])
+        deleted = cursor.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+
+    categories_db.update_categories_metrics(db_path, affected)
+    return deleted
+
+def update_items_field(db_path, item_ids, field, value):
+    """
+    Nastaví jedno pole (BATCH_EDIT_FIELDS) více položkám najednou (jedna transakce).
+
+    Změna 'co' znovu přiřadí kategorii stejně jako update_item() - položky se stejným
+    'co' si ponechají zařazení, ostatní podle 'co' a znaménka částky, jinak podle
+    pravidel. Změna jiného pole z CATEGORY_FIELDS zkusí zařadit dosud nezařazené
+    položky. Metriky dotčených kategorií se přepočítají jednou na konci.
+
+    Returns:
+        Počet upravených položek
+
+    Raises:
+        ValueError: pole nelze hromadně upravovat
+    """
+    if field not in BATCH_EDIT_FIELDS:
+        raise ValueError(f"Pole '{field}' nelze hromadně upravit.")
+    item_ids = [int(item_id) for item_id in item_ids]
+    if not item_ids:
+        return 0
+    value = "" if value is None else str(value)
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    affected = set()
+    try:
+        if field in DICTIONARY_COLUMNS:
+            # Hodnota se převede na ID z číselníku jednou pro všechny položky
+            column = f"{field}_id"
+            stored = None
+            if value != "":
+                cursor.execute(f"INSERT OR IGNORE INTO ciselnik_{field} (hodnota) VALUES (?)", (value,))
+                cursor.execute(f"SELECT id FROM ciselnik_{field} WHERE hodnota = ?", (value,))
+                stored = cursor.fetchone()[0]
+        else:
+            column, stored = field, value
+
+        if field in CATEGORY_FIELDS:
+            index = categories_db.get_category_index(db_path)
+            rows = []
+            for chunk in _chunks(item_ids):
+                cursor.execute(
+                    f"SELECT id, castka, kategorie_id, {', '.join(CATEGORY_FIELDS)} FROM items WHERE id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for item_id, castka, old_kategorie_id, *old_values in cursor.fetchall():
+                    fields = dict(zip(CATEGORY_FIELDS, old_values))
+                    if old_kategorie_id is not None and (field != "co" or (fields["co"] or "") == value):
+                        # Zařazenou položku přeřadí jen změna 'co' (jako v update_item)
+                        kategorie_id = old_kategorie_id
+                    else:
+                        fields[field] = value
+                        kategorie_id = index.category_for(
+                            fields["co"], castka, fields["text"], fields["firma"], fields["stredisko"]
+                        )
+                    affected.update(k for k in (old_kategorie_id, kategorie_id) if k)
+                    rows.append((stored, kategorie_id, item_id))
+            cursor.executemany(f"UPDATE items_data SET {column} = ?, kategorie_id = ? WHERE id = ?", rows)
+        else:
+            cursor.executemany(
+                f"UPDATE items_data SET {column} = ? WHERE id = ?",
+                [(stored, item_id) for item_id in item_ids],
+            )
+        updated = cursor.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+
+    categories_db.update_categories_metrics(db_path, affected)
+    return updated
+
+def _categories_of_items(cursor, item_ids):
+    """Vrátí množinu kategorie_id zadaných položek (bez nezařazených)."""
+    affected = set()
+    for chunk in _chunks(item_ids):
+        cursor.execute(
+            f"SELECT DISTINCT kategorie_id FROM items_data WHERE kategorie_id IS NOT NULL AND id IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        )
+        affected.update(row[0] for row in cursor.fetchall())
+    return affected
+
+def _chunks(values, size=500):
+    """Rozdělí seznam na části pro dotazy s IN (...) (limit počtu parametrů SQLite)."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
 def delete_all_items(db_path, is_current):
     """
     Smaže VŠECHNY položky pro daný stav z tabulky items.
@@ -110,7 +502,7 @@ def delete_all_items(db_path, is_current):
     """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM items WHERE is_current = ?", (is_current,))
+    cursor.execute("DELETE FROM items_data WHERE is_current = ?", (is_current,))
     conn.commit()
     conn.close()
     
@@ -121,7 +513,7 @@ def has_transactions(db_path, is_current):
     """Vrátí True, pokud v databázi existuje alespoň jedna transakce pro daný stav."""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM items WHERE is_current = ? LIMIT 1", (is_current,))
+    cursor.execute("SELECT 1 FROM items_data WHERE is_current = ? LIMIT 1", (is_current,))
     result = cursor.fetchone()
     conn.close()
     return result is not None
@@ -145,11 +537,16 @@ def get_item_by_id(db_path, item_id):
     """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM items WHERE id = ?", (item_id,))
+    cursor.execute(f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ?", (item_id,))
     result = cursor.fetchone()
     conn.close()
     return result
 
+def _same_sign(a, b):
+    """True, pokud jsou obě částky kladné, obě záporné nebo obě nulové (stejný typ transakce)."""
+    a, b = a or 0, b or 0
+    return (a > 0) == (b > 0) and (a < 0) == (b < 0)
+
 def update_item(db_path, item_id, datum, doklad, zdroj, firma, text, madati, dal, castka, cin, cislo, co, kdo, stredisko):
     """
     Aktualizuje existující transakci v databázi s automatickým přiřazením kategorie.
@@ -158,9 +555,10 @@ def update_item(db_path, item_id, datum, doklad, zdroj, firma, text, madati, dal
     automaticky přiřadit kategorii na základě pole "co" a typu transakce (příjem/výdej).
     Typ je určen podle znaménka částky - kladná = příjem, záporná = výdej.
     
-    Pokud existuje kategorie se jménem shodným s polem "co" a správným typem,
-    transakce bude automaticky k této kategorii přiřazena. Pokud ne, zůstane
-    nepřiřazená (kategorie_id = None).
+    Pokud se 'co' ani typ (znaménko částky) nezměnily, transakce si ponechá
+    dosavadní kategorii (i ručně nebo pravidlem přiřazenou). Jinak se přiřadí
+    kategorie se jménem shodným s polem "co" a správným typem, případně podle
+    pravidel kategorizace; pokud žádná neodpovídá, zůstane nepřiřazená (None).
     
     Args:
         db_path (str): Cesta k SQLite databázi
@@ -187,40 +585,30 @@ def update_item(db_path, item_id, datum, doklad, zdroj, firma, text, madati, dal
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Uložíme starou kategorie_id před updatem (pro přepočet)
-    cursor.execute("SELECT kategorie_id FROM items WHERE id = ?", (item_id,))
+    # Uložíme starou kategorie_id před updatem (pro přepočet) spolu s 'co' a částkou
+    cursor.execute("SELECT kategorie_id, co, castka FROM items WHERE id = ?", (item_id,))
     old_result = cursor.fetchone()
-    old_kategorie_id = old_result[0] if old_result else None
+    old_kategorie_id, old_co, old_castka = old_result if old_result else (None, None, None)
     
-    # Najdeme kategorii podle 'co' a typu (určeného ze znaménka částky)
-    # DŮLEŽITÉ: Pouze LEAF kategorie (is_custom=0) mohou mít transakce!
-    kategorie_id = None
-    if co and co.strip() and castka != 0:
-        if castka > 0:
-            transaction_type = 'příjem'
-        elif castka < 0:
-            transaction_type = 'výdej'
-        else:
-            transaction_type = None
-        
-        if transaction_type:
-            cursor.execute(
-                "SELECT id FROM kategorie WHERE nazev = ? AND typ = ? AND is_custom = 0", 
-                (co, transaction_type)
-            )
-            existing_category = cursor.fetchone()
-            if existing_category:
-                kategorie_id = existing_category[0]
+    if old_kategorie_id is not None and (old_co or "") == (co or "") and _same_sign(old_castka, castka):
+        # Beze změny 'co' a typu zůstává dosavadní zařazení
+        kategorie_id = old_kategorie_id
+    else:
+        # Najdeme kategorii podle 'co' a typu (určeného ze znaménka částky), jinak podle pravidel
+        # DŮLEŽITÉ: Pouze LEAF kategorie (is_custom=0) mohou mít transakce!
+        kategorie_id = categories_db.get_category_index(db_path).category_for(co, castka, text, firma, stredisko)
     
     # Update transakce s automaticky přiřazenou nebo None kategorie_id
-    cursor.execute("""
+    cursor.execute(f"""
         UPDATE items SET 
         datum = ?, doklad = ?, zdroj = ?, firma = ?, text = ?,
         madati = ?, dal = ?, castka = ?, cin = ?, cislo = ?,
-        co = ?, kdo = ?, stredisko = ?, kategorie_id = ?
+        co = ?, kdo = ?, stredisko = ?, kategorie_id = ?,
+        {", ".join(f"{col} = ?" for col in DATE_COLUMNS)}
         WHERE id = ?
     """, (datum, doklad, zdroj, firma, text, madati, dal, castka, 
-          cin, cislo, co, kdo, stredisko, kategorie_id, item_id))
+          cin, cislo, co, kdo, stredisko, kategorie_id)
+          + date_column_values(datum) + (item_id,))
     
     conn.commit()
     conn.close()
@@ -236,15 +624,5 @@ def update_all_metrics(db_path):
     Přepočítá pre-computed metriky pro VŠECHNY kategorie v databázi.
     Užitečné po hromadném importu nebo migracích.
     """
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Získej všechny kategorie
-    cursor.execute("SELECT id FROM kategorie")
-    all_categories = cursor.fetchall()
-    conn.close()
-    
-    # Přepočítej metriky pro každou kategorii
-    for (cat_id,) in all_categories:
-        categories_db.update_category_metrics(db_path, cat_id)
+    # Jediný agregační dotaz pro všechny LEAF kategorie (custom se nepočítají)
+    categories_db.update_categories_metrics(db_path)
@@ -1,11 +1,23 @@
+import os
 import sqlite3
 from . import items_db
 from . import categories_db
 from . import budgets_db
+from . import migrations
+
+# Stav profilu podle (absolutní) cesty: ((verze dat, verze rozpočtů), stav)
+_PROFILE_STATES = {}
 
 def init_db(db_path):
     """
     Inicializuje kompletní databázi a vytvoří všechny potřebné tabulky.
+
+    Po vytvoření výchozích tabulek převede profil migracemi na aktuální
+    verzi schématu (PRAGMA user_version) - týká se i existujících profilů.
+
+    Returns:
+        Seznam názvů provedených migrací - vypíše je volající (GUI na výstup,
+        příkazová řádka na stderr, aby nerozbila výstup reportů)
     """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -16,4 +28,77 @@ def init_db(db_path):
     budgets_db.create_budgets_table(cursor)
     
     conn.commit()
-    conn.close()
\ No newline at end of file
+
+    # Doplnění novějších změn schématu (indexy, odvozené sloupce, ...)
+    applied = migrations.run_migrations(conn)
+    # Kategorie se mohly změnit mimo aplikaci (jiný soubor na stejné cestě, migrace)
+    categories_db.invalidate_category_index(db_path)
+    _PROFILE_STATES.pop(os.path.abspath(db_path), None)
+
+    conn.close()
+    return applied
+
+def get_data_version(db_path) -> int:
+    """
+    Vrátí aktuální verzi dat profilu.
+
+    Čítač zvyšují triggery při každém zápisu do 'items' a 'kategorie',
+    takže změna hodnoty znamená, že cache odvozená z těchto tabulek je neplatná.
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT verze FROM verze_dat WHERE id = 1")
+    result = cursor.fetchone()
+    conn.close()
+    return result[0] if result else 0
+
+def get_profile_state(db_path) -> dict:
+    """
+    Vrátí stav profilu pro průvodce na Home a viditelnost záložek.
+
+    Všechny příznaky a počty se zjistí jedním dotazem a pamatují se pro
+    aktuální verzi dat a verzi rozpočtů (verze_dat) - dokud se data nezmění,
+    stojí další volání jen přečtení čítačů.
+
+    Returns:
+        Slovník s klíči historical_count, current_count, category_count, budget_count,
+        unassigned_count a příznaky has_historical, has_current, has_categories, has_budget
+    """
+    key = os.path.abspath(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT verze, verze_rozpoctu FROM verze_dat WHERE id = 1")
+    versions = cursor.fetchone()
+    cached = _PROFILE_STATES.get(key)
+    if versions is not None and cached is not None and cached[0] == versions:
+        conn.close()
+        return dict(cached[1])
+
+    # Počty přes indexy (is_current, kategorie_id) - bez čtení samotných řádků.
+    # Nulové částky se nezařazují (jako v categorization_manager.get_unassigned_categories_by_type)
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM items_data WHERE is_current = 0),
+            (SELECT COUNT(*) FROM items_data WHERE is_current = 1),
+            (SELECT COUNT(*) FROM kategorie),
+            (SELECT COUNT(*) FROM rozpocty WHERE budget_plan != 0),
+            (SELECT COUNT(*) FROM items_data WHERE kategorie_id IS NULL AND castka != 0)
+    """)
+    historical, current, categories, budgets, unassigned = cursor.fetchone()
+    conn.close()
+
+    state = {
+        "historical_count": historical,
+        "current_count": current,
+        "category_count": categories,
+        "budget_count": budgets,
+        "unassigned_count": unassigned,
+        "has_historical": historical > 0,
+        "has_current": current > 0,
+        "has_categories": categories > 0,
+        # Záznamy s budget_plan = 0 se nepočítají (viz has_any_budget)
+        "has_budget": budgets > 0,
+    }
+    if versions is not None:
+        _PROFILE_STATES[key] = (versions, state)
+    return dict(state)
@@ -0,0 +1,499 @@
+import logging
+import sqlite3
+from . import items_db
+from . import categories_db
+
+# Kolik řádků zpracovat v jedné dávce při doplňování odvozených dat
+BACKFILL_BATCH_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# POMOCNÉ FUNKCE
+# ============================================================================
+
+def get_schema_version(conn) -> int:
+    """Vrátí verzi schématu profilu uloženou v PRAGMA user_version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _column_names(cursor, table: str) -> set:
+    """Vrátí množinu názvů sloupců dané tabulky."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def backfill_in_batches(cursor, select_sql: str, update_sql: str, compute_row, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Doplní odvozená data po dávkách (keyset stránkování podle id).
+
+    Args:
+        cursor: Kurzor uvnitř běžící transakce migrace
+        select_sql: SELECT vracející (id, ...) s parametrem pro "id > ?",
+                    seřazený podle id a s LIMIT ? (např. "... WHERE id > ? ORDER BY id LIMIT ?")
+        update_sql: UPDATE s parametry ve tvaru vráceném compute_row
+        compute_row: funkce (row) -> tuple parametrů pro update_sql, nebo None = přeskočit
+        batch_size: Počet řádků v jedné dávce
+
+    Returns:
+        Počet aktualizovaných řádků
+    """
+    last_id = 0
+    updated = 0
+    while True:
+        cursor.execute(select_sql, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        params = [p for p in (compute_row(row) for row in rows) if p is not None]
+        if params:
+            cursor.executemany(update_sql, params)
+            updated += len(params)
+        last_id = rows[-1][0]
+    return updated
+
+
+# ============================================================================
+# MIGRACE (pořadí = verze schématu, NIKDY neměnit již vydané kroky)
+# ============================================================================
+
+def _migrate_item_date_columns(cursor):
+    """
+    Verze 1: Odvozené datumové sloupce items (datum_ymd, rok, mesic) + indexy.
+
+    - datum_ymd: datum jako celé číslo YYYYMMDD (rozsahové filtry Od/Do)
+    - rok, mesic: rok a měsíc (měsíční a YTD agregace bez strftime())
+    """
+    existing = _column_names(cursor, "items")
+    for col in ("datum_ymd", "rok", "mesic"):
+        if col not in existing:
+            cursor.execute(f"ALTER TABLE items ADD COLUMN {col} INTEGER")
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_items_kategorie_current_mesic
+        ON items(kategorie_id, is_current, mesic)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_items_current_datum_ymd
+        ON items(is_current, datum_ymd)
+    ''')
+
+    def compute(row):
+        item_id, datum = row
+        parts = items_db.parse_date_parts(datum)
+        return None if parts[0] is None else parts + (item_id,)
+
+    backfill_in_batches(
+        cursor,
+        "SELECT id, datum FROM items WHERE id > ? AND datum_ymd IS NULL ORDER BY id LIMIT ?",
+        "UPDATE items SET datum_ymd = ?, rok = ?, mesic = ? WHERE id = ?",
+        compute,
+    )
+
+
+def _migrate_data_version(cursor):
+    """
+    Verze 2: Čítač verze dat profilu (verze_dat) udržovaný triggery.
+
+    Každý zápis do 'items' nebo 'kategorie' zvýší čítač o 1 - cache výsledků
+    (např. pivot v záložce Analýza) tak pozná, že jsou její data zastaralá.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verze_dat (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            verze INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO verze_dat (id, verze) VALUES (1, 0)")
+
+    for table in ("items", "kategorie"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_verze
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE verze_dat SET verze = verze + 1 WHERE id = 1;
+                END
+            ''')
+
+
+def _migrate_dictionary_columns(cursor):
+    """
+    Verze 3: Slovníkové kódování co, stredisko, firma, kdo a zdroj.
+
+    Opakované texty se přesunou do číselníků ciselnik_<sloupec> (id, hodnota)
+    a transakce do tabulky items_data s celočíselnými odkazy <sloupec>_id
+    (prázdná hodnota = NULL). Původní název 'items' nese kompatibilní pohled,
+    viz items_db.create_items_view().
+    """
+    for col in items_db.DICTIONARY_COLUMNS:
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS ciselnik_{col} (
+                id INTEGER PRIMARY KEY,
+                hodnota TEXT NOT NULL UNIQUE
+            )
+        ''')
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO ciselnik_{col} (hodnota)
+            SELECT DISTINCT {col} FROM items
+            WHERE {col} IS NOT NULL AND {col} <> ''
+            ORDER BY {col}
+        ''')
+
+    cursor.execute('''
+        CREATE TABLE items_data (
+            id INTEGER PRIMARY KEY,
+            datum TEXT, doklad TEXT,
+            zdroj_id INTEGER REFERENCES ciselnik_zdroj (id),
+            firma_id INTEGER REFERENCES ciselnik_firma (id),
+            text TEXT,
+            madati REAL, dal REAL, castka REAL,
+            cin INTEGER, cislo INTEGER,
+            co_id INTEGER REFERENCES ciselnik_co (id),
+            kdo_id INTEGER REFERENCES ciselnik_kdo (id),
+            stredisko_id INTEGER REFERENCES ciselnik_stredisko (id),
+            kategorie_id INTEGER REFERENCES kategorie (id),
+            is_current INTEGER NOT NULL DEFAULT 0,
+            datum_ymd INTEGER, rok INTEGER, mesic INTEGER
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO items_data (
+            id, datum, doklad, zdroj_id, firma_id, text, madati, dal, castka,
+            cin, cislo, co_id, kdo_id, stredisko_id, kategorie_id, is_current,
+            datum_ymd, rok, mesic
+        )
+        SELECT i.id, i.datum, i.doklad, zd.id, fi.id, i.text, i.madati, i.dal, i.castka,
+               i.cin, i.cislo, co.id, kd.id, st.id, i.kategorie_id, i.is_current,
+               i.datum_ymd, i.rok, i.mesic
+        FROM items i
+        LEFT JOIN ciselnik_zdroj zd ON zd.hodnota = i.zdroj
+        LEFT JOIN ciselnik_firma fi ON fi.hodnota = i.firma
+        LEFT JOIN ciselnik_co co ON co.hodnota = i.co
+        LEFT JOIN ciselnik_kdo kd ON kd.hodnota = i.kdo
+        LEFT JOIN ciselnik_stredisko st ON st.hodnota = i.stredisko
+    ''')
+    cursor.execute("DROP TABLE items")  # odstraní i jeho indexy a triggery
+
+    # Indexy a triggery verze dat nyní nad items_data (názvy indexů zůstávají)
+    for name, columns in (
+        ("idx_items_kategorie_current", "kategorie_id, is_current"),
+        ("idx_items_datum", "datum"),
+        ("idx_items_kategorie_datum", "kategorie_id, datum"),
+        ("idx_items_kategorie_current_mesic", "kategorie_id, is_current, mesic"),
+        ("idx_items_current_datum_ymd", "is_current, datum_ymd"),
+        ("idx_items_co_kategorie", "co_id, kategorie_id"),
+    ):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON items_data({columns})")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_items_data_{event.lower()}_verze
+            AFTER {event} ON items_data
+            BEGIN
+                UPDATE verze_dat SET verze = verze + 1 WHERE id = 1;
+            END
+        ''')
+
+    items_db.create_items_view(cursor)
+    # Skupinové klíče pivotu se změnily (ID z číselníků) - zneplatní cache a snapshoty
+    cursor.execute("UPDATE verze_dat SET verze = verze + 1 WHERE id = 1")
+
+
+def _migrate_category_closure(cursor):
+    """
+    Verze 4: Uzávěr hierarchie kategorií (kategorie_closure) udržovaný triggery.
+
+    Součty podstromu libovolné (i custom) kategorie se pak počítají jedním
+    JOINem přes kategorie_closure místo rekurze v Pythonu.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kategorie_closure (
+            ancestor_id INTEGER NOT NULL,
+            descendant_id INTEGER NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_kategorie_closure_descendant
+        ON kategorie_closure(descendant_id, depth)
+    ''')
+
+    # Nová kategorie = předci rodiče (o úroveň hlouběji) + ona sama
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_kategorie_insert_closure
+        AFTER INSERT ON kategorie
+        BEGIN
+            INSERT INTO kategorie_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, NEW.id, depth + 1 FROM kategorie_closure WHERE descendant_id = NEW.parent_id
+            UNION ALL
+            SELECT NEW.id, NEW.id, 0;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_kategorie_delete_closure
+        AFTER DELETE ON kategorie
+        BEGIN
+            DELETE FROM kategorie_closure WHERE descendant_id = OLD.id OR ancestor_id = OLD.id;
+        END
+    ''')
+    # Přesun kategorie: odpojí celý její podstrom od starých předků a napojí pod nové
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_kategorie_move_closure
+        AFTER UPDATE OF parent_id ON kategorie
+        WHEN OLD.parent_id IS NOT NEW.parent_id
+        BEGIN
+            DELETE FROM kategorie_closure
+            WHERE descendant_id IN (SELECT descendant_id FROM kategorie_closure WHERE ancestor_id = NEW.id)
+              AND ancestor_id NOT IN (SELECT descendant_id FROM kategorie_closure WHERE ancestor_id = NEW.id);
+            INSERT INTO kategorie_closure (ancestor_id, descendant_id, depth)
+            SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+            FROM kategorie_closure a, kategorie_closure d
+            WHERE a.descendant_id = NEW.parent_id
+              AND d.ancestor_id = NEW.id;
+        END
+    ''')
+
+    categories_db.rebuild_category_closure(cursor)
+
+
+def _migrate_time_dimensions(cursor):
+    """
+    Verze 5: Odvozené sloupce ctvrtleti a tyden (ISO týden YYYYWW) + indexy pro časové dimenze pivotu.
+    """
+    existing = _column_names(cursor, "items_data")
+    for col in ("ctvrtleti", "tyden"):
+        if col not in existing:
+            cursor.execute(f"ALTER TABLE items_data ADD COLUMN {col} INTEGER")
+
+    cursor.execute("UPDATE items_data SET ctvrtleti = (mesic + 2) / 3 WHERE mesic IS NOT NULL")
+
+    def compute(row):
+        item_id, datum = row
+        tyden = items_db.date_column_values(datum)[4]
+        return None if tyden is None else (tyden, item_id)
+
+    backfill_in_batches(
+        cursor,
+        "SELECT id, datum FROM items_data WHERE id > ? AND datum_ymd IS NOT NULL ORDER BY id LIMIT ?",
+        "UPDATE items_data SET tyden = ? WHERE id = ?",
+        compute,
+    )
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_items_current_rok_mesic
+        ON items_data(is_current, rok, mesic)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_items_current_tyden
+        ON items_data(is_current, tyden)
+    ''')
+
+    # Pohled 'items' převezme nové sloupce
+    items_db.create_items_view(cursor)
+
+
+def _migrate_fulltext_index(cursor):
+    """
+    Verze 6: Fulltextový index FTS5 nad text, firma a doklad transakcí (items_fts).
+
+    Pokud SQLite nemá modul FTS5, migrace index vynechá a vyhledávání
+    (items_db.get_filtered_items) použije LIKE; index se pak vytvoří při
+    některém dalším otevření profilu (run_migrations), až bude FTS5 k dispozici.
+    """
+    create_fulltext_index(cursor)
+
+
+def create_fulltext_index(cursor) -> bool:
+    """
+    Vytvoří a naplní fulltextový index transakcí, pokud ještě neexistuje.
+
+    rowid v items_fts = items_data.id; index udržují triggery nad items_data
+    (firma se dohledá v číselníku).
+
+    Returns:
+        True, pokud profil index má; False, pokud SQLite nemá modul FTS5
+    """
+    if items_db._has_fts_index(cursor):
+        return True
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE {items_db.FTS_TABLE}
+            USING fts5(text, firma, doklad, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning("Fulltextový index nelze vytvořit (chybí FTS5?): %s", e)
+        return False
+
+    fts_values = """
+        (NEW.id, NEW.text, (SELECT hodnota FROM ciselnik_firma WHERE id = NEW.firma_id), NEW.doklad)
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_items_data_insert_fts
+        AFTER INSERT ON items_data
+        BEGIN
+            INSERT INTO {items_db.FTS_TABLE}(rowid, text, firma, doklad) VALUES {fts_values};
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_items_data_update_fts
+        AFTER UPDATE OF id, text, firma_id, doklad ON items_data
+        BEGIN
+            DELETE FROM {items_db.FTS_TABLE} WHERE rowid = OLD.id;
+            INSERT INTO {items_db.FTS_TABLE}(rowid, text, firma, doklad) VALUES {fts_values};
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_items_data_delete_fts
+        AFTER DELETE ON items_data
+        BEGIN
+            DELETE FROM {items_db.FTS_TABLE} WHERE rowid = OLD.id;
+        END
+    """)
+
+    cursor.execute(f"DELETE FROM {items_db.FTS_TABLE}")
+    cursor.execute(f"""
+        INSERT INTO {items_db.FTS_TABLE}(rowid, text, firma, doklad)
+        SELECT i.id, i.text, c.hodnota, i.doklad
+        FROM items_data i
+        LEFT JOIN ciselnik_firma c ON c.id = i.firma_id
+    """)
+    cursor.execute(f"INSERT INTO {items_db.FTS_TABLE}({items_db.FTS_TABLE}) VALUES ('optimize')")
+    return True
+
+
+def _migrate_categorization_rules(cursor):
+    """
+    Verze 7: Pravidla automatického zařazení transakcí (pravidla_kategorizace, viz rules_db).
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pravidla_kategorizace (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pole TEXT NOT NULL CHECK (pole IN ('co', 'text', 'firma')),
+            typ_shody TEXT NOT NULL CHECK (typ_shody IN ('presne', 'prefix', 'regex')),
+            vzor TEXT NOT NULL,
+            znamenko TEXT CHECK (znamenko IN ('příjem', 'výdej')),
+            stredisko TEXT,
+            kategorie_id INTEGER NOT NULL,
+            priorita INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (kategorie_id) REFERENCES kategorie (id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pravidla_kategorie
+        ON pravidla_kategorizace(kategorie_id)
+    ''')
+    # Pravidla smazané kategorie nemají kam zařazovat
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_kategorie_delete_pravidla
+        AFTER DELETE ON kategorie
+        BEGIN
+            DELETE FROM pravidla_kategorizace WHERE kategorie_id = OLD.id;
+        END
+    ''')
+
+
+def _migrate_budget_version(cursor):
+    """
+    Verze 8: Čítač verze rozpočtů (verze_dat.verze_rozpoctu) udržovaný triggery.
+
+    Zápisy do 'rozpocty' nemění hlavní čítač verze (snapshoty a cache transakcí
+    zůstávají platné), ale stav profilu (manager.get_profile_state) na nich závisí.
+    """
+    if "verze_rozpoctu" not in _column_names(cursor, "verze_dat"):
+        cursor.execute("ALTER TABLE verze_dat ADD COLUMN verze_rozpoctu INTEGER NOT NULL DEFAULT 0")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_rozpocty_{event.lower()}_verze
+            AFTER {event} ON rozpocty
+            BEGIN
+                UPDATE verze_dat SET verze_rozpoctu = verze_rozpoctu + 1 WHERE id = 1;
+            END
+        ''')
+
+
+# (verze, název, funkce, vacuum) - vacuum=True u kroků, které přestavují velké
+# tabulky a nechávají po sobě volné stránky (items → items_data)
+MIGRATIONS = [
+    (1, "Odvozené datumové sloupce items", _migrate_item_date_columns, False),
+    (2, "Čítač verze dat profilu", _migrate_data_version, False),
+    (3, "Číselníky textových dimenzí items", _migrate_dictionary_columns, True),
+    (4, "Uzávěr hierarchie kategorií", _migrate_category_closure, False),
+    (5, "Časové dimenze items", _migrate_time_dimensions, False),
+    (6, "Fulltextový index transakcí", _migrate_fulltext_index, False),
+    (7, "Pravidla kategorizace", _migrate_categorization_rules, False),
+    (8, "Čítač verze rozpočtů", _migrate_budget_version, False),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _complete_fulltext_index(conn) -> bool:
+    """
+    Doplní fulltextový index, který migrace 6 vynechala (SQLite tehdy nemělo FTS5).
+
+    Returns:
+        True, pokud se index právě vytvořil
+    """
+    cursor = conn.cursor()
+    if items_db._has_fts_index(cursor):
+        return False
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        created = create_fulltext_index(cursor)
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    return created
+
+
+def run_migrations(conn) -> list:
+    """
+    Převede profil na aktuální verzi schématu (SCHEMA_VERSION).
+
+    Každý krok běží ve vlastní transakci spolu se zvýšením PRAGMA user_version,
+    takže přerušená migrace se při příštím otevření profilu zopakuje od
+    posledního dokončeného kroku. Fulltextový index, který migrace 6 vynechala
+    (chybělo FTS5), se zkusí doplnit při každém otevření.
+
+    Args:
+        conn: Otevřené spojení na profil (výchozí tabulky už musí existovat)
+
+    Returns:
+        Seznam názvů provedených migrací (prázdný = profil byl aktuální)
+    """
+    current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Profil má novější verzi schématu ({current}) než aplikace ({SCHEMA_VERSION})."
+        )
+
+    applied = []
+    needs_vacuum = False
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # transakce řídíme ručně (BEGIN/COMMIT)
+    try:
+        for version, name, migrate, vacuum in MIGRATIONS:
+            if version <= current:
+                # Index vynechaný starší migrací se doplní, jakmile je FTS5 k dispozici
+                if migrate is _migrate_fulltext_index and _complete_fulltext_index(conn):
+                    applied.append(name)
+                continue
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                migrate(cursor)
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            applied.append(name)
+            needs_vacuum = needs_vacuum or vacuum
+        if needs_vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.isolation_level = previous_isolation
+    return applied
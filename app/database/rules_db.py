@@ -0,0 +1,242 @@
+import re
+import sqlite3
+from collections import Counter
+
+from . import categories_db
+from .category_index import invalidate_category_index
+
+# Pole transakce, na která se pravidlo může odkazovat
+RULE_FIELDS = ("co", "text", "firma")
+# Druhy shody: přesná hodnota, začátek hodnoty, regulární výraz (re.search)
+MATCH_TYPES = ("presne", "prefix", "regex")
+# Omezení podle znaménka částky (None = libovolná částka)
+SIGN_TYPES = ("příjem", "výdej")
+
+RULE_COLUMNS = "id, pole, typ_shody, vzor, znamenko, stredisko, kategorie_id, priorita"
+
+
+def add_rule(db_path, pole, typ_shody, vzor, kategorie_id, znamenko=None, stredisko=None, priorita=0):
+    """
+    Přidá pravidlo automatické kategorizace a vrátí jeho ID.
+
+    Shoda 'presne' a 'prefix' nerozlišuje velikost písmen, 'regex' se hledá
+    kdekoli v hodnotě (re.search, bez ohledu na velikost písmen).
+    Pravidla se vyhodnocují od nejvyšší priority, při shodě priority dřívější první.
+
+    Pravidlo zařazuje jen transakce se znaménkem odpovídajícím typu cílové
+    kategorie (příjem = kladná částka, výdej = záporná); nulové částky nikdy.
+
+    Raises:
+        ValueError: neplatné pole, druh shody, znaménko (i v rozporu s typem
+                    kategorie), regulární výraz nebo kategorie, která není LEAF
+    """
+    if pole not in RULE_FIELDS:
+        raise ValueError(f"Neznámé pole pravidla: {pole}")
+    if typ_shody not in MATCH_TYPES:
+        raise ValueError(f"Neznámý druh shody: {typ_shody}")
+    if znamenko is not None and znamenko not in SIGN_TYPES:
+        raise ValueError(f"Neznámé znaménko: {znamenko}")
+    if not str(vzor or "").strip():
+        raise ValueError("Vzor pravidla nesmí být prázdný.")
+    if typ_shody == "regex":
+        try:
+            re.compile(vzor)
+        except re.error as e:
+            raise ValueError(f"Neplatný regulární výraz '{vzor}': {e}")
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        # DŮLEŽITÉ: Pouze LEAF kategorie (is_custom=0) mohou mít transakce!
+        cursor.execute("SELECT is_custom, typ FROM kategorie WHERE id = ?", (kategorie_id,))
+        row = cursor.fetchone()
+        if not row or row[0] == 1:
+            raise ValueError("Pravidlo musí zařazovat do existující LEAF kategorie.")
+        if znamenko is not None and znamenko != row[1]:
+            raise ValueError(f"Znaménko '{znamenko}' neodpovídá typu kategorie '{row[1]}'.")
+        cursor.execute(
+            """
+            INSERT INTO pravidla_kategorizace (pole, typ_shody, vzor, znamenko, stredisko, kategorie_id, priorita)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (pole, typ_shody, vzor, znamenko, stredisko or None, kategorie_id, int(priorita)),
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+        # Index kategorií nese i zkompilovaná pravidla (add_item, update_item)
+        invalidate_category_index(db_path)
+
+
+def get_rules(db_path):
+    """Vrátí všechna pravidla v pořadí vyhodnocení jako seznam slovníků (+ název kategorie)."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT {', '.join('p.' + c for c in RULE_COLUMNS.split(', '))}, k.nazev AS kategorie
+        FROM pravidla_kategorizace p
+        JOIN kategorie k ON k.id = p.kategorie_id
+        ORDER BY p.priorita DESC, p.id
+    """)
+    rules = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rules
+
+
+def delete_rule(db_path, rule_id):
+    """Smaže pravidlo kategorizace."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM pravidla_kategorizace WHERE id = ?", (rule_id,))
+    conn.commit()
+    conn.close()
+    invalidate_category_index(db_path)
+
+
+class _RuleMatcher:
+    """
+    Zkompilovaná pravidla pro hromadné vyhodnocení.
+
+    Přesné shody jsou slovník hodnota → pravidla, prefixy slovníky podle délky
+    prefixu (hledání = jeden lookup na každou délku), jen regulární výrazy se
+    zkoušejí postupně. Výsledek pro hodnotu pole se pamatuje, takže se každá
+    odlišná hodnota vyhodnotí jen jednou.
+    """
+
+    def __init__(self, rules):
+        # rules: seznam tuple (id, pole, typ_shody, vzor, znamenko, stredisko, kategorie_id, typ kategorie)
+        # v pořadí priority
+        self.rules = rules
+        self.exact = {f: {} for f in RULE_FIELDS}
+        self.prefix = {f: {} for f in RULE_FIELDS}  # pole -> délka -> prefix -> [pořadí pravidla]
+        self.regex = {f: [] for f in RULE_FIELDS}
+        self._memo = {f: {} for f in RULE_FIELDS}
+
+        for order, (_, pole, typ_shody, vzor, *_rest) in enumerate(rules):
+            if typ_shody == "presne":
+                self.exact[pole].setdefault(vzor.casefold(), []).append(order)
+            elif typ_shody == "prefix":
+                key = vzor.casefold()
+                self.prefix[pole].setdefault(len(key), {}).setdefault(key, []).append(order)
+            else:
+                try:
+                    self.regex[pole].append((order, re.compile(vzor, re.IGNORECASE)))
+                except re.error as e:
+                    print(f"Pravidlo {rules[order][0]}: neplatný regulární výraz '{vzor}' ({e}) - přeskočeno")
+
+    def candidates(self, pole, value):
+        """Vrátí seřazená pořadí pravidel, jejichž podmínka na pole odpovídá hodnotě."""
+        memo = self._memo[pole]
+        if value in memo:
+            return memo[value]
+        key = (value or "").casefold()
+        found = list(self.exact[pole].get(key, ()))
+        for length, prefixes in self.prefix[pole].items():
+            if length <= len(key):
+                found.extend(prefixes.get(key[:length], ()))
+        for order, pattern in self.regex[pole]:
+            if pattern.search(value or ""):
+                found.append(order)
+        found.sort()
+        memo[value] = found
+        return found
+
+    def match(self, values, castka, stredisko):
+        """
+        Vrátí první (nejvyšší priorita) pravidlo odpovídající transakci, jinak None.
+
+        Znaménko částky musí odpovídat typu cílové kategorie (i znaménku pravidla),
+        nulová částka se nezařazuje - stejně jako CategoryIndex.leaf_id_for().
+        """
+        if not castka:
+            return None
+        item_type = 'příjem' if castka > 0 else 'výdej'
+        best = None
+        for pole in RULE_FIELDS:
+            for order in self.candidates(pole, values[pole]):
+                if best is not None and order >= best:
+                    break
+                _, _, _, _, znamenko, rule_stredisko, _, typ = self.rules[order]
+                if typ != item_type or (znamenko is not None and znamenko != item_type):
+                    continue
+                if rule_stredisko and rule_stredisko != stredisko:
+                    continue
+                best = order
+                break
+        return None if best is None else self.rules[best]
+
+
+def load_rule_matcher(cursor):
+    """
+    Načte pravidla do LEAF kategorií (custom kategorie nesmí mít transakce)
+    a vrátí zkompilovaný matcher, nebo None, pokud žádná pravidla nejsou.
+    """
+    cursor.execute("""
+        SELECT p.id, p.pole, p.typ_shody, p.vzor, p.znamenko, p.stredisko, p.kategorie_id, k.typ
+        FROM pravidla_kategorizace p
+        JOIN kategorie k ON k.id = p.kategorie_id AND k.is_custom = 0
+        ORDER BY p.priorita DESC, p.id
+    """)
+    rules = cursor.fetchall()
+    return _RuleMatcher(rules) if rules else None
+
+
+def apply_categorization_rules(db_path, is_current=None, update_metrics=True):
+    """
+    Zařadí všechny nezařazené transakce podle pravidel jedním hromadným průchodem.
+
+    Nezařazené transakce se načtou jedním dotazem, pravidla se vyhodnotí
+    v paměti (viz _RuleMatcher) a výsledná přiřazení se zapíší jedním
+    executemany v jedné transakci. Metriky dotčených kategorií se přepočítají
+    jednou na konci (categories_db.update_categories_metrics).
+
+    Args:
+        db_path: Cesta k databázi
+        is_current: Volitelně jen aktuální (1) nebo historické (0) transakce
+        update_metrics: False = metriky nepřepočítávat (volající to udělá sám)
+
+    Returns:
+        Slovník {id pravidla: počet zařazených transakcí} (jen pravidla s nějakou shodou)
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        matcher = load_rule_matcher(cursor)
+        if matcher is None:
+            return {}
+
+        where = ["i.kategorie_id IS NULL", "i.castka != 0"]
+        params = []
+        if is_current is not None:
+            where.append("i.is_current = ?")
+            params.append(is_current)
+        cursor.execute(f"""
+            SELECT i.id, COALESCE(c_co.hodnota, ''), COALESCE(i.text, ''), COALESCE(c_firma.hodnota, ''),
+                   i.castka, COALESCE(c_stredisko.hodnota, '')
+            FROM items_data i
+            LEFT JOIN ciselnik_co c_co ON c_co.id = i.co_id
+            LEFT JOIN ciselnik_firma c_firma ON c_firma.id = i.firma_id
+            LEFT JOIN ciselnik_stredisko c_stredisko ON c_stredisko.id = i.stredisko_id
+            WHERE {' AND '.join(where)}
+        """, tuple(params))
+
+        assignments = []
+        report = Counter()
+        for item_id, co, text, firma, castka, stredisko in cursor.fetchall():
+            rule = matcher.match({"co": co, "text": text, "firma": firma}, castka or 0, stredisko)
+            if rule is not None:
+                assignments.append((rule[6], item_id))
+                report[rule[0]] += 1
+
+        cursor.executemany(
+            "UPDATE items_data SET kategorie_id = ? WHERE id = ? AND kategorie_id IS NULL",
+            assignments,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    if update_metrics and assignments:
+        categories_db.update_categories_metrics(db_path, {category_id for category_id, _ in assignments})
+    return dict(report)
@@ -0,0 +1,121 @@
+import re
+import sqlite3
+import unicodedata
+from collections import Counter
+
+# Minimální podobnost (Dice koeficient 0..1), od které se kategorie navrhuje
+MIN_SUGGESTION_SCORE = 0.3
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class SuggestionIndex:
+    """
+    Index podobnosti pro návrhy kategorií nezařazeným hodnotám 'co'.
+
+    Dokumenty jsou názvy LEAF kategorií a hodnoty 'co' už zařazených transakcí
+    (každý patří ke své kategorii). Každý dokument se rozloží na znakové trigramy
+    a celá slova (bez diakritiky, malými písmeny); invertovaný index gram → dokumenty
+    pak dovolí spočítat podobnost jen s dokumenty, které sdílí aspoň jeden gram.
+    """
+
+    def __init__(self, documents):
+        # documents: iterable (kategorie_id, nazev kategorie, typ, text dokumentu)
+        self.categories = {}      # kategorie_id -> (nazev, typ)
+        self.doc_category = []    # index dokumentu -> kategorie_id
+        self.doc_size = []        # index dokumentu -> počet gramů
+        self.postings = {}        # gram -> [index dokumentu]
+        seen = set()
+        for category_id, nazev, typ, text in documents:
+            self.categories[category_id] = (nazev, typ)
+            grams = _grams(text)
+            key = (category_id, frozenset(grams))
+            if not grams or key in seen:
+                continue
+            seen.add(key)
+            doc = len(self.doc_category)
+            self.doc_category.append(category_id)
+            self.doc_size.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(doc)
+
+    def suggest(self, value, typ=None, limit=3):
+        """
+        Vrátí seřazené návrhy [(kategorie_id, nazev, skóre)] pro hodnotu.
+
+        Skóre kategorie je nejvyšší Dice koeficient (2·společné / (|dotaz| + |dokument|))
+        přes její dokumenty; typ omezí návrhy na kategorie daného typu.
+        """
+        grams = _grams(value)
+        if not grams:
+            return []
+        common = Counter()
+        for gram in grams:
+            common.update(self.postings.get(gram, ()))
+
+        best = {}
+        for doc, shared in common.items():
+            category_id = self.doc_category[doc]
+            if typ is not None and self.categories[category_id][1] != typ:
+                continue
+            score = 2.0 * shared / (len(grams) + self.doc_size[doc])
+            if score > best.get(category_id, 0.0):
+                best[category_id] = score
+
+        ranked = sorted(
+            (item for item in best.items() if item[1] >= MIN_SUGGESTION_SCORE),
+            key=lambda item: (-item[1], self.categories[item[0]][0]),
+        )
+        return [(category_id, self.categories[category_id][0], score) for category_id, score in ranked[:limit]]
+
+
+def build_suggestion_index(db_path):
+    """Sestaví SuggestionIndex z LEAF kategorií a už zařazených hodnot 'co' (dva dotazy)."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, nazev, typ, nazev FROM kategorie WHERE is_custom = 0")
+    documents = cursor.fetchall()
+    cursor.execute("""
+        SELECT DISTINCT k.id, k.nazev, k.typ, c.hodnota
+        FROM items_data i
+        JOIN kategorie k ON k.id = i.kategorie_id AND k.is_custom = 0
+        JOIN ciselnik_co c ON c.id = i.co_id
+    """)
+    documents.extend(cursor.fetchall())
+    conn.close()
+    return SuggestionIndex(documents)
+
+
+def get_category_suggestions(db_path, values_by_type, limit=3):
+    """
+    Návrhy kategorií pro celý seznam nezařazených hodnot najednou.
+
+    Args:
+        values_by_type: {typ: [hodnota 'co', ...]} - např. výsledek get_unassigned_categories_by_type()
+        limit: maximální počet návrhů na hodnotu
+
+    Returns:
+        {typ: {hodnota: [(kategorie_id, nazev, skóre), ...]}} - jen kategorie daného typu
+    """
+    index = build_suggestion_index(db_path)
+    return {
+        typ: {value: index.suggest(value, typ, limit) for value in values}
+        for typ, values in values_by_type.items()
+    }
+
+
+def _normalize(text):
+    """Malá písmena bez diakritiky (pro porovnání 'Pronájem' ~ 'pronajem')."""
+    decomposed = unicodedata.normalize("NFKD", str(text or "").casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _grams(text):
+    """Množina znakových trigramů a celých slov (slova s prefixem '#') normalizovaného textu."""
+    words = _WORD_RE.findall(_normalize(text))
+    if not words:
+        return set()
+    padded = f"  {' '.join(words)} "
+    grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    grams.update(f"#{word}" for word in words if len(word) > 1)
+    return grams
@@ -1,13 +1,19 @@
 import csv
 from . import database as db
 
-def export_to_csv(filepath, db_path):
+# Hlavička exportu - pořadí odpovídá items_db.ITEM_COLUMNS
+EXPORT_HEADER = [
+    'ID', 'Datum', 'Doklad', 'Zdroj', 'Firma', 'Text', 'MD', 'D',
+    'Částka', 'Cin', 'Číslo', 'Co', 'Kdo', 'Středisko', 'Kategorie ID', 'is_current'
+]
+
+def export_to_csv(filepath, db_path, is_current=0):
     """
-    Získá všechna historická data z databáze a zapíše je do zadaného CSV souboru.
+    Získá všechna historická (nebo aktuální) data z databáze a zapíše je do zadaného CSV souboru.
     """
     try:
-        # Získáme všechna historická data z databáze
-        all_items = db.get_items(db_path, is_current=0)
+        # Získáme všechna data daného stavu z databáze
+        all_items = db.get_items(db_path, is_current=is_current)
 
         # Otevřeme soubor pro zápis
         # newline='' zabraňuje vkládání prázdných řádků mezi záznamy
@@ -15,15 +21,36 @@ def export_to_csv(filepath, db_path):
             writer = csv.writer(file)
 
             # Zapíšeme hlavičku souboru (názvy sloupců)
-            writer.writerow([
-                'ID', 'Datum', 'Doklad', 'Zdroj', 'Firma', 'Text', 'MD', 'D', 
-                'Částka', 'Cin', 'Číslo', 'Co', 'Kdo', 'Středisko', 'is_current'
-            ])
+            writer.writerow(EXPORT_HEADER)
 
             # Zapíšeme všechny datové řádky
             writer.writerows(all_items)
-        
+
         return True # Vracíme True, pokud se export podařil
     except Exception as e:
         print(f"Chyba při exportu do CSV: {e}")
-        return False # Vracíme False, pokud nastala chyba
\ No newline at end of file
+        return False # Vracíme False, pokud nastala chyba
+
+def export_to_parquet(filepath, db_path, is_current=0):
+    """
+    Zapíše transakce daného stavu do souboru Parquet (sloupce jako v CSV exportu).
+
+    Vyžaduje pandas s pyarrow (nebo fastparquet) - načítají se až zde.
+    """
+    try:
+        import pandas as pd
+    except ImportError as e:
+        print(f"Export do Parquet vyžaduje knihovnu pandas: {e}")
+        return False
+
+    try:
+        all_items = db.get_items(db_path, is_current=is_current)
+        df = pd.DataFrame.from_records(all_items, columns=EXPORT_HEADER)
+        df.to_parquet(filepath, index=False)
+        return True
+    except ImportError as e:
+        print(f"Export do Parquet vyžaduje knihovnu pyarrow nebo fastparquet: {e}")
+        return False
+    except Exception as e:
+        print(f"Chyba při exportu do Parquet: {e}")
+        return False
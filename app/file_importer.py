@@ -1,4 +1,3 @@
-import pandas as pd
 from . import database as db
 
 def import_from_excel(filepath, db_path, is_current):
@@ -9,12 +8,19 @@ def import_from_excel(filepath, db_path, is_current):
     Optimalizace: Při importu se metriky nepřepočítávají pro každou transakci,
     ale jednou najednou na konci pro všechny kategorie.
     """
+    try:
+        # pandas (a openpyxl pro .xlsx) se načítá až při importu - zdržoval by start aplikace
+        import pandas as pd
+    except ImportError as e:
+        print(f"Import z Excelu vyžaduje knihovnu pandas: {e}")
+        return False
+
     try:
         df = pd.read_excel(filepath, sheet_name='Zdroj')
         df = df.fillna('')  # Nahradíme NaN za prázdný řetězec
 
-        # Získáme seznam custom kategorií pro validaci
-        custom_categories = db.get_custom_category_names(db_path)
+        # Názvy custom kategorií pro validaci (z indexu kategorií profilu)
+        custom_categories = db.get_category_index(db_path).custom_names
 
         for _, row in df.iterrows():
             # Helper funkce pro bezpečnou konverzi na int
@@ -66,6 +72,9 @@ def import_from_excel(filepath, db_path, is_current):
                     skip_metrics_update=True  # OPTIMALIZACE: Skip během importu
                 )
         
+        # Nezařazené transakce projdou pravidly kategorizace (jeden hromadný průchod)
+        db.apply_categorization_rules(db_path, is_current, update_metrics=False)
+
         # OPTIMALIZACE: Přepočítej metriky JEDNOU pro všechny kategorie na konci
         db.update_all_metrics(db_path)
         
@@ -1,4 +1,7 @@
+import importlib
+import logging
 import os
+import time
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
@@ -9,15 +12,21 @@ from . import file_exporter
 from . import file_importer
 
 from ui.tabs.home_tab import HomeTab
-from ui.tabs.sources_tab import SourcesTab
-from ui.tabs.budget_tab import BudgetTab
-from ui.tabs.analysis_tab import AnalysisTab
-from ui.tabs.accounting_structure_tab import AccountingStructureTab
+
+logger = logging.getLogger(__name__)
 
 class App:
-    def __init__(self, root, profile_path):
+    def __init__(self, root, profile_path, started_at=None):
+        # Časy spuštění (start = před otevřením databáze, pokud ho volající předá)
+        self._startup_times = {"start": started_at or time.perf_counter(), "app": time.perf_counter()}
         self.root = root
         self.profile_path = profile_path
+        # Zdroj dat pro analytické pohledy - "columnar" po úspěšném načtení snapshotu
+        self.analytics_backend = "sql"
+        # Záložky závislé na datech profilu (rám záložky -> obnovení) a neaktuální záložky
+        self._views = {}
+        self._dirty_views = set()
+        self._flush_scheduled = False
         self.root.title(f"Nástroj pro tvorbu rozpočtu - {os.path.basename(profile_path)}")
         self.root.geometry("1280x800")  # Zvětšíme okno pro více sloupců
 
@@ -33,6 +42,8 @@ class App:
         # --- KROK 1: Vytvoření Notebooku (záložek) ---
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=True, fill='both', padx=10, pady=10)
+        # Záložka se vytvoří až při prvním zobrazení, neaktuální se obnoví až při zobrazení
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self._on_tab_changed())
 
         # --- KROK 2: Vytvoření rámů pro jednotlivé záložky ---
         self.tab_home = ttk.Frame(self.notebook)
@@ -44,16 +55,111 @@ class App:
         self.notebook.add(self.tab_home, text='Home')   
 
         # --- Naplnění záložek obsahem ---
-        # Vytvoříme instance VŠECH manažerů hned na začátku
+        # Hned vytvoříme jen Home, ostatní záložky (i import jejich modulů) až při prvním výběru (_build_tab)
         self.home_ui = HomeTab(self.tab_home, self)
-        self.sources_ui = SourcesTab(self.tab_sources, self)
-        self.budget_ui = BudgetTab(self.tab_budget, self)
-        self.analysis_ui = AnalysisTab(self.tab_analysis, self)
-        self.accounting_ui = AccountingStructureTab(self.tab_accounting, self)
+        self._tab_builders = {
+            self.tab_sources: ('sources_ui', 'ui.tabs.sources_tab', 'SourcesTab'),
+            self.tab_budget: ('budget_ui', 'ui.tabs.budget_tab', 'BudgetTab'),
+            self.tab_analysis: ('analysis_ui', 'ui.tabs.analysis_tab', 'AnalysisTab'),
+            self.tab_accounting: ('accounting_ui', 'ui.tabs.accounting_structure_tab', 'AccountingStructureTab'),
+        }
 
         # Po spuštění zkontrolujeme stav a zobrazíme správné záložky
         self.root.after(100, self.update_tabs_visibility)
+        # Sloupcový snapshot (soubor vedle profilu) se namapuje hned po zobrazení okna
+        self.root.after(200, self.preload_analytics_snapshot)
+        self._startup_times["ui"] = time.perf_counter()
+        self.root.after_idle(self._report_startup_time)
+
+    def _report_startup_time(self):
+        """Zaloguje (debug) dobu otevření profilu (databáze, sestavení okna, první vykreslení)."""
+        now = time.perf_counter()
+        times = self._startup_times
+        logger.debug(
+            "Profil otevřen za %.0f ms (databáze %.0f ms, okno %.0f ms, vykreslení %.0f ms)",
+            (now - times['start']) * 1000, (times['app'] - times['start']) * 1000,
+            (times['ui'] - times['app']) * 1000, (now - times['ui']) * 1000,
+        )
+
+    def preload_analytics_snapshot(self):
+        """
+        Připraví sloupcový snapshot pro pivoty a dashboard.
+
+        Pokud je uložený soubor aktuální, jen se namapuje (bez průchodu items);
+        jinak se vytvoří a uloží na pozadí a dotazy mezitím odpovídá SQL
+        (platí i po každé změně dat). Bez NumPy zůstává backend "sql".
+        """
+        try:
+            from app.database import columnar_db
+            columnar_db.get_current_snapshot(self.profile_path)
+            self.analytics_backend = "columnar"
+        except ImportError:
+            self.analytics_backend = "sql"
+        except Exception as e:
+            print(f"Sloupcový snapshot se nepodařilo připravit: {e}")
+            self.analytics_backend = "sql"
     
+    def register_view(self, tab_frame, refresh):
+        """
+        Zaregistruje záložku, jejíž obsah závisí na datech profilu.
+
+        refresh() se zavolá při zobrazení záložky, pokud se od posledního
+        obnovení změnila data (notify_data_changed) - i první načtení je až při zobrazení.
+        """
+        self._views[tab_frame] = refresh
+        self._dirty_views.add(tab_frame)
+
+    def notify_data_changed(self, source=None):
+        """
+        Oznámí změnu dat profilu (transakce, kategorie, rozpočty).
+
+        Všechny zaregistrované záložky kromě source (ta se už obnovila sama) se označí
+        jako neaktuální. Zpracování proběhne jednou až v nečinnosti (after_idle),
+        takže více změn za sebou vyvolá jen jedno obnovení: dashboard zahodí cache
+        a obnoví se jen právě zobrazená záložka, ostatní až při přepnutí na ně.
+        """
+        self._dirty_views.update(frame for frame in self._views if frame is not source)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after_idle(self._flush_data_changes)
+
+    def _flush_data_changes(self):
+        self._flush_scheduled = False
+        # Invalidace cache pro dashboard a stats_window
+        if hasattr(self, 'dashboard_ui'):
+            self.dashboard_ui.invalidate_cache()
+        self._refresh_selected_view()
+
+    def _build_tab(self, tab_frame):
+        """Vytvoří obsah záložky při jejím prvním zobrazení (jen jednou)."""
+        builder = self._tab_builders.pop(tab_frame, None)
+        if builder is None:
+            return
+        attr, module_name, class_name = builder
+        started = time.perf_counter()
+        tab_class = getattr(importlib.import_module(module_name), class_name)
+        # Konstruktor záložky se zaregistruje (register_view), obnoví se až v _refresh_selected_view
+        setattr(self, attr, tab_class(tab_frame, self))
+        logger.debug("Záložka %s vytvořena za %.0f ms", class_name, (time.perf_counter() - started) * 1000)
+
+    def _on_tab_changed(self):
+        try:
+            selected = self.notebook.nametowidget(self.notebook.select())
+        except (tk.TclError, KeyError):
+            return
+        self._build_tab(selected)
+        self._refresh_selected_view()
+
+    def _refresh_selected_view(self):
+        """Obnoví právě zobrazenou záložku, pokud je neaktuální."""
+        try:
+            selected = self.notebook.nametowidget(self.notebook.select())
+        except (tk.TclError, KeyError):
+            return
+        if selected in self._dirty_views:
+            self._dirty_views.discard(selected)
+            self._views[selected]()
+
     def switch_to_tab(self, tab_name: str):
         """Programově přepne na záložku se zadaným názvem."""
         # 'tabs()' vrátí seznam ID všech záložek.
@@ -81,7 +187,7 @@ class App:
             return
 
         # Zeptáme se na přepsání pouze pokud importujeme historická data A NĚJAKÁ UŽ EXISTUJÍ.
-        if is_current == 0 and db.has_transactions(self.profile_path, is_current=0):
+        if is_current == 0 and db.get_profile_state(self.profile_path)["has_historical"]:
             choice = messagebox.askyesnocancel(
                 "Možnosti importu historických dat", 
                 "Přidat data k existujícím (Ano),\nnebo přepsat všechna historická data (Ne)?"
@@ -94,16 +200,8 @@ class App:
         
         # Samotný import
         if file_importer.import_from_excel(filepath, self.profile_path, is_current):
-            # Obnovíme všechny relevantní záložky
-            self.sources_ui.load_items()
-            if hasattr(self, 'accounting_ui'):
-                self.accounting_ui.refresh_data()
-            if hasattr(self, 'budget_ui'):
-                self.budget_ui.load_data()
-            
-            # Invalidace cache pro dashboard
-            if hasattr(self, 'dashboard_ui'):
-                self.dashboard_ui.invalidate_cache()
+            # Záložky se obnoví až při zobrazení (zobrazená hned po dokončení importu)
+            self.notify_data_changed()
 
             # Po importu musíme zkontrolovat, zda se mají zobrazit nové záložky
             self.update_tabs_visibility()
@@ -131,15 +229,16 @@ class App:
             except tk.TclError:
                 pass # Ignorujeme chybu, pokud záložka ještě není přidána
 
-        # Podmíněně "odemkneme" další záložky
-        if db.has_transactions(self.profile_path, is_current=0):
+        # Podmíněně "odemkneme" další záložky (stav profilu jedním dotazem, viz get_profile_state)
+        state = db.get_profile_state(self.profile_path)
+        if state["has_historical"]:
             self.notebook.add(self.tab_sources, text='Transakce')
             self.notebook.add(self.tab_accounting, text='Účetní osnova')
 
-        if db.has_categories(self.profile_path):
+        if state["has_categories"]:
             self.notebook.add(self.tab_budget, text='Rozpočet')
         # a tak dále... (tuto logiku budeme postupně doplňovat)
-        if db.has_any_budget(self.profile_path):
+        if state["has_budget"]:
             self.notebook.add(self.tab_analysis, text='Analýza')
         # Obnovíme dříve vybranou záložku, pokud stále existuje
         if prev_selected_text:
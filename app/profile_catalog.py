@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from app import database as db
+
+# Manifest s metadaty profilů (leží v adresáři profilů vedle .db souborů)
+CATALOG_FILENAME = "katalog_profilu.json"
+CATALOG_VERSION = 1
+
+
+def get_catalog_path(profiles_dir):
+    """Vrátí cestu k manifestu katalogu profilů v daném adresáři."""
+    return os.path.join(profiles_dir, CATALOG_FILENAME)
+
+
+def read_profile_metadata(db_path):
+    """
+    Zjistí metadata jednoho profilu (otevře jeho databázi).
+
+    Returns:
+        Slovník s počty transakcí a kategorií, rozsahem let a verzí schématu
+        (bez údajů o souboru - ty doplní update_profile_catalog)
+    """
+    state = db.get_profile_state(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    schema_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    # MIN/MAX zvlášť pro každé is_current - každý dotaz je jeden skok v indexu (is_current, rok, mesic)
+    cursor.execute("""
+        SELECT MIN(rok_od), MAX(rok_do) FROM (
+            SELECT MIN(rok) AS rok_od, MAX(rok) AS rok_do FROM items_data WHERE is_current = 0
+            UNION ALL
+            SELECT MIN(rok), MAX(rok) FROM items_data WHERE is_current = 1
+        )
+    """)
+    year_from, year_to = cursor.fetchone()
+    conn.close()
+    return {
+        "historical_count": state["historical_count"],
+        "current_count": state["current_count"],
+        "category_count": state["category_count"],
+        "has_budget": state["has_budget"],
+        "year_from": year_from,
+        "year_to": year_to,
+        "schema_version": schema_version,
+    }
+
+
+def load_profile_catalog(profiles_dir):
+    """
+    Vrátí seznam profilů v adresáři (od naposledy změněného) bez otevírání databází.
+
+    Metadata se čtou z manifestu; soubor se jen stat()-uje. Pokud se profil od
+    zápisu do manifestu změnil (jiná velikost nebo čas změny) nebo v manifestu
+    chybí, vrátí se jen údaje o souboru a 'stale': True.
+
+    Returns:
+        Seznam slovníků: filename, path, size, modified (+ metadata z read_profile_metadata)
+    """
+    entries = _read_manifest(profiles_dir)
+    profiles = []
+    try:
+        with os.scandir(profiles_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.db') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                profile = {
+                    "filename": entry.name,
+                    "path": entry.path,
+                    "size": stat.st_size,
+                    "modified": stat.st_mtime,
+                }
+                cached = entries.get(entry.name)
+                if cached and cached.get("size") == stat.st_size and cached.get("modified") == stat.st_mtime:
+                    profile.update(cached.get("metadata", {}))
+                    profile["stale"] = False
+                else:
+                    profile["stale"] = True
+                profiles.append(profile)
+    except OSError as e:
+        print(f"Chyba při načítání profilů: {e}")
+    profiles.sort(key=lambda p: p["modified"], reverse=True)
+    return profiles
+
+
+def update_profile_catalog(db_path):
+    """
+    Zapíše aktuální metadata profilu do manifestu jeho adresáře (volá se při zavření profilu).
+
+    Manifest se přepíše atomicky (dočasný soubor + os.replace), položky
+    smazaných profilů se při tom vynechají.
+    """
+    profiles_dir = os.path.dirname(os.path.abspath(db_path))
+    filename = os.path.basename(db_path)
+    try:
+        metadata = read_profile_metadata(db_path)
+        # Stat až po přečtení metadat - aby odpovídal souboru, který katalog popisuje
+        stat = os.stat(db_path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Katalog profilů se nepodařilo aktualizovat: {e}")
+        return
+
+    entries = _read_manifest(profiles_dir)
+    entries[filename] = {"size": stat.st_size, "modified": stat.st_mtime, "metadata": metadata}
+    entries = {
+        name: entry for name, entry in entries.items()
+        if os.path.exists(os.path.join(profiles_dir, name))
+    }
+
+    catalog_path = get_catalog_path(profiles_dir)
+    temp_path = catalog_path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CATALOG_VERSION, "profiles": entries}, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, catalog_path)
+    except OSError as e:
+        print(f"Katalog profilů se nepodařilo uložit: {e}")
+
+
+def format_profile_summary(profile):
+    """Vrátí popis profilu pro výběr (transakce, roky, změna, velikost)."""
+    parts = []
+    if not profile.get("stale"):
+        parts.append(f"{profile['historical_count']:,} hist. / {profile['current_count']:,} akt. transakcí".replace(",", " "))
+        if profile.get("year_from") is not None:
+            years = str(profile["year_from"])
+            if profile["year_to"] != profile["year_from"]:
+                years += f"–{profile['year_to']}"
+            parts.append(years)
+    parts.append(datetime.fromtimestamp(profile["modified"]).strftime("%d.%m.%Y %H:%M"))
+    parts.append(_format_size(profile["size"]))
+    return ", ".join(parts)
+
+
+def _read_manifest(profiles_dir):
+    """Načte položky manifestu {soubor: {size, modified, metadata}}; chybějící/poškozený = prázdný."""
+    try:
+        with open(get_catalog_path(profiles_dir), encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Katalog profilů nelze přečíst: {e}")
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+        return {}
+    return data.get("profiles", {})
+
+
+def _format_size(size):
+    for unit in ("B", "kB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -1,5 +1,7 @@
+import time
 import tkinter as tk
 from app.main_app import App
+from app import profile_catalog
 from ui.welcome_window import WelcomeWindow
 import app.database as db
 
@@ -18,12 +20,16 @@ if __name__ == "__main__":
     # Pokud si uživatel vybral profil, spustíme hlavní aplikaci
     if profile_path:
         # Inicializujeme databázi pro nově vytvořený profil
-        db.init_db(profile_path)
+        started_at = time.perf_counter()
+        for name in db.init_db(profile_path):
+            print(f"Migrace profilu: {name}")
         
         # Zobrazíme hlavní okno aplikace
         root.deiconify() 
-        app = App(root, profile_path) # Předáme cestu k profilu hlavní aplikaci
+        app = App(root, profile_path, started_at=started_at) # Předáme cestu k profilu hlavní aplikaci
         root.mainloop()
+        # Při zavření zapíšeme metadata profilu do katalogu (výběr profilu je nemusí otevírat)
+        profile_catalog.update_profile_catalog(profile_path)
     else:
         # Pokud si uživatel nevybral žádný profil (zavřel okno), ukončíme aplikaci
         root.destroy()
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Společné fixtures testů: dočasný profil vytvořený kopií test_data/Prezentace.db.
+
+Testy pracují jen s kopií v tmp_path - ukázkový profil v repozitáři se nemění.
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import database as db  # noqa: E402
+
+SAMPLE_PROFILE = os.path.join(ROOT, "test_data", "Prezentace.db")
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """Kopie ukázkového profilu v původní verzi schématu (bez migrací)."""
+    path = str(tmp_path / "profil.db")
+    shutil.copyfile(SAMPLE_PROFILE, path)
+    return path
+
+
+@pytest.fixture
+def profile(baseline_db):
+    """Kopie ukázkového profilu převedená na aktuální schéma (init_db)."""
+    db.init_db(baseline_db)
+    return baseline_db
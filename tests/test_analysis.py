@@ -0,0 +1,49 @@
+import pytest
+
+from app import database as db
+
+columnar_db = pytest.importorskip("app.database.columnar_db")
+
+MEASURES = ["soucet", "soucet_abs", "pocet", "prumer", "minimum", "maximum", "prijmy", "vydaje"]
+
+
+def _assert_same_rows(sql_rows, columnar_rows):
+    assert [r["keys"] for r in columnar_rows] == [r["keys"] for r in sql_rows]
+    assert [r["group_keys"] for r in columnar_rows] == [r["group_keys"] for r in sql_rows]
+    for sql_row, columnar_row in zip(sql_rows, columnar_rows):
+        # Součty se liší jen pořadím sčítání (zaokrouhlení float)
+        assert columnar_row["total"] == pytest.approx(sql_row["total"], abs=1e-6)
+        assert columnar_row["values"] == pytest.approx(sql_row["values"], abs=1e-6)
+
+
+@pytest.mark.parametrize("dims", [
+    ["kategorie_id"],
+    ["kategorie_uroven_1", "stredisko"],
+    ["co", "firma"],
+    ["rok", "mesic"],
+    ["stredisko", "kdo", "text"],
+])
+@pytest.mark.parametrize("is_current", [0, 1])
+def test_columnar_pivot_matches_sql(profile, dims, is_current):
+    snapshot = columnar_db.get_snapshot(profile)
+    sql_rows = db.get_pivot_rows(profile, dims, is_current, measures=MEASURES)
+    columnar_rows = snapshot.group_by(dims, is_current, None, None, MEASURES, None)
+    _assert_same_rows(sql_rows, columnar_rows)
+
+
+def test_columnar_top_n_and_type_filter_match_sql(profile):
+    dims = ["kategorie_uroven_1", "co"]
+    snapshot = columnar_db.get_snapshot(profile)
+    sql_rows = db.get_pivot_rows(profile, dims, 0, ["výdej"], measures=MEASURES, top_n=3)
+    columnar_rows = snapshot.group_by(dims, 0, ["výdej"], None, MEASURES, 3)
+    _assert_same_rows(sql_rows, columnar_rows)
+
+
+def test_snapshot_follows_data_version(profile):
+    snapshot = columnar_db.get_snapshot(profile)
+    db.add_item(profile, "2024-05-01", "T1", "banka", "Firma", "Test", 0, 10, -10,
+                None, None, "Test", "", "", 0)
+
+    fresh = columnar_db.get_snapshot(profile)
+    assert fresh.data_version == db.get_data_version(profile) != snapshot.data_version
+    assert fresh.row_count == snapshot.row_count + 1
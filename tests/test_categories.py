@@ -0,0 +1,56 @@
+import sqlite3
+
+from app import database as db
+
+
+def _closure(conn):
+    return set(conn.execute("SELECT ancestor_id, descendant_id, depth FROM kategorie_closure").fetchall())
+
+
+def _expected_closure(conn):
+    """Uzávěr spočítaný znovu z parent_id (stejně jako rebuild_category_closure)."""
+    return set(conn.execute("""
+        WITH RECURSIVE closure(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM kategorie
+            UNION ALL
+            SELECT c.ancestor_id, k.id, c.depth + 1
+            FROM kategorie k
+            JOIN closure c ON k.parent_id = c.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM closure
+    """).fetchall())
+
+
+def test_closure_follows_category_move(profile):
+    root_id = db.add_category(profile, "Testovací kořen", "výdej", None, is_custom=1)
+    branch_id = db.add_category(profile, "Testovací větev", "výdej", root_id, is_custom=1)
+    leaf_id = db.add_category(profile, "Testovací list", "výdej", branch_id)
+    target_id = db.add_category(profile, "Nový rodič", "výdej", None, is_custom=1)
+
+    conn = sqlite3.connect(profile)
+    try:
+        assert _closure(conn) == _expected_closure(conn)
+        conn.execute("UPDATE kategorie SET parent_id = ? WHERE id = ?", (target_id, branch_id))
+        conn.commit()
+
+        closure = _closure(conn)
+        assert closure == _expected_closure(conn)
+        assert (target_id, leaf_id, 2) in closure
+        assert not any(a == root_id and d in (branch_id, leaf_id) for a, d, _ in closure)
+    finally:
+        conn.close()
+
+    assert db.get_subtree_leaf_ids(profile, target_id) == [leaf_id]
+
+
+def test_closure_drops_deleted_category(profile):
+    parent_id = db.add_category(profile, "Dočasný rodič", "příjem", None, is_custom=1)
+    leaf_id = db.add_category(profile, "Dočasný list", "příjem", parent_id)
+    db.delete_category(profile, leaf_id)
+
+    conn = sqlite3.connect(profile)
+    try:
+        assert _closure(conn) == _expected_closure(conn)
+        assert not any(leaf_id in (a, d) for a, d, _ in _closure(conn))
+    finally:
+        conn.close()
@@ -0,0 +1,41 @@
+import pytest
+
+from app import database as db
+from app.database.items_db import build_fts_query, parse_date_bound
+
+
+def test_build_fts_query_quotes_each_word_as_prefix():
+    assert build_fts_query(["kava", "mleko"]) == '"kava"* AND "mleko"*'
+
+
+def test_build_fts_query_escapes_fts_syntax():
+    # Uvozovky se zdvojí, operátory a dvojtečky zůstanou uvnitř řetězce
+    assert build_fts_query(['a"b']) == '"a""b"*'
+    assert build_fts_query(["text:NOT", "(x"]) == '"text:NOT"* AND "(x"*'
+
+
+def test_fulltext_search_accepts_fts_syntax(profile):
+    assert db.get_filtered_items(profile, 0, hledat='"( NOT: *') == []
+
+
+@pytest.mark.parametrize("value, end, expected", [
+    ("2024-03-15", False, 20240315),
+    ("15.3.2024", True, 20240315),
+    ("2024", False, 20240101),
+    ("2024", True, 20241231),
+    ("2024-03", False, 20240301),
+    ("3.2024", True, 20240399),
+    ("03/2024", False, 20240301),
+])
+def test_parse_date_bound(value, end, expected):
+    assert parse_date_bound(value, end=end) == expected
+
+
+@pytest.mark.parametrize("value", ["", "zítra", "2024-13", "13.2024", "32.1.2024"])
+def test_parse_date_bound_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_date_bound(value)
+
+
+def test_filter_by_unknown_co_returns_nothing(profile):
+    assert db.get_filtered_items(profile, 0, co="neexistující hodnota") == []
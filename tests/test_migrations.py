@@ -0,0 +1,43 @@
+import sqlite3
+
+from app import database as db
+from app.database import items_db, migrations
+
+
+def _count(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_run_migrations_upgrades_baseline_profile(baseline_db):
+    items_before = _count(baseline_db, "SELECT COUNT(*) FROM items")
+
+    applied = db.init_db(baseline_db)
+
+    assert applied == [name for _, name, _, _ in migrations.MIGRATIONS]
+    assert _count(baseline_db, "PRAGMA user_version") == migrations.SCHEMA_VERSION
+    assert _count(baseline_db, "SELECT COUNT(*) FROM items_data") == items_before
+    # Pohled 'items' vrací stejné řádky jako dřívější tabulka
+    assert _count(baseline_db, "SELECT COUNT(*) FROM items") == items_before
+
+
+def test_run_migrations_is_noop_on_current_profile(profile):
+    conn = sqlite3.connect(profile)
+    try:
+        assert migrations.run_migrations(conn) == []
+    finally:
+        conn.close()
+
+
+def test_missing_fulltext_index_is_created_on_next_open(profile):
+    conn = sqlite3.connect(profile)
+    conn.execute(f"DROP TABLE {items_db.FTS_TABLE}")
+    conn.commit()
+    conn.close()
+
+    assert db.init_db(profile) == ["Fulltextový index transakcí"]
+    assert _count(profile, f"SELECT COUNT(*) FROM {items_db.FTS_TABLE}") == \
+        _count(profile, "SELECT COUNT(*) FROM items_data")
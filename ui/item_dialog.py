@@ -144,8 +144,7 @@ def open_item_dialog(parent_tab, mode="add", item_data=None):
         
         # Validace Co
         if co:
-            custom_categories = db.get_custom_category_names(parent_tab.app.profile_path)
-            if co in custom_categories:
+            if co in db.get_category_index(parent_tab.app.profile_path).custom_names:
                 messagebox.showerror("Chybné pole Co", f"'{co}' je název custom kategorie (kontejneru). Použijte prosím jinou hodnotu.")
                 return
         
@@ -175,18 +174,9 @@ def open_item_dialog(parent_tab, mode="add", item_data=None):
         win.destroy()
         parent_tab.load_items()
 
-        # Po operaci refresh
+        # Po operaci refresh - ostatní záložky se obnoví až při zobrazení
         parent_tab.app.update_tabs_visibility()
-        if hasattr(parent_tab.app, 'accounting_ui'):
-            parent_tab.app.accounting_ui.refresh_data()
-        if hasattr(parent_tab.app, 'budget_ui'):
-            parent_tab.app.budget_ui.load_data()
-        if hasattr(parent_tab.app, 'analysis_tab'):
-            parent_tab.app.analysis_tab.load()
-        
-        # Invalidace cache pro dashboard a stats_window
-        if hasattr(parent_tab.app, 'dashboard_ui'):
-            parent_tab.app.dashboard_ui.invalidate_cache()
+        parent_tab.app.notify_data_changed(source=parent_tab.tab_frame)
 
     def cancel():
         win.destroy()
@@ -109,12 +109,11 @@ class StatsWindow:
                 self._update_footer(0, 0, 0)
                 return
             
-            # Vypočítej hodnoty pro všechny kategorie (LEAF i CUSTOM)
-            # a připrav data pro zobrazení
+            # Hodnoty CUSTOM kategorií jsou už sečtené v SQL (součet LEAF potomků),
+            # jen připrav data pro zobrazení
             display_data = {}
             for cat_id, cat_info in self.stats_data.items():
-                # Spočítej hodnoty rekurzivně (CUSTOM nebo LEAF)
-                values = dashboard_db.calculate_custom_values(self.stats_data, cat_id)
+                values = cat_info
                 
                 display_data[cat_id] = {
                     'id': cat_id,
@@ -150,7 +149,8 @@ class StatsWindow:
             for cat_id, data in filtered_data.items():
                 if data['parent_id'] is None:
                     ytd = dashboard_db.get_ytd_for_category(
-                        self.app.profile_path, cat_id, self.month, data=self.stats_data
+                        self.app.profile_path, cat_id, self.month,
+                        backend=self.app.analytics_backend
                     )
                     total_ytd += ytd
             
@@ -196,15 +196,18 @@ class StatsWindow:
             
             # Načti měsíční data pro Min.transakce (is_current=0) a Akt.transakce (is_current=1)
             historical_month = dashboard_db.get_month_data_for_category(
-                self.app.profile_path, cat_id, self.month, is_current=False, data=self.stats_data
+                self.app.profile_path, cat_id, self.month, is_current=False,
+                backend=self.app.analytics_backend
             )
             current_month = dashboard_db.get_month_data_for_category(
-                self.app.profile_path, cat_id, self.month, is_current=True, data=self.stats_data
+                self.app.profile_path, cat_id, self.month, is_current=True,
+                backend=self.app.analytics_backend
             )
             
             # Načti YTD (Year-To-Date) = součet od ledna do aktuálního měsíce
             ytd = dashboard_db.get_ytd_for_category(
-                self.app.profile_path, cat_id, self.month, data=self.stats_data
+                self.app.profile_path, cat_id, self.month,
+                backend=self.app.analytics_backend
             )
             
             # Formátování částek (s 2 desetinnými místy)
@@ -14,13 +14,17 @@ class AccountingStructureTab:
         self.app = app_controller
         self.tab_frame = tab_frame
         self.active_tree = None
+        # Nezařazené hodnoty 'co' (pořadí = řádky levých seznamů) a jejich návrhy kategorií
+        self._unassigned = {'příjem': [], 'výdej': []}
+        self._suggestions = {'příjem': {}, 'výdej': {}}
 
         self._setup_layout()
         self._setup_left_panel()
         self._setup_controls_panel()
         self._setup_right_panel()
         
-        self.refresh_data()
+        # Data se načtou při zobrazení záložky (a znovu jen po změně dat)
+        self.app.register_view(self.tab_frame, self.refresh_data)
 
     # --- METODY PRO SESTAVENÍ UI ---
 
@@ -54,6 +58,7 @@ class AccountingStructureTab:
         ttk.Label(self.controls_frame, text="Zařadit položku:").pack(pady=(10, 2))
         ttk.Button(self.controls_frame, text="Přidat jako hlavní >>", command=self.add_as_main_category).pack(pady=5, padx=5, fill='x')
         ttk.Button(self.controls_frame, text="Přidat jako podkategorii >>", command=self.add_as_subcategory).pack(pady=5, padx=5, fill='x')
+        ttk.Button(self.controls_frame, text="Zařadit do návrhu >>", command=self.assign_to_suggestion).pack(pady=5, padx=5, fill='x')
         
         ttk.Separator(self.controls_frame, orient='horizontal').pack(fill='x', pady=20)
 
@@ -93,9 +98,9 @@ class AccountingStructureTab:
         list_frame.pack(fill='both', expand=True, padx=5, pady=5)
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical")
         if height:
-            listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, height=height)
+            listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, height=height, selectmode=tk.EXTENDED)
         else:
-            listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set)
+            listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, selectmode=tk.EXTENDED)
         scrollbar.config(command=listbox.yview)
         scrollbar.pack(side="right", fill="y")
         listbox.pack(side="left", fill="both", expand=True)
@@ -120,8 +125,13 @@ class AccountingStructureTab:
         for lst in [self.list_prijmy, self.list_vydaje]:
             lst.delete(0, tk.END)
         sorted_items = db.get_unassigned_categories_by_type(self.app.profile_path)
-        for item in sorted_items['příjem']: self.list_prijmy.insert(tk.END, item)
-        for item in sorted_items['výdej']: self.list_vydaje.insert(tk.END, item)
+        # Návrhy pro celý seznam jedním průchodem (index podobnosti se staví jednou)
+        self._unassigned = sorted_items
+        self._suggestions = db.get_category_suggestions(self.app.profile_path, sorted_items)
+        for typ, listbox in (('příjem', self.list_prijmy), ('výdej', self.list_vydaje)):
+            for item in sorted_items[typ]:
+                suggestions = self._suggestions[typ].get(item)
+                listbox.insert(tk.END, f"{item}  →  {suggestions[0][1]}" if suggestions else item)
 
     def load_categories_tree(self):
         """
@@ -223,38 +233,61 @@ class AccountingStructureTab:
                 )
             
             self.refresh_data()
+            self.app.notify_data_changed(source=self.tab_frame)
             
         except ValueError as e:
             messagebox.showerror("Chyba", str(e))
 
-    def get_selected_unassigned_with_type(self):        
+    def _apply_decisions(self, decisions):
+        """
+        Provede hromadné zařazení (db.apply_category_decisions) s UI notifikacemi.
+
+        Všechna rozhodnutí se uloží v jedné transakci - při chybě se neuloží nic.
+        """
+        is_first_category = not db.has_categories(self.app.profile_path)
+
+        try:
+            db.apply_category_decisions(self.app.profile_path, decisions)
+        except ValueError as e:
+            messagebox.showerror("Chyba", str(e))
+            return
+
+        # Pokud to byla první přidaná kategorie, odemkneme záložku Rozpočet
+        if is_first_category:
+            self.app.update_tabs_visibility()
+            messagebox.showinfo(
+                "Rozpočet je připraven",
+                "Byla vytvořena první kategorie a záložka 'Rozpočet' je nyní k dispozici.\n\nMůžete pokračovat v tvorbě účetní osnovy."
+            )
+
+        self.refresh_data()
+        self.app.notify_data_changed(source=self.tab_frame)
+
+    def get_selected_unassigned(self):
+        """Vrátí všechny vybrané položky levých seznamů jako [(název, typ), ...]."""
         listbox_map = {'příjem': self.list_prijmy, 'výdej': self.list_vydaje}
+        selected = []
         for typ, listbox in listbox_map.items():
-            selected_indices = listbox.curselection()
-            if selected_indices:
-                name = listbox.get(selected_indices[0])
-                return name, typ
-        return None, None
+            # Text řádku může obsahovat návrh, název bereme ze seznamu
+            selected.extend((self._unassigned[typ][index], typ) for index in listbox.curselection())
+        return selected
     
     def add_as_main_category(self):
-        """Přidá LEAF kategorii na root úroveň s přiřazením transakcí."""
-        name, typ = self.get_selected_unassigned_with_type()
-        if not name:
+        """Přidá vybrané položky jako LEAF kategorie na root úroveň s přiřazením transakcí."""
+        selected = self.get_selected_unassigned()
+        if not selected:
             messagebox.showwarning("Chyba", "Nejprve vyberte položku v jednom z levých seznamů.")
             return
         
-        self._add_category_workflow(
-            nazev=name,
-            typ=typ,
-            parent_id=None,
-            is_custom=0,
-            assign_transactions=True
-        )
+        self._apply_decisions([
+            {'co': name, 'typ': typ, 'parent_id': None, 'kategorie_id': None}
+            for name, typ in selected
+        ])
 
     def add_as_subcategory(self):
-        """Přidá LEAF kategorii pod vybranou CUSTOM kategorii s přiřazením transakcí."""
-        name, actual_type = self.get_selected_unassigned_with_type()
-        if not name:
+        """Přidá vybrané položky jako LEAF kategorie pod vybranou CUSTOM kategorii s přiřazením transakcí."""
+        selected = self.get_selected_unassigned()
+        if not selected:
             messagebox.showwarning("Chyba", "Nejprve vyberte položku v jednom z levých seznamů.")
             return
         
@@ -265,14 +298,29 @@ class AccountingStructureTab:
         
         parent_id = self.active_tree.item(self.active_tree.focus())['values'][0]
         
-        # Validace typu se děje v DB vrstvě (add_category)
-        self._add_category_workflow(
-            nazev=name,
-            typ=actual_type,  # Použijeme actual_type (z levého panelu)
-            parent_id=parent_id,
-            is_custom=0,
-            assign_transactions=True
-        )
+        # Validace typu se děje v DB vrstvě (insert_category)
+        self._apply_decisions([
+            {'co': name, 'typ': typ, 'parent_id': parent_id, 'kategorie_id': None}
+            for name, typ in selected
+        ])
+
+    def assign_to_suggestion(self):
+        """Zařadí transakce vybraných položek do nejlépe navržených existujících kategorií."""
+        selected = self.get_selected_unassigned()
+        if not selected:
+            messagebox.showwarning("Chyba", "Nejprve vyberte položku v jednom z levých seznamů.")
+            return
+
+        decisions = []
+        for name, typ in selected:
+            suggestions = self._suggestions[typ].get(name)
+            if suggestions:
+                decisions.append({'co': name, 'typ': typ, 'parent_id': None, 'kategorie_id': suggestions[0][0]})
+        if not decisions:
+            messagebox.showinfo("Bez návrhu", "Pro vybrané položky není žádná podobná kategorie.")
+            return
+
+        self._apply_decisions(decisions)
 
     def delete_category(self):       
         if not self.active_tree:
@@ -291,6 +339,7 @@ class AccountingStructureTab:
             db.unassign_items_from_category(self.app.profile_path, category_id)
             db.delete_category(self.app.profile_path, category_id)
             self.refresh_data()
+            self.app.notify_data_changed(source=self.tab_frame)
 
     def add_custom_category(self):
         """Vytvoří CUSTOM kategorii (agregační, bez transakcí) na root nebo pod CUSTOM parent."""
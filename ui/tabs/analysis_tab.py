@@ -7,6 +7,17 @@ from app.utils import format_money
 from ui.hierarchy_dialog import open_hierarchy_dialog
 
 
+# Dimenze s vysokou kardinalitou - pivot s nimi se načítá líně (po rozbalení uzlu)
+LAZY_DIMS = {'text', 'firma'}
+# Text dočasného potomka, díky kterému má nenačtený uzel ikonu pro rozbalení
+_PLACEHOLDER_TEXT = 'Načítání…'
+# Základní dimenze + UI label dimenzí úrovní hierarchie kategorií ('kategorie – úroveň 1', ...)
+_BASE_DIMS = ['kategorie', 'stredisko', 'text', 'kdo', 'firma', 'rok', 'ctvrtleti', 'mesic', 'tyden']
+_CATEGORY_LEVEL_LABEL = 'kategorie – úroveň '
+# Volby omezení počtu skupin u dimenzí s vysokou kardinalitou (zbytek = 'Ostatní')
+_TOP_N_OPTIONS = ['20', '50', '100', '500', 'Vše']
+
+
 class AnalysisTab:
     """Analysis tab UI scaffold.
 
@@ -17,6 +28,15 @@ class AnalysisTab:
         self.app = app_controller
         self.parent = tab_frame
 
+        # Cache výsledků pivotu: (druh, dims, is_current, allowed_types, filtry) -> rows
+        # Platí jen pro verzi dat profilu, pro kterou byla naplněna.
+        self._pivot_cache = {}
+        self._pivot_cache_version = None
+
+        # Líný režim: iid uzlu -> klíče skupin od kořene (pro filtrované dotazy na děti)
+        self._lazy_paths = {}
+        self._lazy_query = None  # (dims, is_current, allowed_types) posledního líného načtení
+
         container = ttk.Frame(tab_frame, padding=8)
         container.pack(fill='both', expand=True)
 
@@ -39,7 +59,8 @@ class AnalysisTab:
 
         ttk.Label(ctrl, text="Řádky:").pack(side='left', padx=(12,0))
         # hierarchy selection via dialog (UI labels). 'kategorie' je uživatelský název pro kategorie_id
-        self.available_dims = ['kategorie','stredisko','text','kdo','firma']
+        self.available_dims = list(_BASE_DIMS)
+        self._refresh_available_dims()
         self.row_dims = ['stredisko']  # default selection
         self.hierarchy_btn = ttk.Button(ctrl, text="Upravit hierarchii...", command=self._open_hierarchy_dialog)
         self.hierarchy_btn.pack(side='left', padx=6)
@@ -66,16 +87,33 @@ class AnalysisTab:
         ttk.Checkbutton(types_frame, text='Příjmy', variable=self.include_income_var, command=self.load).pack(side='left', padx=4)
         ttk.Checkbutton(types_frame, text='Výdaje', variable=self.include_expense_var, command=self.load).pack(side='left', padx=4)
 
+        # Míry (sloupce) - všechny se spočítají jedním dotazem
+        measures_btn = ttk.Menubutton(ctrl, text='Míry')
+        measures_menu = tk.Menu(measures_btn, tearoff=0)
+        self.measure_vars = {}
+        for measure in db.MEASURES:
+            var = tk.BooleanVar(value=(measure == 'soucet'))
+            self.measure_vars[measure] = var
+            measures_menu.add_checkbutton(label=db.MEASURE_LABELS[measure], variable=var, command=self.load)
+        measures_btn['menu'] = measures_menu
+        measures_btn.pack(side='left', padx=(18,0))
+
+        # Top-N pro dimenze s vysokou kardinalitou (text, firma) - zbytek se sloučí do 'Ostatní'
+        ttk.Label(ctrl, text="Top:").pack(side='left', padx=(12,0))
+        self.top_n_var = tk.StringVar(value='100')
+        top_n_cb = ttk.Combobox(ctrl, textvariable=self.top_n_var, values=_TOP_N_OPTIONS, state='readonly', width=5)
+        top_n_cb.pack(side='left', padx=6)
+        top_n_cb.bind('<<ComboboxSelected>>', lambda e: self.load())
+
         # Note: search/export/drilldown are postponed; UI simplified for MVP.
 
         # --- Main area: Treeview for results ---
         body = ttk.Frame(container)
         body.pack(fill='both', expand=True)
 
-        self.tree = ttk.Treeview(body, columns=('total',), show='tree headings')
+        self.tree = ttk.Treeview(body, columns=('soucet',), show='tree headings')
         self.tree.heading('#0', text='Řádek')
-        self.tree.heading('total', text='Celkem')
-        self.tree.column('total', width=120, anchor='e')
+        self._configure_columns(['soucet'])
         self.tree.pack(side='left', fill='both', expand=True)
 
         vsb = ttk.Scrollbar(body, orient='vertical', command=self.tree.yview)
@@ -83,11 +121,13 @@ class AnalysisTab:
         vsb.pack(side='left', fill='y')
 
         # Drill-down is postponed; do not bind double-click yet.
+        # Líný režim: děti uzlu se načtou až při jeho rozbalení
+        self.tree.bind('<<TreeviewOpen>>', self._on_tree_open)
 
-        # Initial placeholder
-        self._on_preset_change()  # set initial state and load
-        # Načtení aktuálních změn (učetní osnova...) při zviditelnění tabu
-        self.parent.bind("<Visibility>", lambda e: self.load())
+        # Výchozí stav presetu - data se načtou až při zobrazení záložky
+        self._apply_preset()
+        # Načtení aktuálních změn (účetní osnova...) při zobrazení tabu, jen pokud se data změnila
+        self.app.register_view(self.parent, self.load)
 
     def _show_placeholder(self):
         for i in self.tree.get_children():
@@ -99,6 +139,11 @@ class AnalysisTab:
         # Vyčistit strom
         for i in self.tree.get_children():
             self.tree.delete(i)
+        self._lazy_paths.clear()
+        self._lazy_query = None
+
+        measures = self._selected_measures()
+        self._configure_columns(measures)
 
         is_current = 1 if self.current_var.get() == 'Aktuální' else 0
         # Mapování UI labelů na DB sloupce
@@ -121,8 +166,16 @@ class AnalysisTab:
             elif exp_val:
                 allowed_types = ['výdej']
 
+        # Vysoká kardinalita (text, firma) → po úrovních (zbytek po rozbalení) a s top-N
+        if LAZY_DIMS.intersection(dims):
+            self._lazy_query = (dims, is_current, allowed_types, measures)
+            self._load_lazy_children('', [])
+            if not self.tree.get_children():
+                self._show_placeholder()
+            return
+
         try:
-            rows = db.get_pivot_rows(self.app.profile_path, dims, is_current, allowed_types)
+            rows = self._get_pivot_tree_cached(dims, is_current, allowed_types, measures)
         except Exception:
             # Pokud by se něco pokazilo, zobrazíme placeholder (tiché selhání v UI)
             self._show_placeholder()
@@ -130,50 +183,125 @@ class AnalysisTab:
 
         # Bez dimenzí – jen jeden řádek s celkem
         if not dims:
-            total = rows[0]['total'] if rows else 0.0
-            self.tree.insert('', 'end', text='Celkem', values=(format_money(total, use_abs=False),))
+            values = self._format_values(rows[0], measures) if rows else ('',)
+            self.tree.insert('', 'end', text='Celkem', values=values)
             return
 
         if not rows:
             self._show_placeholder()
             return
 
-        # 1) Spočítat sumy pro všechny prefixy cest (aby měly hodnotu i rodiče)
-        from collections import defaultdict
-        sums = defaultdict(float)
-        max_depth = 0
-        # Předzpracujeme také sekvence klíčů s náhradou prázdných řetězců
-        processed = []
+        # Řádky přichází v pořadí stromu (rodič před potomky, mezisoučty spočítá SQL),
+        # stačí si pamatovat poslední vložený uzel na každé úrovni.
+        parents = {0: ''}
+        for r in rows:
+            level = r['level']
+            key = r['keys'][-1]
+            parents[level] = self.tree.insert(
+                parents[level - 1], 'end',
+                text=key if key != "" else "—",
+                values=self._format_values(r, measures),
+                open=False
+            )
+
+    def _load_lazy_children(self, parent_iid, path):
+        """Načte a vloží děti uzlu (líný režim) jedním filtrovaným dotazem get_pivot_rows."""
+        dims, is_current, allowed_types, measures = self._lazy_query
+        depth = len(path)
+        filters = dict(zip(dims[:depth], path))
+        top_n = self._top_n() if dims[depth] in LAZY_DIMS else None
+        try:
+            rows = self._get_pivot_rows_cached(dims[:depth + 1], is_current, allowed_types, filters, measures, top_n)
+        except Exception:
+            return
+
         for r in rows:
-            keys = [k if (k is not None and k != "") else "—" for k in r['keys']]
-            total = float(r['total'] or 0.0)
-            processed.append((keys, total))
-            max_depth = max(max_depth, len(keys))
-            for d in range(1, len(keys) + 1):
-                sums[tuple(keys[:d])] += total
-
-        # 2) Vykreslit uzly po vrstvách, aby rodiče vznikli dřív
-        nodes = {}  # path tuple -> iid
-        for depth in range(1, max_depth + 1):
-            added = set()
-            for keys, _ in processed:
-                if len(keys) < depth:
-                    continue
-                path = tuple(keys[:depth])
-                if path in added:
-                    continue
-                parent_path = path[:-1]
-                parent_iid = nodes[parent_path] if parent_path in nodes else ''
-                iid = self.tree.insert(
-                    parent_iid, 'end',
-                    text=path[-1],
-                    values=(format_money(sums[path], use_abs=False),),
-                    open=False
-                )
-                nodes[path] = iid
-                added.add(path)
+            key = r['keys'][-1]
+            iid = self.tree.insert(
+                parent_iid, 'end',
+                text=key if key != "" else "—",
+                values=self._format_values(r, measures),
+                open=False
+            )
+            # Sloučený řádek 'Ostatní' (klíč None) nejde dál rozbalit
+            if depth + 1 < len(dims) and r['group_keys'][-1] is not None:
+                self._lazy_paths[iid] = path + [r['group_keys'][-1]]
+                self.tree.insert(iid, 'end', text=_PLACEHOLDER_TEXT, values=('',))
+
+    def _on_tree_open(self, event=None):
+        """Při rozbalení nenačteného uzlu nahradí placeholder skutečnými dětmi."""
+        iid = self.tree.focus()
+        if not self._lazy_query or iid not in self._lazy_paths:
+            return
+        path = self._lazy_paths.pop(iid)
+        for child in self.tree.get_children(iid):
+            self.tree.delete(child)
+        self._load_lazy_children(iid, path)
+
+    def _get_pivot_tree_cached(self, dims, is_current, allowed_types, measures):
+        """Vrátí výsledek get_pivot_tree z cache; při změně dat profilu cache zahodí."""
+        key = ('tree', tuple(dims), is_current, tuple(allowed_types) if allowed_types else None,
+               tuple(measures))
+        return self._get_cached(key, lambda: db.get_pivot_tree(
+            self.app.profile_path, dims, is_current, allowed_types, measures=measures))
+
+    def _get_pivot_rows_cached(self, dims, is_current, allowed_types, filters, measures, top_n=None):
+        """Vrátí výsledek get_pivot_rows (s filtry) z cache; při změně dat profilu cache zahodí."""
+        key = ('rows', tuple(dims), is_current, tuple(allowed_types) if allowed_types else None,
+               tuple(filters.items()), tuple(measures), top_n)
+        return self._get_cached(key, lambda: db.get_pivot_rows(
+            self.app.profile_path, dims, is_current, allowed_types, filters=filters,
+            backend=self.app.analytics_backend, measures=measures, top_n=top_n))
+
+    def _top_n(self):
+        """Vrátí zvolený počet skupin pro dimenze s vysokou kardinalitou (None = vše)."""
+        value = self.top_n_var.get()
+        return int(value) if value.isdigit() else None
+
+    def _selected_measures(self):
+        """Vrátí zaškrtnuté míry v pořadí db.MEASURES (bez výběru jen 'soucet')."""
+        measures = [m for m in db.MEASURES if self.measure_vars[m].get()]
+        return measures or ['soucet']
+
+    def _configure_columns(self, measures):
+        """Nastaví sloupce stromu podle zvolených měr."""
+        if tuple(self.tree['columns']) == tuple(measures):
+            return
+        self.tree.configure(columns=measures)
+        for measure in measures:
+            self.tree.heading(measure, text=db.MEASURE_LABELS[measure])
+            self.tree.column(measure, width=120, anchor='e')
+
+    def _format_values(self, row, measures):
+        """Naformátuje hodnoty měr řádku pivotu pro sloupce stromu."""
+        out = []
+        for measure in measures:
+            value = row['values'].get(measure)
+            if value is None:
+                out.append('—')
+            elif measure == 'pocet':
+                out.append(str(value))
+            else:
+                out.append(format_money(value, use_abs=False))
+        return tuple(out)
+
+    def _get_cached(self, key, loader):
+        """Společná cache pivot dotazů platná pro jednu verzi dat profilu."""
+        version = db.get_data_version(self.app.profile_path)
+        if version != self._pivot_cache_version:
+            self._pivot_cache.clear()
+            self._pivot_cache_version = version
+
+        if key not in self._pivot_cache:
+            self._pivot_cache[key] = loader()
+        return self._pivot_cache[key]
 
     def _on_preset_change(self, event=None):
+        """Apply preset defaults and reload the view."""
+        self._apply_preset()
+        self.load()
+
+    def _apply_preset(self):
         """Apply preset defaults and enable hierarchy editing only for 'Vlastní'."""
         preset = self.preset_var.get()
         if preset == 'Analýza středisek':
@@ -196,10 +324,16 @@ class AnalysisTab:
                 self.row_dims = ['stredisko']
         # Sanitize na aktuální dostupné dimenze (odstraníme legacy 'co' apod.)
         self.row_dims = [d for d in self.row_dims if d in self.available_dims]
-        # load view for new preset
-        self.load()
+
+    def _refresh_available_dims(self):
+        """Doplní k základním dimenzím úrovně hierarchie kategorií podle aktuální osnovy."""
+        levels = min(db.get_category_level_count(self.app.profile_path), db.MAX_CATEGORY_LEVELS)
+        level_dims = [f"{_CATEGORY_LEVEL_LABEL}{n}" for n in range(1, levels + 1)] if levels > 1 else []
+        self.available_dims = list(_BASE_DIMS) + level_dims
 
     def _open_hierarchy_dialog(self):
+        self._refresh_available_dims()
+
         def _apply(new_dims):
             self.row_dims = [d for d in new_dims if d in self.available_dims]
             self.load()
@@ -207,4 +341,6 @@ class AnalysisTab:
 
     def _map_dim_to_column(self, dim_label: str) -> str:
         """Mapuje UI label na název sloupce v DB."""
+        if dim_label.startswith(_CATEGORY_LEVEL_LABEL):
+            return f"{db.CATEGORY_LEVEL_PREFIX}{dim_label[len(_CATEGORY_LEVEL_LABEL):]}"
         return 'kategorie_id' if dim_label == 'kategorie' else dim_label
@@ -37,8 +37,8 @@ class BudgetTab:
         self._cats_with_children = set()
         self._active_editor = None  # (entry, tree, iid)
 
-        # Tato událost zajistí, že se data načtou vždy, když se na záložku přepnete.
-        self.tab_frame.bind("<Visibility>", self.load_data)
+        # Data se načtou při zobrazení záložky, pokud se od posledního načtení změnila
+        self.app.register_view(self.tab_frame, self.load_data)
 
         # Dvojklik pro editaci rozpočtu (jen sloupec Rozpočet a jen listové kategorie)
         self.tree_prijmy.bind('<Double-1>', lambda e, t=self.tree_prijmy: self._on_double_click_budget(e, t))
@@ -264,10 +264,11 @@ class BudgetTab:
                 return
             db.update_or_insert_budget(self.app.profile_path, cat_id, float(value))
             
-            # NOVÉ: Přepočítej custom kategorie po změně podkategorie
-            db.update_custom_category_budgets(self.app.profile_path)
+            # Přepočítej custom předky změněné podkategorie
+            db.update_custom_category_budgets(self.app.profile_path, cat_id)
             
             self.load_data()
+            self.app.notify_data_changed(source=self.tab_frame)
 
             # po uložení: pokud předtím žádný rozpočet nebyl, právě vznikl první
             has_any_now = db.has_any_budget(self.app.profile_path)
@@ -199,7 +199,8 @@ class DashboardTab:
                 budget_summary = dashboard_db.get_month_total_budget_summary(
                     self.app.profile_path,
                     self.current_type,
-                    month
+                    month,
+                    backend=self.app.analytics_backend
                 )
                 
                 if not budget_summary:
@@ -5,7 +5,6 @@ import tkinter.messagebox as messagebox
 from datetime import datetime
 
 from app import database as db
-from app import file_importer 
 
 class HomeTab:
     def __init__(self, tab_frame, app_controller):
@@ -24,24 +23,26 @@ class HomeTab:
         Zkontroluje stav AKTUÁLNÍHO profilu a zobrazí další logický krok.
         """
         self.clear_tab()
+        # Všechny příznaky jedním (cachovaným) dotazem
+        state = db.get_profile_state(self.app.profile_path)
         
         # Priorita 1: Chybí vůbec nějaká historická data?
-        if not db.has_transactions(self.app.profile_path, is_current=0):
+        if not state["has_historical"]:
             self._show_step_import_data()
             return
         
         # Priorita 2: Chybí účetní osnova?
-        if not db.has_categories(self.app.profile_path):
+        if not state["has_categories"]:
             self._show_step_create_structure()
             return
 
         # Priorita 3: Chybí rozpočet?
-        if not db.has_any_budget(self.app.profile_path):
+        if not state["has_budget"]:
             self._show_step_create_budget()
             return
         
         # Priorita 4: Chybí aktuální transakce?
-        if not db.has_transactions(self.app.profile_path, is_current=1):
+        if not state["has_current"]:
             self._show_step_import_current()
             return
 
@@ -7,11 +7,17 @@ from ui.item_dialog import open_item_dialog
 from app import database as db
 from app.utils import format_money
 
+# Prodleva (ms) od posledního stisku klávesy do spuštění vyhledávání
+SEARCH_DEBOUNCE_MS = 300
+# Maximální počet zobrazených výsledků fulltextového hledání
+SEARCH_LIMIT = 1000
+
 class SourcesTab:
     def __init__(self, tab_frame, app_controller):
         self.app = app_controller
         self.tab_frame = tab_frame
         self.current_view = 0  # 0 pro historické, 1 pro aktuální
+        self._search_after_id = None  # naplánované hledání (debounce)
 
         # --- Horní panel s ovládacími prvky ---
         top_frame = ttk.Frame(self.tab_frame)
@@ -30,12 +36,25 @@ class SourcesTab:
         self.edit_button = ttk.Button(top_frame, text="Upravit…", command=self.open_edit_dialog)
         self.edit_button.pack(side='left', padx=(0, 10))
 
+        self.batch_edit_button = ttk.Button(top_frame, text="Hromadná úprava…", command=self.open_batch_edit_dialog)
+        self.batch_edit_button.pack(side='left', padx=(0, 10))
+
         self.delete_button = ttk.Button(top_frame, text="Smazat", command=self.delete_selected_item)
         self.delete_button.pack(side='left')
 
         # --- Panel s filtry ---
         filter_frame = ttk.LabelFrame(self.tab_frame, text="Filtry", padding=8)
         filter_frame.pack(fill='x', padx=10, pady=(0, 5))
+
+        # Row 0: Fulltext (text, firma, doklad) - hledá se při psaní
+        row0 = ttk.Frame(filter_frame)
+        row0.pack(fill='x', pady=2)
+
+        ttk.Label(row0, text="Hledat:").pack(side='left', padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(row0, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side='left')
+        self.search_var.trace_add('write', lambda *args: self._schedule_search())
         
         # Row 1: Částky a Co
         row1 = ttk.Frame(filter_frame)
@@ -75,12 +94,14 @@ class SourcesTab:
         
         self.tree = self._create_treeview(tree_frame)
 
-        self.tab_frame.bind("<Visibility>", lambda e: self._on_tab_visible())
+        # Načtení při zobrazení záložky, jen pokud se mezitím změnila data
+        self.app.register_view(self.tab_frame, self._on_tab_visible)
 
     def _create_treeview(self, parent):
         # Přidáváme 'id' jako skrytý sloupec a 'co' sloupec
         columns = ('id', 'datum', 'doklad', 'firma', 'text', 'co', 'castka')
-        tree = ttk.Treeview(parent, columns=columns, show='headings', displaycolumns=('datum', 'doklad', 'firma', 'text', 'co', 'castka'))
+        tree = ttk.Treeview(parent, columns=columns, show='headings', selectmode='extended',
+                            displaycolumns=('datum', 'doklad', 'firma', 'text', 'co', 'castka'))
         
         # ID sloupec je skrytý, nastavíme ale jeho heading pro lepší kód
         tree.heading('id', text='ID')
@@ -111,9 +132,8 @@ class SourcesTab:
         self.load_items()
     
     def _populate_co_dropdown(self):
-        """Načte všechny unikátní hodnoty 'Co' z transakcí"""
-        items = db.get_items(self.app.profile_path, self.current_view)
-        co_values = sorted(set(item[11] for item in items if item[11] and str(item[11]).strip()))
+        """Načte všechny unikátní hodnoty 'Co' z transakcí (z číselníku, bez načítání transakcí)"""
+        co_values = db.get_co_values(self.app.profile_path, self.current_view)
         self.filter_co['values'] = ['(vše)'] + co_values
         if self.filter_co_var.get() not in self.filter_co['values']:
             self.filter_co_var.set('(vše)')
@@ -122,6 +142,16 @@ class SourcesTab:
         """Aplikuje filtry na transakce"""
         self.load_items()
     
+    def _schedule_search(self):
+        """Odloží hledání, dokud uživatel nepřestane psát (debounce)."""
+        if self._search_after_id is not None:
+            self.tab_frame.after_cancel(self._search_after_id)
+        self._search_after_id = self.tab_frame.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_after_id = None
+        self.load_items()
+
     def _reset_filters(self):
         """Resetuje všechny filtry"""
         self.filter_castka_min.delete(0, 'end')
@@ -129,6 +159,10 @@ class SourcesTab:
         self.filter_co_var.set('(vše)')
         self.filter_datum_od.delete(0, 'end')
         self.filter_datum_do.delete(0, 'end')
+        self.search_var.set('')
+        if self._search_after_id is not None:
+            self.tab_frame.after_cancel(self._search_after_id)
+            self._search_after_id = None
         self.load_items()
 
     def toggle_view(self):
@@ -143,58 +177,38 @@ class SourcesTab:
 
     def load_items(self):
         """Načte položky do Treeview podle aktuálně zvoleného pohledu a aplikuje filtry."""
+        # === APLIKACE FILTRŮ (v SQL, datum přes indexovaný datum_ymd) ===
+        def parse_amount(entry):
+            value = entry.get().strip()
+            if not value:
+                return None
+            try:
+                return float(value.replace(',', '.').replace(' ', ''))
+            except ValueError:
+                return None  # Ignoruj špatný formát
+
+        co_value = self.filter_co_var.get()
+        search = self.search_var.get().strip()
+        try:
+            filtered_items = db.get_filtered_items(
+                self.app.profile_path,
+                self.current_view,
+                castka_min=parse_amount(self.filter_castka_min),
+                castka_max=parse_amount(self.filter_castka_max),
+                co=co_value if co_value and co_value != '(vše)' else None,
+                datum_od=self.filter_datum_od.get().strip() or None,
+                datum_do=self.filter_datum_do.get().strip() or None,
+                hledat=search or None,
+                limit=SEARCH_LIMIT if search else None,
+            )
+        except ValueError as e:
+            # Neplatné datum ve filtru - nic neskrýváme potichu, seznam zůstane beze změny
+            messagebox.showwarning("Neplatný filtr", str(e))
+            return
+
         for i in self.tree.get_children():
             self.tree.delete(i)
         
-        items = db.get_items(self.app.profile_path, self.current_view)
-        
-        # === APLIKACE FILTRŮ ===
-        filtered_items = []
-        
-        for item in items:
-            # Struktura: (id, datum, doklad, zdroj, firma, text, madati, dal, castka, cin, cislo, co, kdo, stredisko, is_current, kategorie_id)
-            
-            # Filter: Částka min
-            castka_min_str = self.filter_castka_min.get().strip()
-            if castka_min_str:
-                try:
-                    castka_min = float(castka_min_str.replace(',', '.').replace(' ', ''))
-                    if item[8] < castka_min:
-                        continue
-                except ValueError:
-                    pass  # Ignoruj špatný formát
-            
-            # Filter: Částka max
-            castka_max_str = self.filter_castka_max.get().strip()
-            if castka_max_str:
-                try:
-                    castka_max = float(castka_max_str.replace(',', '.').replace(' ', ''))
-                    if item[8] > castka_max:
-                        continue
-                except ValueError:
-                    pass
-            
-            # Filter: Co
-            co_value = self.filter_co_var.get()
-            if co_value and co_value != '(vše)':
-                if item[11] != co_value:
-                    continue
-            
-            # Filter: Datum od
-            datum_od_str = self.filter_datum_od.get().strip()
-            if datum_od_str:
-                if not item[1] or item[1] < datum_od_str:
-                    continue
-            
-            # Filter: Datum do
-            datum_do_str = self.filter_datum_do.get().strip()
-            if datum_do_str:
-                if not item[1] or item[1] > datum_do_str:
-                    continue
-            
-            # Transakce prošla všemi filtry
-            filtered_items.append(item)
-        
         # === ZOBRAZENÍ FILTROVANÝCH DAT ===
         for item in filtered_items:
             # Formátování částky - zobrazujeme se znaménkem (výdaje záporné, příjmy kladné)
@@ -222,45 +236,84 @@ class SourcesTab:
             tag = "incomplete" if is_incomplete else ""
             self.tree.insert('', 'end', values=display_values, tags=(tag,) if tag else ())
 
+    def _selected_item_ids(self):
+        """Vrátí ID všech vybraných transakcí (ID je první, skrytý sloupec)."""
+        return [int(self.tree.item(iid, 'values')[0]) for iid in self.tree.selection()]
+
+    def _after_items_changed(self):
+        """Jedno obnovení UI po (hromadné) změně transakcí."""
+        self._populate_co_dropdown()  # nová nebo zaniklá hodnota 'Co' po hromadné úpravě
+        self.load_items()
+        # Ostatní záložky (osnova, rozpočet, analýza, dashboard) se obnoví až při zobrazení
+        self.app.notify_data_changed(source=self.tab_frame)
+
     def delete_selected_item(self):
-        """Smaže vybranou transakci po potvrzení."""
+        """Smaže vybrané transakce (jednu i více) po potvrzení."""
         selection = self.tree.selection()
         if not selection:
             messagebox.showwarning("Upozornění", "Nejprve vyberte transakci, kterou chcete smazat.")
             return
         
-        # Získáme ID z prvního sloupce (skrytého)
-        item_data = self.tree.item(selection[0], 'values')
-        item_id = int(item_data[0])  # ID je první hodnota
-        
-        # Zobrazíme detaily pro potvrzení - upraveno pro nový sloupec "Co"
-        item_text = f"Datum: {item_data[1]}\nDoklad: {item_data[2]}\nFirma: {item_data[3]}\nText: {item_data[4]}\nCo: {item_data[5]}\nČástka: {item_data[6]}"
-        
-        result = messagebox.askyesno(
-            "Potvrzení smazání", 
-            f"Opravdu chcete smazat tuto transakci?\n\n{item_text}"
-        )
+        if len(selection) == 1:
+            item_data = self.tree.item(selection[0], 'values')
+            # Zobrazíme detaily pro potvrzení - upraveno pro nový sloupec "Co"
+            item_text = f"Datum: {item_data[1]}\nDoklad: {item_data[2]}\nFirma: {item_data[3]}\nText: {item_data[4]}\nCo: {item_data[5]}\nČástka: {item_data[6]}"
+            question = f"Opravdu chcete smazat tuto transakci?\n\n{item_text}"
+        else:
+            question = f"Opravdu chcete smazat {len(selection)} vybraných transakcí?"
         
-        if result:
+        if messagebox.askyesno("Potvrzení smazání", question):
             try:
-                # Smažeme z databáze
-                db.delete_item(self.app.profile_path, item_id)
-                
-                # Obnovíme zobrazení
-                self.load_items()
-                
-                # Refresh Accounting Structure Tab (pokud byla smazána poslední transakce daného typu)
-                if hasattr(self.app, 'accounting_ui'):
-                    self.app.accounting_ui.refresh_data()
-                
-                # Invalidace cache pro dashboard
-                if hasattr(self.app, 'dashboard_ui'):
-                    self.app.dashboard_ui.invalidate_cache()
-                
-                messagebox.showinfo("Úspěch", "Transakce byla úspěšně smazána.")
+                # Jedna transakce v DB, metriky jednou za dotčené kategorie
+                deleted = db.delete_items(self.app.profile_path, self._selected_item_ids())
+                self._after_items_changed()
+                messagebox.showinfo("Úspěch", f"Smazáno transakcí: {deleted}.")
             except Exception as e:
                 messagebox.showerror("Chyba", f"Při mazání transakce došlo k chybě:\n{str(e)}")
 
+    def open_batch_edit_dialog(self):
+        """Dialog pro nastavení jednoho pole všem vybraným transakcím."""
+        item_ids = self._selected_item_ids()
+        if not item_ids:
+            messagebox.showwarning("Výběr transakce", "Nejprve vyberte transakce, které chcete upravit.")
+            return
+
+        win = tk.Toplevel(self.tab_frame)
+        win.title("Hromadná úprava")
+        win.transient(self.tab_frame.winfo_toplevel())
+        win.grab_set()
+
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
+        ttk.Label(frame, text=f"Vybráno transakcí: {len(item_ids)}").grid(row=0, column=0, columnspan=2, sticky='w', pady=(0, 8))
+
+        ttk.Label(frame, text="Pole:").grid(row=1, column=0, sticky='w', padx=(0, 5))
+        field_var = tk.StringVar(value=db.BATCH_EDIT_FIELDS[0])
+        ttk.Combobox(frame, textvariable=field_var, values=list(db.BATCH_EDIT_FIELDS), state='readonly', width=18).grid(row=1, column=1, sticky='w')
+
+        ttk.Label(frame, text="Nová hodnota:").grid(row=2, column=0, sticky='w', padx=(0, 5), pady=(5, 0))
+        value_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=value_var, width=30).grid(row=2, column=1, sticky='w', pady=(5, 0))
+
+        def apply():
+            field = field_var.get()
+            value = value_var.get().strip()
+            if field == 'co' and value in db.get_category_index(self.app.profile_path).custom_names:
+                messagebox.showerror("Chybné pole Co", f"'{value}' je název custom kategorie (kontejneru). Použijte prosím jinou hodnotu.", parent=win)
+                return
+            try:
+                db.update_items_field(self.app.profile_path, item_ids, field, value)
+            except Exception as e:
+                messagebox.showerror("Chyba", f"Transakce se nepodařilo upravit:\n{e}", parent=win)
+                return
+            win.destroy()
+            self._after_items_changed()
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=3, column=0, columnspan=2, sticky='e', pady=(10, 0))
+        ttk.Button(buttons, text="Použít", command=apply).pack(side='left', padx=(0, 5))
+        ttk.Button(buttons, text="Zrušit", command=win.destroy).pack(side='left')
+
     def start_import(self):
         """Zahájí proces importu na základě aktuálního zobrazení."""
         self.app.import_excel(is_current=self.current_view)
@@ -278,6 +331,10 @@ class SourcesTab:
             messagebox.showwarning("Výběr transakce", 
                                  "Nejprve vyberte transakci, kterou chcete upravit.")
             return
+        # Více vybraných transakcí → hromadná úprava jednoho pole
+        if len(selection) > 1:
+            self.open_batch_edit_dialog()
+            return
         
         # Získej ID z treeview (první sloupec je skrytý ID)
         selected_item = selection[0]
@@ -7,7 +7,7 @@ from tkinter import messagebox
 
 import config 
 from app import database as db
-from app import file_importer
+from app import profile_catalog
 
 
 class WelcomeWindow:
@@ -41,28 +41,32 @@ class WelcomeWindow:
         ttk.Button(self.main_frame, text="Ne, vytvořit nový", command=self.confirm_create_empty).pack(fill="x", pady=5)
 
     def show_profile_list(self):
-        """Zobrazí seznam existujících .db souborů."""
+        """Zobrazí seznam existujících profilů s metadaty z katalogu (bez otevírání databází)."""
         self.clear_frame()
         ttk.Label(self.main_frame, text="Vyberte existující profil:").pack(pady=10)
         
-        # Listbox a scrollbar
+        # Tabulka profilů a scrollbar
         list_frame = ttk.Frame(self.main_frame)
         list_frame.pack(fill="both", expand=True)
         
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical")
-        self.profile_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, width=50)
-        scrollbar.config(command=self.profile_listbox.yview)
+        self.profile_tree = ttk.Treeview(list_frame, columns=("popis",), yscrollcommand=scrollbar.set, height=12)
+        self.profile_tree.heading("#0", text="Profil")
+        self.profile_tree.heading("popis", text="Obsah, poslední změna, velikost")
+        self.profile_tree.column("#0", width=200)
+        self.profile_tree.column("popis", width=380)
+        scrollbar.config(command=self.profile_tree.yview)
         
         scrollbar.pack(side="right", fill="y")
-        self.profile_listbox.pack(side="left", fill="both", expand=True)
+        self.profile_tree.pack(side="left", fill="both", expand=True)
+        self.profile_tree.bind("<Double-1>", lambda e: self.confirm_open_profile())
 
-        # Načteme profily
-        try:
-            files = [f for f in os.listdir(self.profiles_dir) if f.endswith('.db')]
-            for file in files:
-                self.profile_listbox.insert(tk.END, file)
-        except Exception as e:
-            print(f"Chyba při načítání profilů: {e}")
+        # Načteme profily (od naposledy změněného); iid položky = název souboru
+        for profile in profile_catalog.load_profile_catalog(self.profiles_dir):
+            self.profile_tree.insert(
+                "", tk.END, iid=profile["filename"], text=profile["filename"],
+                values=(profile_catalog.format_profile_summary(profile),)
+            )
 
         # Tlačítka
         ttk.Button(self.main_frame, text="Otevřít vybraný", command=self.confirm_open_profile).pack(pady=10)
@@ -70,11 +74,11 @@ class WelcomeWindow:
 
     
     def confirm_open_profile(self):
-        selection = self.profile_listbox.curselection()
+        selection = self.profile_tree.selection()
         if not selection:
             messagebox.showinfo("Upozornění", "Vyberte platný profil.")
             return
-        filename = self.profile_listbox.get(selection[0])
+        filename = selection[0]
         self.selected_profile_path = os.path.join(self.profiles_dir, filename)
         self.action = "open"
         self.top.destroy()